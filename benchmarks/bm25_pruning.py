@@ -0,0 +1,135 @@
+"""Benchmark BM25 dynamic pruning against exhaustive scoring.
+
+Builds a synthetic corpus from the vocabulary of a documents directory
+(Zipf-distributed terms, with common runbook terms in most documents),
+runs each query with and without pruning, checks that both return the
+same top-k and reports how many postings were read.
+
+Usage:
+    python benchmarks/bm25_pruning.py --docs ./docs --num-docs 50000
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from factstack.pipeline.bm25_index import PruningStats
+from factstack.pipeline.bm25_segments import SegmentedIndex
+from factstack.pipeline.chunking import find_documents
+
+
+# The repository's sample runbooks, wherever the benchmark is run from
+DEFAULT_DOCS_DIR = Path(__file__).resolve().parent.parent / "docs"
+
+# Terms present in most runbook chunks
+COMMON_TERMS = ["kubectl", "service", "error", "pod", "the", "to"]
+
+DEFAULT_QUERIES = [
+    "kubectl service error",
+    "rollback deployment",
+    "kubectl rollout undo deployment",
+    "pod crashloop memory limit",
+    "connection pool exhausted timeout",
+    "service error latency dns",
+    "oom killer heap",
+    "incident severity escalation",
+]
+
+
+def build_corpus(docs_dir: Path, num_docs: int, seed: int):
+    """Sample tokenized documents from the vocabulary of docs_dir (None if it has no terms)."""
+    counts = Counter()
+    for file_path in find_documents(docs_dir):
+        text = file_path.read_text(encoding='utf-8', errors='ignore').lower()
+        counts.update(re.findall(r'\b\w+\b', text))
+    vocab = [term for term, _ in counts.most_common()]
+    if not vocab:
+        return None
+    
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(vocab) + 1)
+    weights /= weights.sum()
+    
+    corpus = []
+    for _ in range(num_docs):
+        length = int(rng.integers(40, 200))
+        tokens = [vocab[i] for i in rng.choice(len(vocab), size=length, p=weights)]
+        tokens += [term for term in COMMON_TERMS if rng.random() < 0.7]
+        corpus.append(tokens)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 dynamic pruning")
+    parser.add_argument(
+        "--docs", type=Path, default=DEFAULT_DOCS_DIR,
+        help="Documents to take the vocabulary from (default: the repository's docs/)"
+    )
+    parser.add_argument("--num-docs", type=int, default=50_000, help="Synthetic corpus size")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--query", action="append", help="Query to run (repeatable)")
+    args = parser.parse_args()
+    
+    print(f"Building {args.num_docs} synthetic documents...")
+    corpus = build_corpus(args.docs, args.num_docs, args.seed)
+    if corpus is None:
+        print(f"❌ No documents with text found in {args.docs}; pass --docs <directory of .md/.txt files>")
+        sys.exit(1)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = SegmentedIndex(Path(tmp_dir))
+        start = time.perf_counter()
+        for i, tokens in enumerate(corpus):
+            index.add(tokens, {'chunk_id': f"doc_{i}"})
+        index.flush()
+        index.wait_for_merges()
+        print(f"Indexed in {time.perf_counter() - start:.1f}s, {len(index.segments)} segments\n")
+        
+        header = f"{'query':<36} {'postings':>9} {'read':>9} {'read %':>7} {'windows':>9} {'exh ms':>7} {'pruned ms':>9}"
+        print(header)
+        print("-" * len(header))
+        
+        total = PruningStats()
+        mismatches = 0
+        for query in args.query or DEFAULT_QUERIES:
+            tokens = re.findall(r'\b\w+\b', query.lower())
+            
+            start = time.perf_counter()
+            exhaustive = index.top_k(tokens, args.top_k, prune=False)
+            exhaustive_ms = (time.perf_counter() - start) * 1000
+            
+            stats = PruningStats()
+            start = time.perf_counter()
+            pruned = index.top_k(tokens, args.top_k, stats=stats)
+            pruned_ms = (time.perf_counter() - start) * 1000
+            
+            same = [(s.name, d, score) for s, d, score in exhaustive] == [
+                (s.name, d, score) for s, d, score in pruned
+            ]
+            mismatches += not same
+            read_pct = 100.0 * stats.scored / stats.postings if stats.postings else 0.0
+            windows = f"{stats.windows - stats.skipped_windows}/{stats.windows}"
+            print(
+                f"{query[:36]:<36} {stats.postings:>9} {stats.scored:>9} {read_pct:>6.1f}% "
+                f"{windows:>9} {exhaustive_ms:>7.1f} {pruned_ms:>9.1f}" + ("" if same else "  MISMATCH")
+            )
+            total.postings += stats.postings
+            total.scored += stats.scored
+        
+        if total.postings:
+            print(f"\nPostings read: {total.scored}/{total.postings} ({100.0 * total.scored / total.postings:.1f}%)")
+        if mismatches:
+            print(f"❌ {mismatches} queries returned a different top-{args.top_k} than exhaustive scoring")
+            sys.exit(1)
+        print(f"✅ Pruned top-{args.top_k} identical to exhaustive scoring for every query")
+
+
+if __name__ == "__main__":
+    main()
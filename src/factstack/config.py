@@ -13,6 +13,16 @@ class EmbeddingConfig:
     """Embedding configuration."""
     model: str = "text-embedding-3-small"
     dimension: int = 1536
+    # Processes used for hash embeddings on large batches
+    hash_workers: int = 1
+    # Embedding API request packing and concurrency
+    batch_max_tokens: int = 50_000
+    max_concurrency: int = 4
+    max_retries: int = 5
+    # Persistent embedding cache (defaults to a file in the database directory)
+    cache_enabled: bool = True
+    cache_path: Optional[str] = None
+    cache_max_entries: int = 200_000
 
 
 @dataclass
@@ -20,6 +30,25 @@ class ChunkingConfig:
     """Chunking configuration."""
     chunk_size: int = 500
     chunk_overlap: int = 50
+    engine: str = "text"  # "text", "spans" (contiguous source spans, kept for citations) or "tokens" (spans sized in tokens)
+    id_scheme: str = "position"  # "position" (path + index) or "content" (path + text, stable across edits)
+
+
+@dataclass
+class IngestConfig:
+    """Streaming ingest configuration."""
+    batch_size: int = 256  # Chunks per embedding batch
+    queue_depth: int = 4   # Batches buffered between pipeline stages
+    workers: int = 1       # Chunking processes
+    # Near-duplicate elimination: index one chunk per cluster of similar chunks
+    dedup: bool = False
+    dedup_threshold: float = 0.8  # Minimum estimated Jaccard similarity
+    # Watch mode polling
+    watch_interval: float = 1.0  # Seconds between polls of the docs directory
+    watch_debounce: float = 2.0  # Quiet seconds before a burst of changes is applied
+    # Vector backend of --watch unless one is chosen: every update stages a
+    # generation, which hard-links flat segments but copies Chroma's files
+    watch_vector_backend: str = "flat"
 
 
 @dataclass
@@ -29,9 +58,25 @@ class RetrievalConfig:
     vector_weight: float = 0.3  # Lower weight when using hash-based (dummy) embeddings
     bm25_weight: float = 0.7    # Higher weight for keyword matching (works better with dummy LLM)
     rerank_top_k: int = 5
+    bm25_backend: str = "native"  # "native" (inverted index) or "rank_bm25" (full scan)
+    vector_backend: str = "chroma"  # "chroma" or "flat" (exact search over a mmap'd matrix)
+    workers: int = 4  # Retrieval branches (channel x retriever) run concurrently
+    branch_timeout: float = 10.0  # Seconds before a retrieval branch is given up
+    speculative: bool = False  # Retrieve for the raw question while the rewrite is in flight
+    rewrite_timeout: float = 2.0  # Seconds speculative retrieval waits for the rewrite
     # Note: When using real embeddings (OpenAI), consider using vector_weight=0.7, bm25_weight=0.3
 
 
+@dataclass
+class TranslationConfig:
+    """Query translation configuration."""
+    # Translations are memoized in memory and, for LLM translations, on disk
+    # (defaults to a file in the database directory)
+    memo_size: int = 1024
+    memo_disk: bool = True
+    memo_path: Optional[str] = None
+
+
 @dataclass
 class RefusalConfig:
     """Refusal/uncertainty configuration."""
@@ -55,7 +100,9 @@ class Config:
     """Main configuration class."""
     embedding: EmbeddingConfig = field(default_factory=EmbeddingConfig)
     chunking: ChunkingConfig = field(default_factory=ChunkingConfig)
+    ingest: IngestConfig = field(default_factory=IngestConfig)
     retrieval: RetrievalConfig = field(default_factory=RetrievalConfig)
+    translation: TranslationConfig = field(default_factory=TranslationConfig)
     refusal: RefusalConfig = field(default_factory=RefusalConfig)
     llm: LLMConfig = field(default_factory=LLMConfig)
     
@@ -76,6 +123,18 @@ class Config:
         - LLM_PROVIDER: "openai" or "dummy" (default: "dummy")
         - LLM_MODEL: Model name for LLM (default: "gpt-4o-mini")
         - EMBEDDING_MODEL: Model name for embeddings (default: "text-embedding-3-small")
+        - EMBEDDING_WORKERS: Processes for hash embeddings (default: 1)
+        - EMBEDDING_CONCURRENCY: Embedding API requests in flight (default: 4)
+        - EMBEDDING_CACHE: Embedding cache file, or "off" to disable (default: in the database)
+        - EMBEDDING_CACHE_SIZE: Maximum number of cached embeddings (default: 200000)
+        - BM25_BACKEND: "native" or "rank_bm25" (default: "native")
+        - VECTOR_BACKEND: "chroma" or "flat" (default: "chroma")
+        - RETRIEVAL_WORKERS: Retrieval branches run concurrently (default: 4)
+        - RETRIEVAL_TIMEOUT: Per-branch retrieval timeout in seconds (default: 10)
+        - SPECULATIVE_RETRIEVAL: "on" to retrieve while the query is rewritten (default: "off")
+        - REWRITE_TIMEOUT: Seconds speculative retrieval waits for the rewrite (default: 2)
+        - TRANSLATION_MEMO: Translation memo file, or "off" to keep it in memory only (default: in the database)
+        - TRANSLATION_MEMO_SIZE: Translations memoized in memory (default: 1024)
         - OPENAI_API_KEY: Required when using OpenAI provider
         """
         config = cls()
@@ -94,6 +153,64 @@ class Config:
         if embedding_model:
             config.embedding.model = embedding_model
         
+        # Hash embedding fan-out from environment
+        embedding_workers = os.environ.get("EMBEDDING_WORKERS")
+        if embedding_workers:
+            config.embedding.hash_workers = max(1, int(embedding_workers))
+        
+        # Embedding API concurrency from environment
+        embedding_concurrency = os.environ.get("EMBEDDING_CONCURRENCY")
+        if embedding_concurrency:
+            config.embedding.max_concurrency = max(1, int(embedding_concurrency))
+        
+        # Embedding cache from environment
+        embedding_cache = os.environ.get("EMBEDDING_CACHE")
+        if embedding_cache:
+            if embedding_cache.lower() in ("off", "false", "0", "none"):
+                config.embedding.cache_enabled = False
+            else:
+                config.embedding.cache_path = embedding_cache
+        embedding_cache_size = os.environ.get("EMBEDDING_CACHE_SIZE")
+        if embedding_cache_size:
+            config.embedding.cache_max_entries = int(embedding_cache_size)
+        
+        # BM25 scoring backend from environment
+        bm25_backend = os.environ.get("BM25_BACKEND")
+        if bm25_backend:
+            config.retrieval.bm25_backend = bm25_backend.lower()
+        
+        # Vector backend from environment
+        vector_backend = os.environ.get("VECTOR_BACKEND")
+        if vector_backend:
+            config.retrieval.vector_backend = vector_backend.lower()
+        
+        # Retrieval fan-out from environment
+        retrieval_workers = os.environ.get("RETRIEVAL_WORKERS")
+        if retrieval_workers:
+            config.retrieval.workers = max(1, int(retrieval_workers))
+        retrieval_timeout = os.environ.get("RETRIEVAL_TIMEOUT")
+        if retrieval_timeout:
+            config.retrieval.branch_timeout = float(retrieval_timeout)
+        
+        # Speculative retrieval from environment
+        speculative = os.environ.get("SPECULATIVE_RETRIEVAL")
+        if speculative:
+            config.retrieval.speculative = speculative.lower() in ("on", "true", "1", "yes")
+        rewrite_timeout = os.environ.get("REWRITE_TIMEOUT")
+        if rewrite_timeout:
+            config.retrieval.rewrite_timeout = float(rewrite_timeout)
+        
+        # Translation memo from environment
+        translation_memo = os.environ.get("TRANSLATION_MEMO")
+        if translation_memo:
+            if translation_memo.lower() in ("off", "false", "0", "none"):
+                config.translation.memo_disk = False
+            else:
+                config.translation.memo_path = translation_memo
+        translation_memo_size = os.environ.get("TRANSLATION_MEMO_SIZE")
+        if translation_memo_size:
+            config.translation.memo_size = max(1, int(translation_memo_size))
+        
         # OpenAI API key check
         if provider == "openai" and not os.environ.get("OPENAI_API_KEY"):
             print("Warning: LLM_PROVIDER=openai but OPENAI_API_KEY not set. Falling back to dummy.")
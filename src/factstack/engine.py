@@ -0,0 +1,590 @@
+"""Long-lived query engine for FactStack."""
+
+import logging
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, Literal, Optional, Tuple
+
+from factstack.config import Config
+from factstack.pipeline.embeddings import EmbeddingGenerator
+from factstack.pipeline.embedding_cache import open_embedding_cache
+from factstack.pipeline.generations import (
+    current_generation, generation_dir, pin_generation, unpin_generation
+)
+from factstack.pipeline.vector_store import create_vector_store, detect_vector_backend
+from factstack.pipeline.bm25_store import BM25Store
+from factstack.pipeline.doc_store import DocStore
+from factstack.pipeline.rerank import Reranker, HybridMerger
+from factstack.pipeline.assemble import ContextAssembler
+from factstack.pipeline.refusal import RefusalChecker
+from factstack.pipeline.query_language import detect_language, needs_translation
+from factstack.pipeline.query_translate import QueryTranslator
+from factstack.pipeline.translation_memo import open_translation_memo, UNDERSTANDING_MODE
+from factstack.pipeline.cross_lingual import (
+    DualRetriever, build_retrieval_branches, collect_channel_results
+)
+from factstack.pipeline.retrieval_executor import RetrievalExecutor
+from factstack.pipeline.speculative import SpeculativeRetriever
+from factstack.llm.schemas import QueryResult, QueryUnderstanding
+from factstack.llm.base import BaseLLM
+from factstack.llm.dummy_llm import DummyLLM
+from factstack.observability.tracer import Tracer, TracedOperation
+from factstack.utils.time import get_timestamp_for_filename
+
+
+def get_llm(config: Config) -> BaseLLM:
+    """Get the appropriate LLM based on configuration.
+    
+    Args:
+        config: Configuration
+    
+    Returns:
+        LLM instance
+    """
+    if config.llm.provider == "openai":
+        try:
+            from factstack.llm.openai_llm import OpenAILLM
+            return OpenAILLM(
+                model=config.llm.model,
+                temperature=config.llm.temperature,
+                embedding_model=config.embedding.model,
+                embedding_batch_tokens=config.embedding.batch_max_tokens,
+                embedding_concurrency=config.embedding.max_concurrency,
+                embedding_max_retries=config.embedding.max_retries
+            )
+        except Exception as e:
+            print(f"Warning: Failed to initialize OpenAI LLM: {e}")
+            print("Falling back to DummyLLM")
+    return DummyLLM(
+        embedding_dimension=config.embedding.dimension,
+        hash_workers=config.embedding.hash_workers
+    )
+
+
+class QueryEngine:
+    """Answers questions against one database using long-lived components.
+    
+    The LLM client, embedding generator, vector store and BM25 index are
+    opened once when the engine is created. Answering a question only reads
+    this shared state, so a single engine can serve concurrent callers.
+    
+    The engine pins its index generation with a lease, so ingest does not
+    prune it while it is in use. The lease is released by ``close()`` or
+    when the engine is garbage-collected, after its last request finished.
+    """
+    
+    def __init__(self, db_dir: Path, config: Config = None, generation: Optional[str] = None):
+        """Initialize the engine and open all indexes.
+        
+        Args:
+            db_dir: Directory containing the database
+            config: Optional configuration
+            generation: Index generation to open (default: the current one)
+        """
+        self.db_dir = Path(db_dir)
+        self.config = config or Config.from_env()
+        self.generation = generation or current_generation(self.db_dir)
+        self._release_lease = weakref.finalize(
+            self, unpin_generation, pin_generation(self.db_dir, self.generation)
+        )
+        self.index_dir = generation_dir(self.db_dir, self.generation)
+        
+        self.llm = get_llm(self.config)
+        self.embedding_gen = EmbeddingGenerator(
+            self.config.embedding,
+            self.llm,
+            cache=open_embedding_cache(self.config.embedding, self.db_dir)
+        )
+        vector_backend = detect_vector_backend(self.index_dir, self.config.retrieval.vector_backend)
+        if vector_backend != self.config.retrieval.vector_backend:
+            logging.info(f"Using the {vector_backend} vector index of {self.index_dir}")
+        self.vector_store = create_vector_store(self.index_dir, backend=vector_backend)
+        self.bm25_store = BM25Store(self.index_dir / "bm25", backend=self.config.retrieval.bm25_backend)
+        self.doc_store = DocStore(self.index_dir / "docs")
+        self.retrieval_executor = RetrievalExecutor(
+            max_workers=self.config.retrieval.workers,
+            timeout=self.config.retrieval.branch_timeout
+        )
+        self.reranker = Reranker(self.llm, top_k=self.config.retrieval.rerank_top_k)
+        self.assembler = ContextAssembler(model=self.config.llm.model)
+        self.refusal_checker = RefusalChecker(self.config.refusal)
+        self.prompt_config = self.config.get_prompt_config()
+        
+        self._translators: Dict[str, QueryTranslator] = {}
+        self.translation_memo = open_translation_memo(self.config.translation, self.db_dir)
+        self._lock = threading.Lock()
+        
+        # Load indexes up front so questions only pay for retrieval
+        self.bm25_store.load()
+        self.vector_store.open()
+        if not self.doc_store.load():
+            # Indexes written before the document store keep the text themselves
+            if not self.vector_store.use_stored_text():
+                raise RuntimeError(
+                    f"No document store in {self.index_dir} and the vector index holds no "
+                    "chunk text; re-ingest required (re-run factstack.ingest)"
+                )
+            logging.warning(
+                f"No document store in {self.index_dir}; serving chunk text stored in the "
+                "indexes. Re-run ingest to build the document store."
+            )
+    
+    def close(self) -> None:
+        """Release the engine's lease on its index generation."""
+        self._release_lease()
+    
+    def get_translator(self, mode: str) -> QueryTranslator:
+        """Get the shared translator for a translation mode."""
+        with self._lock:
+            translator = self._translators.get(mode)
+            if translator is None:
+                translator = QueryTranslator(llm=self.llm, mode=mode, memo=self.translation_memo)
+                self._translators[mode] = translator
+            return translator
+    
+    def understand_query(self, question: str) -> Tuple[QueryUnderstanding, bool]:
+        """Get the language, rewrite, translation and keywords of a question.
+        
+        LLM results are memoized, so a repeated question makes no call;
+        DummyLLM results are rule-based and recomputed.
+        
+        Args:
+            question: User's question
+        
+        Returns:
+            Tuple of (QueryUnderstanding, whether it came from the memo)
+        """
+        if isinstance(self.llm, DummyLLM):
+            return self.llm.understand_query(question), False
+        
+        memoized = self.translation_memo.get(UNDERSTANDING_MODE, question)
+        if memoized is not None:
+            return QueryUnderstanding.model_validate_json(memoized), True
+        
+        understanding = self.llm.understand_query(question)
+        if not understanding.fallback:
+            self.translation_memo.put(UNDERSTANDING_MODE, question, understanding.model_dump_json())
+        return understanding, False
+    
+    def ask(
+        self,
+        question: str,
+        top_k: int = 8,
+        rerank_top_k: int = None,
+        save_artifacts: bool = True,
+        cross_lingual: bool = True,
+        translate: bool = True,
+        translation_mode: Literal["llm", "rule", "off"] = "llm"
+    ) -> QueryResult:
+        """Answer a question using the RAG pipeline.
+        
+        Args:
+            question: User's question
+            top_k: Number of chunks to retrieve per channel
+            rerank_top_k: Number of chunks after reranking (defaults to config value)
+            save_artifacts: Whether to save artifacts
+            cross_lingual: Enable cross-lingual dual retrieval
+            translate: Enable query translation
+            translation_mode: Translation mode ("llm", "rule", or "off")
+        
+        Returns:
+            QueryResult with answer and metadata
+        """
+        config = self.config
+        llm = self.llm
+        tracer = Tracer()
+        
+        # Use config value if not specified
+        if rerank_top_k is None:
+            rerank_top_k = config.retrieval.rerank_top_k
+        
+        # Initialize translator if needed
+        translator = None
+        effective_translation_mode = translation_mode
+        if translate and translation_mode != "off":
+            # Determine effective mode based on LLM availability
+            if translation_mode == "llm" and isinstance(llm, DummyLLM):
+                effective_translation_mode = "rule"
+            translator = self.get_translator(effective_translation_mode)
+        
+        # Step 1: Detect query language
+        with TracedOperation(tracer, "language_detect", f"query={question[:30]}...") as op:
+            query_lang = detect_language(question)
+            needs_trans = needs_translation(question)
+            op.set_output(f"lang={query_lang}, needs_translation={needs_trans}")
+            op.set_metadata(
+                query_language=query_lang,
+                needs_translation=needs_trans
+            )
+        
+        # Single-channel questions can be retrieved for while they are rewritten;
+        # cross-lingual ones need the translation first
+        speculative = config.retrieval.speculative and not (
+            cross_lingual and needs_trans and translator
+        )
+        
+        # Step 2: Query understanding: rewrite, translation and keywords in one LLM call
+        # (in speculative mode it runs concurrently with retrieval, in step 4)
+        if not speculative:
+            with TracedOperation(tracer, "query_understanding", f"question={question[:50]}...") as op:
+                understanding, memoized = self.understand_query(question)
+                search_query = understanding.rewrite
+                op.set_output(f"rewritten={search_query[:50]}...")
+                op.set_metadata(
+                    original=question,
+                    rewritten=search_query,
+                    language=understanding.language,
+                    translation=understanding.translation,
+                    keywords=understanding.keywords,
+                    memoized=memoized,
+                    fallback=understanding.fallback
+                )
+        
+        # Step 3: Translate query if needed (routing uses the local language detection)
+        translated_query = None
+        if cross_lingual and needs_trans and translator:
+            with TracedOperation(tracer, "query_translate", f"query={question[:30]}...") as op:
+                # The translated channel searches with the rewrite, so that is what is translated
+                if effective_translation_mode == "llm" and understanding.translation:
+                    # Already produced by the query understanding call
+                    translated_query = understanding.translation
+                else:
+                    translated_query = translator.translate_for_retrieval(search_query, query_lang)
+                op.set_output(f"translated={translated_query[:50] if translated_query else 'None'}...")
+                op.set_metadata(
+                    original_query=search_query,
+                    translated_query=translated_query,
+                    translation_mode=effective_translation_mode
+                )
+        
+        # Step 4: Dual retrieval (if cross-lingual enabled)
+        cross_lingual_stats = None
+        if cross_lingual and translated_query:
+            dual_retriever = DualRetriever(
+                vector_store=self.vector_store,
+                bm25_store=self.bm25_store,
+                embedding_gen=self.embedding_gen,
+                translator=translator,
+                vector_weight=config.retrieval.vector_weight,
+                bm25_weight=config.retrieval.bm25_weight,
+                executor=self.retrieval_executor
+            )
+            
+            with TracedOperation(tracer, "dual_retrieval", f"query={question[:30]}...") as op:
+                dual_result = dual_retriever.retrieve(
+                    query=search_query,
+                    top_k=top_k,
+                    enable_translation=True,
+                    tracer=tracer,
+                    # Reuse the query_translate result instead of translating again
+                    translated_query=translated_query
+                )
+                merged_chunks = dual_result.merged_chunks
+                cross_lingual_stats = dual_result.stats
+                
+                # Log channel stats
+                for channel in dual_result.channels:
+                    op.set_metadata(**{
+                        f"{channel.channel_name}_vector_max": channel.stats.get("vector_max", 0),
+                        f"{channel.channel_name}_bm25_max": channel.stats.get("bm25_max", 0),
+                    })
+                
+                op.set_output(f"{len(merged_chunks)} merged chunks from {len(dual_result.channels)} channels")
+                op.set_metadata(
+                    original_query=dual_result.original_query,
+                    translated_query=dual_result.translated_query,
+                    query_language=dual_result.query_language,
+                    total_candidates=cross_lingual_stats.get("total_candidates", 0),
+                    multi_channel_hits=cross_lingual_stats.get("multi_channel_hits", 0)
+                )
+        elif speculative:
+            speculative_retriever = SpeculativeRetriever(
+                vector_store=self.vector_store,
+                bm25_store=self.bm25_store,
+                embedding_gen=self.embedding_gen,
+                executor=self.retrieval_executor,
+                vector_weight=config.retrieval.vector_weight,
+                bm25_weight=config.retrieval.bm25_weight,
+                rewrite_timeout=config.retrieval.rewrite_timeout
+            )
+            
+            with TracedOperation(tracer, "speculative_retrieval", f"query={question[:30]}...") as op:
+                spec = speculative_retriever.retrieve(
+                    question, self.understand_query, top_k=top_k, tracer=tracer
+                )
+                merged_chunks = spec.merged_chunks
+                op.set_output(
+                    f"{len(merged_chunks)} merged chunks from {len(spec.channels)} queries"
+                )
+                op.set_metadata(
+                    evidence_ms=spec.evidence_ms,
+                    rewrite_ms=spec.rewrite_ms,
+                    rewrite_used=spec.rewrite_used,
+                    rewrite_timed_out=spec.rewrite_timed_out
+                )
+            
+            understanding = spec.understanding
+            tracer.trace(
+                stage="query_understanding",
+                input_summary=f"question={question[:50]}...",
+                output_summary=(
+                    f"rewritten={understanding.rewrite[:50]}..." if understanding
+                    else f"failed: {spec.rewrite_error}"
+                ),
+                latency_ms=spec.rewrite_ms,
+                ok=understanding is not None,
+                error=spec.rewrite_error,
+                original=question,
+                rewritten=understanding.rewrite if understanding else None,
+                language=understanding.language if understanding else None,
+                translation=understanding.translation if understanding else None,
+                keywords=understanding.keywords if understanding else [],
+                memoized=spec.memoized,
+                fallback=understanding.fallback if understanding else True,
+                speculative=True,
+                timed_out=spec.rewrite_timed_out
+            )
+        else:
+            # Single channel retrieval (original behavior)
+            merger = HybridMerger(
+                vector_weight=config.retrieval.vector_weight,
+                bm25_weight=config.retrieval.bm25_weight
+            )
+            
+            # Vector and BM25 search run concurrently, each traced as its own stage
+            channel_queries = [("original", search_query)]
+            branches = build_retrieval_branches(
+                self.vector_store, self.bm25_store, self.embedding_gen, channel_queries, top_k
+            )
+            outcomes = self.retrieval_executor.run(branches, tracer)
+            channel = collect_channel_results(channel_queries, branches, outcomes)[0]
+            vector_results = channel.vector_results
+            bm25_results = channel.bm25_results
+            
+            # Merge results
+            with TracedOperation(tracer, "merge", f"v={len(vector_results)}, b={len(bm25_results)}") as op:
+                merged_chunks = merger.merge(vector_results, bm25_results)
+                op.set_output(f"{len(merged_chunks)} merged chunks")
+        
+        # Step 5: Pre-answer refusal check (with cross-lingual stats)
+        with TracedOperation(tracer, "refusal_check_pre", f"{len(merged_chunks)} chunks") as op:
+            pre_refusal = self.refusal_checker.check_pre_answer(merged_chunks, cross_lingual_stats)
+            op.set_output(f"refuse={pre_refusal.should_refuse}, reason={pre_refusal.reason[:50]}")
+            op.set_metadata(
+                should_refuse=pre_refusal.should_refuse,
+                indicators=pre_refusal.indicators
+            )
+        
+        if pre_refusal.should_refuse:
+            # Create refusal response (cites the top chunks, so they need text)
+            self.doc_store.hydrate(merged_chunks[:3])
+            answer = self.refusal_checker.create_refusal_response(
+                question, pre_refusal, merged_chunks
+            )
+            result = QueryResult(
+                question=question,
+                answer=answer,
+                chunks=[],
+                run_id=tracer.run_id
+            )
+        else:
+            # Retrieval returns IDs and scores; load text for the rerank candidates only
+            with TracedOperation(tracer, "hydrate", f"{len(merged_chunks)} chunks") as op:
+                self.doc_store.hydrate(merged_chunks)
+                op.set_output(f"{sum(len(chunk.text) for chunk in merged_chunks)} chars")
+            
+            # Step 6: Rerank
+            with TracedOperation(tracer, "rerank", f"{len(merged_chunks)} candidates") as op:
+                reranked_chunks = self.reranker.rerank(
+                    question, merged_chunks, top_k=rerank_top_k
+                )
+                op.set_output(f"{len(reranked_chunks)} reranked chunks")
+                if reranked_chunks:
+                    op.set_metadata(top_score=reranked_chunks[0].final_score)
+            
+            # Step 7: Assemble context
+            with TracedOperation(tracer, "assemble", f"{len(reranked_chunks)} chunks") as op:
+                context, used_chunks = self.assembler.assemble(reranked_chunks)
+                op.set_output(f"{len(context)} chars, {len(used_chunks)} chunks used")
+            
+            # Step 8: Generate answer
+            with TracedOperation(tracer, "llm_answer", f"question={question[:30]}...") as op:
+                answer = llm.generate_answer(
+                    question=question,
+                    chunks=used_chunks,
+                    system_prompt=self.prompt_config.get("system", ""),
+                    answer_template=self.prompt_config.get("answer_template", "")
+                )
+                op.set_output(f"confidence={answer.confidence:.2f}, refusal={answer.is_refusal}")
+                op.set_metadata(confidence=answer.confidence)
+            
+            # Step 9: Post-answer refusal check
+            with TracedOperation(tracer, "refusal_check_post", f"confidence={answer.confidence}") as op:
+                post_refusal = self.refusal_checker.check_post_answer(answer, used_chunks)
+                if post_refusal.confidence_adjustment != 0:
+                    adjusted = max(0.0, min(1.0,
+                        answer.confidence + post_refusal.confidence_adjustment))
+                    answer.confidence = adjusted
+                op.set_output(f"adjustment={post_refusal.confidence_adjustment}")
+            
+            result = QueryResult(
+                question=question,
+                answer=answer,
+                chunks=used_chunks,
+                run_id=tracer.run_id
+            )
+        
+        # Save artifacts
+        if save_artifacts:
+            artifacts_dir = Path(config.artifacts_dir)
+            artifacts_dir.mkdir(parents=True, exist_ok=True)
+            
+            timestamp = get_timestamp_for_filename()
+            
+            # Save trace
+            trace_path = artifacts_dir / f"trace_{timestamp}.jsonl"
+            tracer.save(trace_path)
+            result.trace_path = str(trace_path)
+            
+            # Save human-readable answer
+            answer_path = artifacts_dir / f"answer_{timestamp}.md"
+            with open(answer_path, "w", encoding="utf-8") as f:
+                f.write(format_answer_markdown(result, translated_query))
+        
+        return result
+
+
+def format_answer_markdown(result: QueryResult, translated_query: str = None) -> str:
+    """Format the query result as markdown."""
+    md = f"""# Question
+{result.question}
+"""
+
+    if translated_query:
+        md += f"\n## Translated Query\n{translated_query}\n"
+    
+    md += f"""
+# Answer
+{result.answer.answer}
+
+## Confidence
+{result.answer.confidence:.2%}
+
+## Citations
+"""
+    for i, cit in enumerate(result.answer.citations):
+        md += f"\n### [C{i+1}] {cit.source}\n"
+        md += f"- Chunk ID: {cit.chunk_id}\n"
+        md += f"- Score: {cit.score:.3f}\n"
+        md += f"- Text: {cit.text[:200]}...\n"
+    
+    if result.answer.missing_info:
+        md += "\n## Missing Information\n"
+        for info in result.answer.missing_info:
+            md += f"- {info}\n"
+    
+    if result.answer.is_refusal:
+        md += f"\n## Refusal Reason\n{result.answer.refusal_reason}\n"
+    
+    md += f"\n## Metadata\n"
+    md += f"- Run ID: {result.run_id}\n"
+    if result.trace_path:
+        md += f"- Trace: {result.trace_path}\n"
+    
+    return md
+
+
+_engines: Dict[Tuple[str, str], QueryEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(db_dir: Path, config: Config = None) -> QueryEngine:
+    """Get the shared QueryEngine for a database and configuration.
+    
+    Engines are cached per (database directory, configuration), so every
+    caller asking against the same database reuses one set of open indexes.
+    A cached engine is replaced once a newer index generation is published.
+    
+    Args:
+        db_dir: Directory containing the database
+        config: Optional configuration
+    
+    Returns:
+        Shared QueryEngine instance
+    """
+    config = config or Config.from_env()
+    key = (str(Path(db_dir).resolve()), repr(config))
+    generation = current_generation(db_dir)
+    
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None or engine.generation != generation:
+            engine = QueryEngine(db_dir, config, generation=generation)
+            _engines[key] = engine
+        return engine
+
+
+class EngineReloader:
+    """Serves a database's current generation and hot-swaps newer ones.
+    
+    ``get()`` returns the engine of the newest generation loaded so far.
+    The CURRENT pointer is checked at most every ``check_interval``
+    seconds; when it moves, the new generation is opened and its indexes
+    loaded on a background thread while requests keep using the old
+    engine, and the new engine is swapped in once it is ready. Requests
+    already running finish on the engine they started with.
+    """
+    
+    def __init__(self, db_dir: Path, config: Config = None, check_interval: float = 1.0):
+        """Initialize reloader; the first engine is opened on first use.
+        
+        Args:
+            db_dir: Directory containing the database
+            config: Optional configuration
+            check_interval: Minimum seconds between checks of the CURRENT pointer
+        """
+        self.db_dir = Path(db_dir)
+        self.config = config or Config.from_env()
+        self.check_interval = check_interval
+        self._engine: Optional[QueryEngine] = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self._failed: Optional[str] = None
+        self._checked_at = 0.0
+    
+    def get(self) -> QueryEngine:
+        """Get the engine to answer the next request with."""
+        with self._lock:
+            if self._engine is None:
+                self._engine = QueryEngine(self.db_dir, self.config)
+                self._checked_at = time.monotonic()
+                return self._engine
+            
+            now = time.monotonic()
+            if not self._loading and now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                generation = current_generation(self.db_dir)
+                if generation not in (self._engine.generation, self._failed):
+                    self._loading = True
+                    threading.Thread(
+                        target=self._load, args=(generation,),
+                        name="factstack-engine-reload", daemon=True
+                    ).start()
+            return self._engine
+    
+    def _load(self, generation: Optional[str]) -> None:
+        """Open a generation in the background and swap it in."""
+        try:
+            engine = QueryEngine(self.db_dir, self.config, generation=generation)
+        except Exception as e:
+            logging.warning(f"Failed to load index generation {generation}: {e}")
+            engine = None
+        
+        with self._lock:
+            if engine is not None:
+                self._engine = engine
+            else:
+                self._failed = generation
+            self._loading = False
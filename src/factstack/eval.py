@@ -10,7 +10,7 @@ from dataclasses import dataclass, field, asdict
 import yaml
 
 from factstack.config import Config
-from factstack.ask import ask, get_llm
+from factstack.engine import get_engine
 from factstack.llm.schemas import QueryResult
 from factstack.observability.tracer import Tracer, TracedOperation
 from factstack.utils.time import get_timestamp_for_filename
@@ -220,6 +220,9 @@ def run_evaluation(
     print(f"📋 Running {len(cases)} evaluation cases...")
     print()
     
+    # Open indexes once and reuse them for every case
+    engine = get_engine(db_dir, config)
+    
     results = []
     difficulty_counts = {"easy": [0, 0], "medium": [0, 0], "hard": [0, 0]}
     
@@ -227,10 +230,8 @@ def run_evaluation(
         print(f"[{i+1}/{len(cases)}] {case.question[:50]}...")
         
         try:
-            query_result = ask(
+            query_result = engine.ask(
                 question=case.question,
-                db_dir=db_dir,
-                config=config,
                 save_artifacts=False
             )
             
@@ -1,95 +1,456 @@
 """Document ingestion CLI for FactStack."""
 
 import argparse
+import logging
+import os
 import sys
+import threading
 from pathlib import Path
+from typing import Optional
 
 from factstack.config import Config
-from factstack.pipeline.chunking import DocumentChunker
+from factstack.engine import get_llm
+from factstack.pipeline.chunking import (
+    Chunk, create_chunker, find_documents, CHUNKERS, CHUNK_ID_SCHEMES
+)
+from factstack.pipeline.dedup import SpilledDeduplicator, load_signatures
 from factstack.pipeline.embeddings import EmbeddingGenerator
-from factstack.pipeline.vector_store import VectorStore
+from factstack.pipeline.embedding_cache import open_embedding_cache
+from factstack.pipeline.generations import (
+    generation_dir, stage_generation, publish_generation, discard_generation
+)
+from factstack.pipeline.vector_store import create_vector_store, VECTOR_BACKENDS
 from factstack.pipeline.bm25_store import BM25Store
+from factstack.pipeline.doc_store import DocStore
+from factstack.pipeline.manifest import IngestManifest, ManifestDiff
+from factstack.pipeline.streaming import prefetch, batched
+from factstack.pipeline.watcher import DocsWatcher
 from factstack.observability.tracer import Tracer, TracedOperation
-from factstack.utils.time import get_timestamp_for_filename
+from factstack.utils.time import get_timestamp_for_filename, timer
+
+
+# Chunks spilled by the deduplicate stage, inside the generation directory
+DEDUP_SPILL_FILENAME = "dedup-spill.jsonl"
+
+# Signatures of the canonical chunks, seeding the next incremental dedup
+DEDUP_DIRNAME = "dedup"
+
+
+def _ingest_settings(config: Config) -> dict:
+    """Settings that must match for an incremental ingest to be valid."""
+    return {
+        "chunk_size": config.chunking.chunk_size,
+        "chunk_overlap": config.chunking.chunk_overlap,
+        "chunker": config.chunking.engine,
+        "chunk_ids": config.chunking.id_scheme,
+        "token_model": config.llm.model,
+        "embedding_model": config.embedding.model,
+        "embedding_dimension": config.embedding.dimension,
+        "vector_backend": config.retrieval.vector_backend,
+        "dedup_threshold": config.ingest.dedup_threshold if config.ingest.dedup else None,
+        # Incremental dedup is seeded with signatures written by earlier runs
+        "dedup_signatures": config.ingest.dedup,
+    }
+
+
+def _is_unchanged(stored: dict, chunk: Chunk) -> bool:
+    """Check whether a stored chunk payload matches a freshly produced chunk.
+    
+    The stored payload is the BM25 record with its text from the document
+    store. The chunk index is ignored: it only records the position in the
+    file and is not used for retrieval. So is the token count, which follows
+    from the text and is only stored when a tokenizer was at hand.
+    """
+    def content_metadata(metadata):
+        return {key: value for key, value in (metadata or {}).items() if key != "token_count"}
+    
+    return (
+        stored.get('text') == chunk.text
+        and stored.get('source_path') == chunk.source_path
+        and stored.get('title') == chunk.title
+        and content_metadata(stored.get('metadata')) == content_metadata(chunk.metadata)
+    )
 
 
 def ingest(
     docs_dir: Path,
     persist_dir: Path,
-    config: Config = None
+    config: Config = None,
+    incremental: bool = False
 ) -> dict:
     """Ingest documents from a directory.
     
+    In incremental mode the per-file manifest stored next to the database
+    is diffed against the docs directory and only added, changed or removed
+    files are re-chunked, re-embedded and re-indexed. Falls back to a full
+    rebuild when no compatible manifest exists.
+    
+    The indexes are built into a new generation directory inside
+    ``persist_dir`` (a copy of the current one for incremental ingest),
+    which is made current atomically once complete. Readers of the
+    database keep seeing the previous generation until then.
+    
     Args:
         docs_dir: Directory containing documents
         persist_dir: Directory to persist the database
         config: Optional configuration
+        incremental: Only process files that changed since the last ingest
     
     Returns:
         Summary of ingestion results
     """
     config = config or Config.from_env()
+    persist_dir = Path(persist_dir)
+    
+    index_dir = stage_generation(
+        persist_dir, copy_from=generation_dir(persist_dir) if incremental else None
+    )
+    try:
+        summary = _ingest_generation(docs_dir, persist_dir, index_dir, config, incremental)
+    except BaseException:
+        discard_generation(index_dir)
+        raise
+    
+    if "error" in summary or (summary["mode"] == "incremental" and not summary["has_changes"]):
+        # Nothing to publish; the current generation stays in place
+        discard_generation(index_dir)
+        return summary
+    
+    publish_generation(persist_dir, index_dir)
+    print(f"🔁 Published generation {index_dir.name}")
+    summary["generation"] = index_dir.name
+    return summary
+
+
+def _ingest_generation(
+    docs_dir: Path,
+    persist_dir: Path,
+    index_dir: Path,
+    config: Config,
+    incremental: bool
+) -> dict:
+    """Ingest documents into one generation directory.
+    
+    Args:
+        docs_dir: Directory containing documents
+        persist_dir: Database directory, holds the embedding cache
+        index_dir: Generation directory the indexes are written to
+        config: Configuration
+        incremental: Only process files that changed since the last ingest
+    
+    Returns:
+        Summary of ingestion results
+    """
     tracer = Tracer()
     
     # Initialize components
-    chunker = DocumentChunker(
+    chunker = create_chunker(
         chunk_size=config.chunking.chunk_size,
-        chunk_overlap=config.chunking.chunk_overlap
+        chunk_overlap=config.chunking.chunk_overlap,
+        engine=config.chunking.engine,
+        token_model=config.llm.model,
+        id_scheme=config.chunking.id_scheme
     )
     
-    embedding_gen = EmbeddingGenerator(config.embedding)
-    vector_store = VectorStore(persist_dir / "vector")
-    bm25_store = BM25Store(persist_dir / "bm25")
+    embedding_gen = EmbeddingGenerator(
+        config.embedding,
+        get_llm(config),
+        cache=open_embedding_cache(config.embedding, persist_dir)
+    )
+    vector_store = create_vector_store(index_dir, backend=config.retrieval.vector_backend)
+    bm25_store = BM25Store(index_dir / "bm25", backend=config.retrieval.bm25_backend)
+    doc_store = DocStore(index_dir / "docs")
+    manifest = IngestManifest(index_dir, docs_dir)
+    settings = _ingest_settings(config)
     
-    # Step 1: Read and chunk documents
-    with TracedOperation(tracer, "chunk_documents", f"docs_dir={docs_dir}") as op:
-        chunks = chunker.chunk_directory(docs_dir)
-        op.set_output(f"{len(chunks)} chunks created")
-        op.set_metadata(chunk_count=len(chunks))
+    files = find_documents(docs_dir)
     
-    if not chunks:
-        print(f"No documents found in {docs_dir}")
-        return {"chunks": 0, "error": "No documents found"}
+    if incremental:
+        if (not manifest.load() or manifest.settings != settings
+                or not bm25_store.load() or not doc_store.load()):
+            print("⚠️  No compatible manifest found, running a full ingest")
+            incremental = False
     
-    print(f"📄 Chunked {len(chunks)} chunks from documents in {docs_dir}")
+    # Step 0: Work out which files need (re-)processing
+    with TracedOperation(tracer, "manifest_diff", f"{len(files)} files") as op:
+        if incremental:
+            diff = manifest.diff(files)
+            # Files sharing deduplicated chunks with a changed file are re-ingested too
+            shared = set(manifest.sharing_chunks([manifest.key(p) for p in diff.changed] + diff.removed))
+            if shared:
+                diff.changed = [p for p in files if p in diff.changed or manifest.key(p) in shared]
+                diff.unchanged = [key for key in diff.unchanged if key not in shared]
+        else:
+            manifest.clear()
+            diff = ManifestDiff(added=list(files))
+        # Chunks of re-ingested and removed files; the ones produced again
+        # unchanged keep their rows, the rest are replaced or deleted
+        previous_ids = set(manifest.chunk_ids_for(
+            [manifest.key(p) for p in diff.changed] + diff.removed
+        ))
+        op.set_output(
+            f"added={len(diff.added)}, changed={len(diff.changed)}, "
+            f"removed={len(diff.removed)}, unchanged={len(diff.unchanged)}"
+        )
+        op.set_metadata(
+            incremental=incremental,
+            files_added=len(diff.added),
+            files_changed=len(diff.changed),
+            files_removed=len(diff.removed),
+            files_unchanged=len(diff.unchanged),
+            previous_chunks=len(previous_ids)
+        )
     
-    # Step 2: Generate embeddings
-    with TracedOperation(tracer, "generate_embeddings", f"{len(chunks)} chunks") as op:
-        texts = [chunk.text for chunk in chunks]
-        embeddings = embedding_gen.generate(texts)
-        op.set_output(f"{len(embeddings)} embeddings generated")
-        op.set_metadata(embedding_dim=len(embeddings[0]) if embeddings else 0)
+    if incremental:
+        print(f"🧾 Manifest diff: {len(diff.added)} added, {len(diff.changed)} changed, "
+              f"{len(diff.removed)} removed, {len(diff.unchanged)} unchanged")
     
-    print(f"🔢 Generated {len(embeddings)} embeddings")
+    if not incremental and not files:
+        print(f"No documents found in {docs_dir}")
+        return {"chunks": 0, "error": "No documents found"}
     
-    # Step 3: Store in vector database
-    with TracedOperation(tracer, "vector_store", f"{len(chunks)} chunks") as op:
-        try:
+    # Step 1: Look up the stored chunks of re-ingested files (clear everything for a full ingest)
+    stored_chunks = {}
+    with TracedOperation(tracer, "prepare_stores", f"{len(previous_ids)} previous chunks") as op:
+        if incremental:
+            stored_chunks = bm25_store.get_chunks(list(previous_ids))
+            stored_texts = doc_store.get_texts(list(stored_chunks))
+            for chunk_id, stored in stored_chunks.items():
+                stored['text'] = stored_texts.get(chunk_id)
+            op.set_metadata(stored=len(stored_chunks))
+        else:
             # Clear existing data
             try:
                 vector_store.clear()
             except Exception:
                 pass
+            bm25_store.clear()
+            doc_store.clear()
+        op.set_output("stores ready")
+    
+    # Step 2: Stream chunks → embedding batches → store writes. Each stage
+    # runs on its own thread behind a bounded queue, so embedding requests
+    # overlap with chunking and with writes, and at most a few batches of
+    # chunks and embeddings are held in memory at any time.
+    stage_ms = {
+        "chunk_documents": 0.0, "deduplicate": 0.0, "generate_embeddings": 0.0,
+        "vector_store": 0.0, "bm25_index": 0.0, "doc_store": 0.0
+    }
+    file_chunk_ids = {}
+    file_sources = {}
+    realiased_ids = set()
+    duplicate_count = 0
+    reused_count = 0
+    
+    def chunk_stream():
+        # Keep the docs directory order, so canonical duplicates among the
+        # re-ingested files are the ones a full ingest would pick
+        pending = set(diff.added) | set(diff.changed)
+        results = chunker.iter_chunk_files(
+            [p for p in files if p in pending], workers=config.ingest.workers
+        )
+        while True:
+            with timer() as t:
+                file_path, file_chunks, source = next(results, (None, None, None))
+            stage_ms["chunk_documents"] += t.elapsed_ms
+            if file_path is None:
+                return
+            file_chunk_ids[file_path] = [chunk.chunk_id for chunk in file_chunks]
+            file_sources[file_path] = source
+            yield from file_chunks
+    
+    def dedup_stream(chunks):
+        # Aliases must be known before a canonical chunk is written, so the
+        # chunks of one run are spilled to disk while their signatures are
+        # computed and read back once all duplicates are known
+        nonlocal duplicate_count
+        deduplicator = SpilledDeduplicator(index_dir / DEDUP_SPILL_FILENAME, config.ingest.dedup_threshold)
+        try:
+            if incremental:
+                # Chunks of untouched files stay canonical, so re-ingested
+                # chunks are matched against them as well
+                with timer() as t:
+                    for chunk_id, source_path, signature in load_signatures(index_dir / DEDUP_DIRNAME):
+                        if chunk_id not in previous_ids:
+                            deduplicator.seed(chunk_id, source_path, signature)
+                stage_ms["deduplicate"] += t.elapsed_ms
+            for chunk in chunks:
+                with timer() as t:
+                    deduplicator.add(chunk)
+                stage_ms["deduplicate"] += t.elapsed_ms
+            duplicates = deduplicator.duplicates
+            with timer() as t:
+                for file_path, chunk_ids in file_chunk_ids.items():
+                    file_chunk_ids[file_path] = list(dict.fromkeys(
+                        duplicates.get(chunk_id, chunk_id) for chunk_id in chunk_ids
+                    ))
+            stage_ms["deduplicate"] += t.elapsed_ms
+            duplicate_count = len(duplicates)
+            yield from deduplicator.canonical_chunks()
             
-            # Recreate collection and add chunks
-            vector_store._collection = None  # Force recreation
-            added = vector_store.add_chunks(chunks, embeddings)
-            op.set_output(f"{added} chunks added to vector store")
-        except Exception as e:
-            op.set_error(str(e))
-            raise
+            # Stored canonical chunks that gained aliases are written again
+            seeded_aliases = deduplicator.seeded_aliases()
+            stored = bm25_store.get_chunks(list(seeded_aliases))
+            texts = doc_store.get_texts(list(stored))
+            for chunk_id, data in stored.items():
+                metadata = dict(data.get('metadata') or {})
+                aliases = list(metadata.get("aliases") or [])
+                aliases.extend(path for path in seeded_aliases[chunk_id] if path not in aliases)
+                metadata["aliases"] = aliases
+                realiased_ids.add(chunk_id)
+                yield Chunk(
+                    chunk_id=chunk_id,
+                    text=texts.get(chunk_id) or data.get('text', ""),
+                    source_path=data.get('source_path', ""),
+                    title=data.get('title'),
+                    chunk_index=data.get('chunk_index', 0),
+                    metadata=metadata
+                )
+            
+            with timer() as t:
+                deduplicator.save_signatures(index_dir / DEDUP_DIRNAME)
+            stage_ms["deduplicate"] += t.elapsed_ms
+        finally:
+            deduplicator.abort()
     
-    print(f"📊 Added {added} chunks to vector store")
+    def reuse_stream(chunks):
+        # Chunks whose ID and stored payload are unchanged keep their
+        # embedding and index rows
+        nonlocal reused_count
+        for chunk in chunks:
+            stored = stored_chunks.get(chunk.chunk_id)
+            if stored is not None and _is_unchanged(stored, chunk):
+                reused_count += 1
+                continue
+            yield chunk
     
-    # Step 4: Build BM25 index
-    with TracedOperation(tracer, "bm25_index", f"{len(chunks)} chunks") as op:
-        bm25_store.clear()
-        bm25_store.add_chunks(chunks)
-        bm25_store.save()
-        op.set_output(f"BM25 index built with {bm25_store.get_count()} chunks")
+    def embed_stream(batches):
+        for batch in batches:
+            with timer() as t:
+                embeddings = embedding_gen.generate([chunk.text for chunk in batch])
+            stage_ms["generate_embeddings"] += t.elapsed_ms
+            yield batch, embeddings
     
+    chunk_count = 0
+    embedding_count = 0
+    embedding_dim = 0
+    added = 0
+    with TracedOperation(tracer, "ingest_pipeline", f"{len(diff.added) + len(diff.changed)} files") as op:
+        chunks = dedup_stream(chunk_stream()) if config.ingest.dedup else chunk_stream()
+        if stored_chunks:
+            chunks = reuse_stream(chunks)
+        batches = prefetch(
+            batched(chunks, config.ingest.batch_size),
+            config.ingest.queue_depth, name="chunk"
+        )
+        for batch, embeddings in prefetch(embed_stream(batches), config.ingest.queue_depth, name="embed"):
+            chunk_count += len(batch)
+            embedding_count += len(embeddings)
+            embedding_dim = embedding_dim or (len(embeddings[0]) if embeddings else 0)
+            # Chunks re-produced with the same ID but a new payload replace their old rows
+            replaced = [
+                chunk.chunk_id for chunk in batch
+                if chunk.chunk_id in previous_ids or chunk.chunk_id in realiased_ids
+            ]
+            with timer() as t:
+                vector_store.delete_chunks(replaced)
+                added += vector_store.add_chunks(batch, embeddings)
+            stage_ms["vector_store"] += t.elapsed_ms
+            with timer() as t:
+                bm25_store.delete_chunks(replaced)
+                bm25_store.add_chunks(batch, flush=False)
+            stage_ms["bm25_index"] += t.elapsed_ms
+            with timer() as t:
+                doc_store.add_chunks(batch)
+            stage_ms["doc_store"] += t.elapsed_ms
+        
+        # Drop previous chunks that were not produced again
+        produced_ids = {chunk_id for chunk_ids in file_chunk_ids.values() for chunk_id in chunk_ids}
+        stale_ids = [chunk_id for chunk_id in previous_ids if chunk_id not in produced_ids]
+        with timer() as t:
+            vector_store.delete_chunks(stale_ids)
+        stage_ms["vector_store"] += t.elapsed_ms
+        with timer() as t:
+            bm25_store.delete_chunks(stale_ids)
+        stage_ms["bm25_index"] += t.elapsed_ms
+        with timer() as t:
+            doc_store.delete_chunks(stale_ids)
+        stage_ms["doc_store"] += t.elapsed_ms
+        
+        with timer() as t:
+            vector_store.save()
+        stage_ms["vector_store"] += t.elapsed_ms
+        with timer() as t:
+            # Publish merged segments too, so the generation is self-contained
+            bm25_store.close()
+        stage_ms["bm25_index"] += t.elapsed_ms
+        with timer() as t:
+            doc_store.save()
+        stage_ms["doc_store"] += t.elapsed_ms
+        
+        op.set_output(f"{chunk_count} chunks indexed")
+        op.set_metadata(
+            batch_size=config.ingest.batch_size,
+            queue_depth=config.ingest.queue_depth,
+            workers=config.ingest.workers,
+            duplicates=duplicate_count,
+            reused=reused_count,
+            deleted=len(stale_ids)
+        )
+    
+    # Chunks produced by the chunker; re-aliased stored chunks were not chunked
+    created_count = chunk_count + duplicate_count + reused_count - len(realiased_ids)
+    
+    # Per-stage busy time; the stages overlapped inside ingest_pipeline
+    tracer.trace(
+        "chunk_documents", f"docs_dir={docs_dir}",
+        f"{created_count} chunks created",
+        stage_ms["chunk_documents"], chunk_count=chunk_count
+    )
+    if config.ingest.dedup:
+        tracer.trace(
+            "deduplicate", f"{created_count} chunks",
+            f"{duplicate_count} near-duplicates merged into canonical chunks",
+            stage_ms["deduplicate"], threshold=config.ingest.dedup_threshold
+        )
+    tracer.trace(
+        "generate_embeddings", f"{chunk_count} chunks", f"{embedding_count} embeddings generated",
+        stage_ms["generate_embeddings"], embedding_dim=embedding_dim, **embedding_gen.stats
+    )
+    tracer.trace(
+        "vector_store", f"{chunk_count} chunks", f"{added} chunks added to vector store",
+        stage_ms["vector_store"]
+    )
+    tracer.trace(
+        "bm25_index", f"{chunk_count} chunks", f"BM25 index built with {bm25_store.get_count()} chunks",
+        stage_ms["bm25_index"]
+    )
+    tracer.trace(
+        "doc_store", f"{chunk_count} chunks", f"Document store holds {doc_store.get_count()} chunk texts",
+        stage_ms["doc_store"]
+    )
+    
+    print(f"📄 Chunked {created_count} chunks from documents in {docs_dir}")
+    if config.ingest.dedup:
+        print(f"🧬 Merged {duplicate_count} near-duplicate chunks")
+    if incremental:
+        print(f"♻️  Reused {reused_count} unchanged chunks, deleted {len(stale_ids)} stale chunks")
+    print(f"🔢 Generated {embedding_count} embeddings")
+    if embedding_gen.stats["cache_hits"] or embedding_gen.stats["cache_misses"]:
+        print(f"   Embedding cache: {embedding_gen.stats['cache_hits']} hits, "
+              f"{embedding_gen.stats['cache_misses']} misses")
+    print(f"📊 Added {added} chunks to vector store")
     print(f"🔍 Built BM25 index with {bm25_store.get_count()} chunks")
     
+    # Step 5: Update the manifest
+    for path in diff.removed:
+        manifest.forget(path)
+    for file_path, chunk_ids in file_chunk_ids.items():
+        # What was chunked, so an edit made during ingest is picked up next time
+        manifest.record(file_path, chunk_ids, file_sources[file_path])
+    manifest.settings = settings
+    manifest.save()
+    
     # Save trace
     artifacts_dir = Path(config.artifacts_dir)
     artifacts_dir.mkdir(parents=True, exist_ok=True)
@@ -100,8 +461,20 @@ def ingest(
     summary = {
         "docs_dir": str(docs_dir),
         "persist_dir": str(persist_dir),
-        "chunks": len(chunks),
-        "embeddings": len(embeddings),
+        "mode": "incremental" if incremental else "full",
+        "chunks": chunk_count,
+        "embeddings": embedding_count,
+        "duplicates": duplicate_count,
+        "total_chunks": bm25_store.get_count(),
+        "files_added": len(diff.added),
+        "files_changed": len(diff.changed),
+        "files_removed": len(diff.removed),
+        "files_unchanged": len(diff.unchanged),
+        "has_changes": diff.has_changes,
+        "chunks_reused": reused_count,
+        "chunks_deleted": len(stale_ids),
+        "embedding_cache_hits": embedding_gen.stats["cache_hits"],
+        "embedding_cache_misses": embedding_gen.stats["cache_misses"],
         "trace_path": str(trace_path),
         "run_id": tracer.run_id
     }
@@ -109,6 +482,54 @@ def ingest(
     return summary
 
 
+def watch(
+    docs_dir: Path,
+    persist_dir: Path,
+    config: Config = None,
+    stop: Optional[threading.Event] = None
+) -> None:
+    """Keep a database in sync with a documents directory.
+    
+    Runs an incremental ingest, then polls the directory and applies every
+    debounced burst of adds, updates and deletes as one more incremental
+    ingest, until ``stop`` is set. A failed update is logged and retried
+    with the next change.
+    
+    Each update stages a new generation. With the flat vector backend that
+    hard-links the unchanged segments, so an update costs about its own
+    size; Chroma's files are copied in full every time.
+    
+    Args:
+        docs_dir: Directory containing documents
+        persist_dir: Directory to persist the database
+        config: Optional configuration
+        stop: Event that stops watching
+    """
+    config = config or Config.from_env()
+    watcher = DocsWatcher(
+        docs_dir,
+        interval=config.ingest.watch_interval,
+        debounce=config.ingest.watch_debounce
+    )
+    if config.retrieval.vector_backend == "chroma":
+        logging.warning(
+            "Watch updates copy the whole Chroma index into every generation; "
+            "use --vector-backend flat for cheap updates"
+        )
+    ingest(docs_dir, persist_dir, config, incremental=True)
+    print(f"👀 Watching {docs_dir} for changes")
+    
+    while watcher.wait(stop):
+        print()
+        print(f"🔄 Changes detected in {docs_dir}")
+        try:
+            summary = ingest(docs_dir, persist_dir, config, incremental=True)
+            print(f"✅ Applied in {summary['run_id']}: {summary['files_added']} added, "
+                  f"{summary['files_changed']} changed, {summary['files_removed']} removed")
+        except Exception as e:
+            logging.error(f"Watch update failed: {e}")
+
+
 def main():
     """CLI entry point for ingestion."""
     parser = argparse.ArgumentParser(
@@ -130,13 +551,61 @@ def main():
         "--chunk-size",
         type=int,
         default=500,
-        help="Maximum characters per chunk"
+        help="Maximum characters per chunk (tokens with --chunker tokens)"
     )
     parser.add_argument(
         "--chunk-overlap",
         type=int,
         default=50,
-        help="Character overlap between chunks"
+        help="Character overlap between chunks (tokens with --chunker tokens)"
+    )
+    parser.add_argument(
+        "--chunker",
+        type=str,
+        choices=CHUNKERS,
+        default=None,
+        help="Chunking engine: text, spans or tokens (default: from config)"
+    )
+    parser.add_argument(
+        "--chunk-ids",
+        type=str,
+        choices=CHUNK_ID_SCHEMES,
+        default=None,
+        help="Chunk ID scheme: position or content (stable across edits; default: from config)"
+    )
+    parser.add_argument(
+        "--vector-backend",
+        type=str,
+        choices=sorted(VECTOR_BACKENDS),
+        default=None,
+        help="Vector store backend: chroma or flat (default: from config; flat with --watch)"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=1,
+        help="Number of processes used for chunking (default: 1)"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Index one chunk per cluster of near-duplicate chunks (MinHash/LSH)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-ingest files that were added, changed or removed since the last run"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and apply file changes incrementally as they happen"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=None,
+        help="Seconds without changes before a watch update runs (default: from config)"
     )
     
     args = parser.parse_args()
@@ -152,18 +621,44 @@ def main():
     config = Config.from_env()
     config.chunking.chunk_size = args.chunk_size
     config.chunking.chunk_overlap = args.chunk_overlap
+    if args.chunker:
+        config.chunking.engine = args.chunker
+    if args.chunk_ids:
+        config.chunking.id_scheme = args.chunk_ids
+    if args.vector_backend:
+        config.retrieval.vector_backend = args.vector_backend
+    elif args.watch and not os.environ.get("VECTOR_BACKEND"):
+        config.retrieval.vector_backend = config.ingest.watch_vector_backend
+    config.ingest.workers = max(1, args.workers)
+    if args.dedup:
+        config.ingest.dedup = True
+    if args.debounce is not None:
+        config.ingest.watch_debounce = args.debounce
     
     print(f"🚀 Starting FactStack ingestion")
     print(f"   Documents: {docs_dir}")
     print(f"   Database: {persist_dir}")
     print(f"   Chunk size: {config.chunking.chunk_size}")
+    print(f"   Vector backend: {config.retrieval.vector_backend}")
+    print(f"   Mode: {'watch' if args.watch else 'incremental' if args.incremental else 'full'}")
     print()
     
+    if args.watch:
+        try:
+            watch(docs_dir, persist_dir, config)
+        except KeyboardInterrupt:
+            print()
+            print("👋 Stopped watching")
+        except Exception as e:
+            print(f"❌ Error during ingestion: {e}")
+            sys.exit(1)
+        return
+    
     try:
-        summary = ingest(docs_dir, persist_dir, config)
+        summary = ingest(docs_dir, persist_dir, config, incremental=args.incremental)
         print()
         print("✅ Ingestion complete!")
-        print(f"   Total chunks: {summary['chunks']}")
+        print(f"   Total chunks: {summary.get('total_chunks', summary['chunks'])}")
         print(f"   Run ID: {summary['run_id']}")
     except Exception as e:
         print(f"❌ Error during ingestion: {e}")
@@ -3,12 +3,21 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional
 
-from factstack.llm.schemas import AnswerResponse, ChunkInfo
+from factstack.llm.schemas import AnswerResponse, ChunkInfo, QueryUnderstanding
 
 
 class BaseLLM(ABC):
     """Abstract base class for LLM implementations."""
     
+    @property
+    def embedding_model_id(self) -> Optional[str]:
+        """Identifier of the model behind get_embeddings.
+        
+        Embeddings are only cached persistently when this is set; return
+        None for embeddings that are cheaper to recompute than to look up.
+        """
+        return None
+    
     @abstractmethod
     def generate_answer(
         self,
@@ -42,6 +51,32 @@ class BaseLLM(ABC):
         """
         pass
     
+    def understand_query(self, question: str) -> QueryUnderstanding:
+        """Analyze a question for retrieval.
+        
+        Returns its language, a retrieval rewrite, an English translation
+        of the rewrite and keywords. Implementations should produce all of them in a single
+        request; this default composes ``rewrite_query`` with a separate
+        translation call.
+        
+        Args:
+            question: Original user question
+        
+        Returns:
+            QueryUnderstanding for the question
+        """
+        from factstack.pipeline.query_language import detect_language, needs_translation
+        from factstack.pipeline.query_translate import extract_keywords, translate_with_llm
+        
+        rewrite = self.rewrite_query(question)
+        translation = translate_with_llm(rewrite, self) if needs_translation(question) else None
+        return QueryUnderstanding(
+            language=detect_language(question),
+            rewrite=rewrite,
+            translation=translation,
+            keywords=extract_keywords(translation or rewrite)
+        )
+    
     @abstractmethod
     def rerank_chunks(
         self,
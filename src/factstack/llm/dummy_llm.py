@@ -2,10 +2,11 @@
 
 import re
 import json
-from typing import List
+from typing import List, Optional
 
 from factstack.llm.base import BaseLLM
-from factstack.llm.schemas import AnswerResponse, ChunkInfo, Citation
+from factstack.llm.schemas import AnswerResponse, ChunkInfo, Citation, QueryUnderstanding
+from factstack.utils.hash_embeddings import hash_embeddings
 
 
 class DummyLLM(BaseLLM):
@@ -16,6 +17,16 @@ class DummyLLM(BaseLLM):
     with citations and confidence scores based on heuristics.
     """
     
+    def __init__(self, embedding_dimension: int = 1536, hash_workers: int = 1):
+        """Initialize dummy LLM.
+        
+        Args:
+            embedding_dimension: Default dimension of the hash embeddings
+            hash_workers: Processes used for hash embeddings on large batches
+        """
+        self.embedding_dimension = embedding_dimension
+        self.hash_workers = hash_workers
+    
     def generate_answer(
         self,
         question: str,
@@ -128,6 +139,15 @@ class DummyLLM(BaseLLM):
         rewritten = ' '.join(keywords)
         return rewritten if len(rewritten) > 3 else question
     
+    def understand_query(self, question: str) -> QueryUnderstanding:
+        """Rule-based query understanding.
+        
+        Uses the keyword rewrite above, script-based language detection and
+        the dictionary translation, so no call is made.
+        """
+        from factstack.pipeline.query_translate import understand_query_rules
+        return understand_query_rules(question, self.rewrite_query(question))
+    
     def rerank_chunks(
         self,
         question: str,
@@ -165,7 +185,7 @@ class DummyLLM(BaseLLM):
         chunks.sort(key=lambda x: x.rerank_score, reverse=True)
         return chunks[:top_k]
     
-    def get_embeddings(self, texts: List[str], dimension: int = 1536) -> List[List[float]]:
+    def get_embeddings(self, texts: List[str], dimension: Optional[int] = None) -> List[List[float]]:
         """Generate simple hash-based pseudo-embeddings.
         
         This is NOT a real embedding - just for testing the pipeline.
@@ -173,24 +193,8 @@ class DummyLLM(BaseLLM):
         
         Args:
             texts: List of texts to embed
-            dimension: Embedding dimension (default 1536 for OpenAI compatibility)
+            dimension: Embedding dimension (defaults to the configured one)
         """
-        import hashlib
-        
-        embeddings = []
-        for text in texts:
-            # Create deterministic pseudo-embedding based on text hash
-            hashes = []
-            for i in range(dimension // 32 + 1):
-                h = hashlib.sha256(f"{text}:{i}".encode()).digest()
-                hashes.extend([float(b) / 255.0 - 0.5 for b in h])
-            
-            embedding = hashes[:dimension]
-            
-            # Normalize
-            norm = sum(x * x for x in embedding) ** 0.5
-            if norm > 0:
-                embedding = [x / norm for x in embedding]
-            
-            embeddings.append(embedding)
-        return embeddings
+        return hash_embeddings(
+            texts, dimension or self.embedding_dimension, workers=self.hash_workers
+        ).tolist()
@@ -0,0 +1,192 @@
+"""Token-aware concurrent batching for embedding APIs."""
+
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from factstack.utils.tokens import get_encoding
+
+
+# OpenAI embedding request limits
+MAX_INPUT_TOKENS = 8191
+MAX_INPUTS_PER_REQUEST = 2048
+
+# Without a tokenizer, over-long texts are cut to this many characters per
+# allowed token, well below the ~4 characters of an English token
+FALLBACK_CHARS_PER_TOKEN = 2
+
+# Defaults for request packing and retries
+DEFAULT_MAX_TOKENS_PER_REQUEST = 50_000
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+# HTTP status codes worth retrying
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def pack_batches(
+    token_counts: List[int],
+    max_tokens: int = DEFAULT_MAX_TOKENS_PER_REQUEST,
+    max_items: int = MAX_INPUTS_PER_REQUEST
+) -> List[Tuple[int, int]]:
+    """Pack consecutive texts into requests under a token budget.
+    
+    Args:
+        token_counts: Token count of every text
+        max_tokens: Maximum total tokens per request
+        max_items: Maximum number of texts per request
+    
+    Returns:
+        List of (start, end) index ranges, one per request
+    """
+    batches = []
+    start = 0
+    tokens = 0
+    for i, count in enumerate(token_counts):
+        if i > start and (tokens + count > max_tokens or i - start >= max_items):
+            batches.append((start, i))
+            start = i
+            tokens = 0
+        tokens += count
+    if start < len(token_counts):
+        batches.append((start, len(token_counts)))
+    return batches
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether an embedding request error is transient."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # Connection errors and timeouts carry no status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "Timeout")
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Get the server-suggested delay of a rate limit error, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbeddingBatcher:
+    """Sends embedding requests in token-bounded batches concurrently.
+    
+    Texts are packed in order into requests under a token budget, the
+    requests run on a bounded thread pool with exponential backoff on
+    transient errors, and the vectors are reassembled in input order.
+    """
+    
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        model: Optional[str] = None,
+        max_tokens_per_request: int = DEFAULT_MAX_TOKENS_PER_REQUEST,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff: float = DEFAULT_BACKOFF
+    ):
+        """Initialize batcher.
+        
+        Args:
+            embed_batch: Function embedding one request worth of texts
+            model: Model name used to pick the tokenizer
+            max_tokens_per_request: Token budget of a single request
+            max_workers: Maximum number of requests in flight
+            max_retries: Retries per request on transient errors
+            backoff: Initial backoff delay in seconds
+        """
+        self.embed_batch = embed_batch
+        self.model = model
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+    
+    def prepare(self, texts: List[str]) -> Tuple[List[str], List[int]]:
+        """Truncate over-long texts and count their tokens.
+        
+        Without a tokenizer, texts are cut to FALLBACK_CHARS_PER_TOKEN
+        characters per allowed token and the UTF-8 byte length is used as
+        the count, which is never lower than the real token count.
+        
+        Returns:
+            Tuple of (texts to send, token counts)
+        """
+        encoding = get_encoding(self.model)
+        if encoding is None:
+            max_chars = MAX_INPUT_TOKENS * FALLBACK_CHARS_PER_TOKEN
+            prepared = [text[:max_chars] for text in texts]
+            return prepared, [len(text.encode('utf-8')) for text in prepared]
+        
+        prepared = []
+        counts = []
+        for text in texts:
+            tokens = encoding.encode(text, disallowed_special=())
+            if len(tokens) > MAX_INPUT_TOKENS:
+                tokens = tokens[:MAX_INPUT_TOKENS]
+                text = encoding.decode(tokens)
+            prepared.append(text)
+            counts.append(len(tokens))
+        return prepared, counts
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, preserving input order.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            One embedding vector per text
+        """
+        if not texts:
+            return []
+        
+        prepared, counts = self.prepare(texts)
+        batches = pack_batches(counts, max_tokens=self.max_tokens_per_request)
+        
+        if len(batches) == 1 or self.max_workers == 1:
+            results = [self._embed_with_retry(prepared[start:end]) for start, end in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+                results = list(executor.map(
+                    lambda span: self._embed_with_retry(prepared[span[0]:span[1]]),
+                    batches
+                ))
+        
+        embeddings = []
+        for vectors in results:
+            embeddings.extend(vectors)
+        return embeddings
+    
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        """Embed one request, retrying transient errors with backoff."""
+        attempt = 0
+        while True:
+            try:
+                vectors = self.embed_batch(texts)
+                if len(vectors) != len(texts):
+                    raise RuntimeError(
+                        f"Embedding API returned {len(vectors)} vectors for {len(texts)} texts"
+                    )
+                return vectors
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    # Exponential backoff with jitter
+                    delay = min(MAX_BACKOFF, self.backoff * (2 ** attempt)) * (0.5 + random.random() / 2)
+                attempt += 1
+                logging.warning(
+                    f"Embedding request failed ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
@@ -5,11 +5,24 @@ import os
 from typing import List, Optional
 
 from factstack.llm.base import BaseLLM
-from factstack.llm.schemas import AnswerResponse, ChunkInfo, Citation
+from factstack.llm.embedding_batcher import (
+    EmbeddingBatcher,
+    DEFAULT_MAX_TOKENS_PER_REQUEST,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_MAX_RETRIES,
+)
+from factstack.llm.schemas import AnswerResponse, ChunkInfo, Citation, QueryUnderstanding
 
 # Constants
 TEXT_TRUNCATION_LENGTH = 200  # Maximum characters for text truncation in citations
 
+QUERY_UNDERSTANDING_PROMPT = """You prepare search queries for a technical documentation retrieval system.
+For the user's question, output JSON with exactly these fields:
+- "language": "zh" if the question is mainly Chinese, "en" if English, "mixed" if both
+- "rewrite": the question rewritten to be more effective for document retrieval, in its original language
+- "translation": the rewrite translated into an English retrieval query, or null if the question is already English
+- "keywords": a list of the most important English search keywords"""
+
 
 class OpenAILLM(BaseLLM):
     """OpenAI-based LLM implementation.
@@ -17,16 +30,41 @@ class OpenAILLM(BaseLLM):
     Requires OPENAI_API_KEY environment variable to be set.
     """
     
-    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.1):
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.1,
+        embedding_model: str = "text-embedding-3-small",
+        embedding_batch_tokens: int = DEFAULT_MAX_TOKENS_PER_REQUEST,
+        embedding_concurrency: int = DEFAULT_MAX_WORKERS,
+        embedding_max_retries: int = DEFAULT_MAX_RETRIES
+    ):
         """Initialize OpenAI LLM.
         
         Args:
             model: OpenAI model to use
             temperature: Temperature for generation
+            embedding_model: OpenAI embedding model to use
+            embedding_batch_tokens: Token budget of one embeddings request
+            embedding_concurrency: Maximum embeddings requests in flight
+            embedding_max_retries: Retries per embeddings request
         """
         self.model = model
         self.temperature = temperature
+        self.embedding_model = embedding_model
         self._client = None
+        self._batcher = EmbeddingBatcher(
+            self._embed_batch,
+            model=embedding_model,
+            max_tokens_per_request=embedding_batch_tokens,
+            max_workers=embedding_concurrency,
+            max_retries=embedding_max_retries
+        )
+    
+    @property
+    def embedding_model_id(self) -> Optional[str]:
+        """Identifier of the embedding model."""
+        return f"openai/{self.embedding_model}"
     
     @property
     def client(self):
@@ -153,6 +191,54 @@ Evidence (use [C1], [C2], etc. to cite):
         except Exception:
             return question
     
+    def understand_query(self, question: str) -> QueryUnderstanding:
+        """Detect language, rewrite, translate and extract keywords in one JSON-mode call.
+        
+        Fields the model leaves out or gets wrong are filled in by rules; if
+        the call fails, the rule-based result is returned with fallback=True.
+        """
+        from factstack.pipeline.query_language import detect_language, needs_translation
+        from factstack.pipeline.query_translate import (
+            extract_keywords, translate_rule_based, understand_query_rules
+        )
+        
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                temperature=0.0,
+                messages=[
+                    {"role": "system", "content": QUERY_UNDERSTANDING_PROMPT},
+                    {"role": "user", "content": question}
+                ],
+                response_format={"type": "json_object"}
+            )
+            data = json.loads(response.choices[0].message.content)
+        except Exception:
+            return understand_query_rules(question, fallback=True)
+        
+        language = data.get("language")
+        if language not in ("zh", "en", "mixed"):
+            language = detect_language(question)
+        
+        rewrite = data.get("rewrite")
+        if not isinstance(rewrite, str) or not rewrite.strip():
+            rewrite = question
+        
+        translation = data.get("translation")
+        if not isinstance(translation, str) or not translation.strip():
+            translation = translate_rule_based(question) if needs_translation(question) else None
+        
+        keywords = data.get("keywords")
+        if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+            keywords = extract_keywords(translation or rewrite)
+        
+        return QueryUnderstanding(
+            language=language,
+            rewrite=rewrite.strip(),
+            translation=translation.strip() if translation else None,
+            keywords=keywords
+        )
+    
     def rerank_chunks(
         self,
         question: str,
@@ -205,13 +291,22 @@ Chunks:
             return chunks[:top_k]
     
     def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings using OpenAI API."""
+        """Get embeddings using OpenAI API.
+        
+        Texts are sent in token-bounded batches, several requests at a time.
+        """
         if not texts:
             return []
         
+        return self._batcher.embed(texts)
+    
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one request worth of texts."""
         response = self.client.embeddings.create(
-            model="text-embedding-3-small",
+            model=self.embedding_model,
             input=texts
         )
         
-        return [item.embedding for item in response.data]
+        # Results carry their input index; don't rely on response order
+        data = sorted(response.data, key=lambda item: item.index)
+        return [item.embedding for item in data]
@@ -1,6 +1,6 @@
 """Pydantic schemas for LLM outputs."""
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -41,16 +41,36 @@ class AnswerResponse(BaseModel):
     )
 
 
+class QueryUnderstanding(BaseModel):
+    """Everything retrieval needs to know about a question, from one LLM call."""
+    language: str = Field(description="Detected language of the question: zh, en or mixed")
+    rewrite: str = Field(description="The question rewritten for document retrieval")
+    translation: Optional[str] = Field(
+        default=None,
+        description="English retrieval query, or None if the question is already English"
+    )
+    keywords: List[str] = Field(
+        default_factory=list,
+        description="Most important search keywords"
+    )
+    fallback: bool = Field(
+        default=False,
+        description="Whether the LLM call failed and rules produced this result"
+    )
+
+
 class ChunkInfo(BaseModel):
     """Information about a retrieved chunk."""
     chunk_id: str
     source_path: str
     title: Optional[str] = None
-    text: str
+    # Empty until hydrated from the document store
+    text: str = ""
     vector_score: float = 0.0
     bm25_score: float = 0.0
     rerank_score: float = 0.0
     final_score: float = 0.0
+    metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
 class QueryResult(BaseModel):
@@ -1,6 +1,7 @@
 """Tracing and observability for FactStack."""
 
 import json
+import threading
 import uuid
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -30,7 +31,11 @@ class TraceEntry:
 
 
 class Tracer:
-    """Tracer for collecting pipeline execution traces."""
+    """Tracer for collecting pipeline execution traces.
+    
+    Entries may be added from several threads, e.g. by concurrent
+    retrieval branches.
+    """
     
     def __init__(self, run_id: Optional[str] = None):
         """Initialize tracer.
@@ -40,6 +45,7 @@ class Tracer:
         """
         self.run_id = run_id or str(uuid.uuid4())[:8]
         self.entries: List[TraceEntry] = []
+        self._lock = threading.Lock()
     
     def trace(
         self,
@@ -76,7 +82,8 @@ class Tracer:
             error=error,
             metadata=metadata if metadata else {}
         )
-        self.entries.append(entry)
+        with self._lock:
+            self.entries.append(entry)
         return entry
     
     def save(self, path: Path) -> None:
@@ -86,8 +93,10 @@ class Tracer:
             path: Path to the output file
         """
         path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            entries = list(self.entries)
         with open(path, "w", encoding="utf-8") as f:
-            for entry in self.entries:
+            for entry in entries:
                 f.write(json.dumps(entry.to_dict(), ensure_ascii=False) + "\n")
     
     def get_summary(self) -> Dict[str, Any]:
@@ -96,13 +105,15 @@ class Tracer:
         Returns:
             Dictionary with trace summary statistics
         """
-        total_latency = sum(e.latency_ms for e in self.entries)
-        stages = [e.stage for e in self.entries]
-        errors = [e for e in self.entries if not e.ok]
+        with self._lock:
+            entries = list(self.entries)
+        total_latency = sum(e.latency_ms for e in entries)
+        stages = [e.stage for e in entries]
+        errors = [e for e in entries if not e.ok]
         
         return {
             "run_id": self.run_id,
-            "total_entries": len(self.entries),
+            "total_entries": len(entries),
             "total_latency_ms": total_latency,
             "stages": stages,
             "errors": len(errors),
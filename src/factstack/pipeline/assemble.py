@@ -1,23 +1,25 @@
 """Context assembly for FactStack."""
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from factstack.llm.schemas import ChunkInfo
-from factstack.utils.text import count_tokens_approx
+from factstack.utils.tokens import count_tokens
 
 
 class ContextAssembler:
     """Assembles context from ranked chunks for LLM input."""
     
-    def __init__(self, max_tokens: int = 3000, max_chunks: int = 8):
+    def __init__(self, max_tokens: int = 3000, max_chunks: int = 8, model: Optional[str] = None):
         """Initialize assembler.
         
         Args:
-            max_tokens: Maximum approximate tokens for context
+            max_tokens: Maximum tokens for context
             max_chunks: Maximum number of chunks to include
+            model: Model whose tokenizer counts tokens
         """
         self.max_tokens = max_tokens
         self.max_chunks = max_chunks
+        self.model = model
     
     def assemble(
         self,
@@ -39,8 +41,15 @@ class ContextAssembler:
         total_tokens = 0
         
         for i, chunk in enumerate(chunks[:self.max_chunks]):
-            chunk_text = f"[C{i+1}] Source: {chunk.source_path}\n{chunk.text}"
-            chunk_tokens = count_tokens_approx(chunk_text)
+            header = f"[C{i+1}] Source: {chunk.source_path}\n"
+            chunk_text = header + chunk.text
+            
+            # Chunks ingested with a token count only need their header counted
+            stored_tokens = chunk.metadata.get("token_count")
+            if stored_tokens is None:
+                chunk_tokens = count_tokens(chunk_text, self.model)
+            else:
+                chunk_tokens = int(stored_tokens) + count_tokens(header, self.model)
             
             if total_tokens + chunk_tokens > self.max_tokens and used_chunks:
                 # Stop adding more chunks
@@ -0,0 +1,671 @@
+"""Inverted-index BM25 scoring for FactStack."""
+
+import json
+import os
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from factstack.utils.records import save_array, load_array
+
+
+# BM25Okapi defaults, kept identical to rank_bm25
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+DEFAULT_EPSILON = 0.25
+
+# On-disk index layout
+INDEX_FORMAT = "factstack-bm25"
+INDEX_VERSION = 1
+META_FILENAME = "meta.json"
+VOCAB_FILENAME = "vocab.txt"
+INDEX_ARRAYS = ("offsets", "doc_ids", "tfs", "doc_len", "idf")
+
+# Per-block score bounds for dynamic pruning. Every postings list is cut
+# into blocks of BLOCK_SIZE postings; a block stores its largest term
+# frequency, its shortest document and its last doc id. Together with the
+# IDF and average document length at query time they bound the score any
+# document in the block can get from the term.
+BLOCK_SIZE = 128
+BLOCK_ARRAYS = ("block_max_tf", "block_min_dl", "block_last_doc")
+
+# Documents are scored in windows of this many doc ids, so the top-k
+# threshold found in one window prunes the next ones
+WINDOW_DOCS = 1024
+
+# Relative margin on score bounds against floating point rounding, so
+# pruning never drops a document that exhaustive scoring would keep
+BOUND_SLACK = 1e-9
+
+
+@dataclass
+class PruningStats:
+    """Work done by pruned top-k searches."""
+    postings: int = 0  # postings of the query terms, all read by exhaustive scoring
+    scored: int = 0  # postings actually read
+    windows: int = 0
+    skipped_windows: int = 0
+
+
+class Vocabulary:
+    """Interns terms as dense int32 ids, assigned in first-seen order."""
+    
+    def __init__(self):
+        """Initialize an empty vocabulary."""
+        self.ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+    
+    def __len__(self) -> int:
+        return len(self.terms)
+    
+    def intern(self, tokens: Iterable[str]) -> array:
+        """Get the ids of tokens, adding unseen terms.
+        
+        Args:
+            tokens: Tokens to intern
+        
+        Returns:
+            Term ids as a flat ``array('i')``
+        """
+        ids = self.ids
+        terms = self.terms
+        term_ids = array('i')
+        for token in tokens:
+            term_id = ids.get(token)
+            if term_id is None:
+                term_id = len(terms)
+                ids[token] = term_id
+                terms.append(token)
+            term_ids.append(term_id)
+        return term_ids
+    
+    def lookup(self, tokens: Iterable[str]) -> List[int]:
+        """Get the ids of tokens, -1 for unknown terms."""
+        ids = self.ids
+        return [ids.get(token, -1) for token in tokens]
+    
+    def intern_corpus(self, tokenized_corpus: Iterable[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Intern tokenized documents into one flat id buffer.
+        
+        Args:
+            tokenized_corpus: One token list per document
+        
+        Returns:
+            Tuple of (int32 term ids of all tokens, int64 document offsets)
+        """
+        token_ids = array('i')
+        lengths = []
+        for tokens in tokenized_corpus:
+            ids = self.intern(tokens)
+            token_ids.extend(ids)
+            lengths.append(len(ids))
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return np.array(token_ids, dtype=np.int32), offsets
+
+
+def compact_ids(token_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Renumber term ids densely in order of first occurrence.
+    
+    Args:
+        token_ids: Term ids of a token sequence
+    
+    Returns:
+        Tuple of (renumbered ids, original id of every new id)
+    """
+    unique, first, inverse = np.unique(token_ids, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.int32)
+    rank[order] = np.arange(len(order), dtype=np.int32)
+    return rank[inverse.reshape(-1)], unique[order]
+
+
+class InvertedIndex:
+    """BM25 (Okapi) index stored as term → postings arrays.
+    
+    Postings are kept in CSR form: the postings of term ``t`` are
+    ``doc_ids[offsets[t]:offsets[t + 1]]`` with matching term frequencies in
+    ``tfs``. A query only touches the postings of its own terms, and the
+    scores are computed with the same formula (and IDF floor) as
+    ``rank_bm25.BM25Okapi`` so both backends rank documents identically.
+    """
+    
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        doc_len: np.ndarray,
+        idf: np.ndarray,
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        block_max_tf: Optional[np.ndarray] = None,
+        block_min_dl: Optional[np.ndarray] = None,
+        block_last_doc: Optional[np.ndarray] = None
+    ):
+        """Initialize index from prebuilt arrays.
+        
+        Args:
+            vocab: Mapping from term to term id
+            offsets: CSR offsets into doc_ids/tfs, length len(vocab) + 1
+            doc_ids: Document ids of all postings, grouped by term
+            tfs: Term frequencies matching doc_ids
+            doc_len: Token count of every document
+            idf: IDF of every term id
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+            block_max_tf: Largest term frequency of every postings block
+            block_min_dl: Shortest document length of every postings block
+            block_last_doc: Last doc id of every postings block
+        
+        The block arrays are derived from the postings when not given.
+        """
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.idf = idf
+        self.k1 = k1
+        self.b = b
+        self.corpus_size = len(doc_len)
+        self.avgdl = float(doc_len.sum()) / self.corpus_size if self.corpus_size else 0.0
+        
+        # Postings blocks of term t are block_offsets[t]:block_offsets[t + 1]
+        self.block_offsets = np.zeros(len(offsets), dtype=np.int64)
+        np.cumsum((np.diff(offsets) + BLOCK_SIZE - 1) // BLOCK_SIZE, out=self.block_offsets[1:])
+        if block_max_tf is None or block_min_dl is None or block_last_doc is None:
+            block_max_tf, block_min_dl, block_last_doc = self._build_blocks()
+        self.block_max_tf = block_max_tf
+        self.block_min_dl = block_min_dl
+        self.block_last_doc = block_last_doc
+    
+    def _build_blocks(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Compute the per-block maxima of the postings lists."""
+        n_blocks = int(self.block_offsets[-1])
+        if n_blocks == 0:
+            return (
+                np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+            )
+        
+        block_terms = np.repeat(
+            np.arange(len(self.offsets) - 1), np.diff(self.block_offsets)
+        )
+        starts = (
+            self.offsets[block_terms]
+            + (np.arange(n_blocks) - self.block_offsets[block_terms]) * BLOCK_SIZE
+        )
+        ends = np.minimum(starts + BLOCK_SIZE, self.offsets[block_terms + 1])
+        # Blocks partition the postings, so reduceat over their starts works per block
+        block_max_tf = np.maximum.reduceat(np.asarray(self.tfs), starts).astype(np.int32)
+        block_min_dl = np.minimum.reduceat(
+            np.asarray(self.doc_len)[self.doc_ids], starts
+        ).astype(np.int32)
+        block_last_doc = np.asarray(self.doc_ids)[ends - 1].astype(np.int32)
+        return block_max_tf, block_min_dl, block_last_doc
+    
+    @property
+    def terms(self) -> List[str]:
+        """Terms ordered by term id."""
+        return list(self.vocab)
+    
+    @classmethod
+    def build(
+        cls,
+        tokenized_corpus: List[List[str]],
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        epsilon: float = DEFAULT_EPSILON
+    ) -> "InvertedIndex":
+        """Build an index from tokenized documents.
+        
+        Args:
+            tokenized_corpus: One token list per document
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+            epsilon: Floor for negative IDF values, as a fraction of the mean IDF
+        
+        Returns:
+            InvertedIndex over the corpus
+        """
+        vocabulary = Vocabulary()
+        token_ids, token_offsets = vocabulary.intern_corpus(tokenized_corpus)
+        return cls.from_token_ids(
+            token_ids, token_offsets, vocabulary.terms, k1=k1, b=b, epsilon=epsilon
+        )
+    
+    @classmethod
+    def from_token_ids(
+        cls,
+        token_ids: np.ndarray,
+        token_offsets: np.ndarray,
+        terms: List[str],
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        epsilon: float = DEFAULT_EPSILON
+    ) -> "InvertedIndex":
+        """Build an index from an interned token buffer.
+        
+        Term frequencies are counted with one sort over (term, doc) keys
+        instead of per-document dictionaries.
+        
+        Args:
+            token_ids: Term ids of all tokens, numbered densely in order of
+                first occurrence (see compact_ids)
+            token_offsets: Start of every document in token_ids, plus the end
+            terms: Term of every id
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+            epsilon: Floor for negative IDF values, as a fraction of the mean IDF
+        
+        Returns:
+            InvertedIndex over the corpus
+        """
+        n_docs = len(token_offsets) - 1
+        doc_len = np.diff(token_offsets).astype(np.int32)
+        token_docs = np.repeat(np.arange(n_docs, dtype=np.int64), doc_len)
+        
+        # Sorting by term, then doc, groups the postings in CSR order
+        keys, tfs = np.unique(
+            np.asarray(token_ids, dtype=np.int64) * max(n_docs, 1) + token_docs, return_counts=True
+        )
+        post_terms = keys // max(n_docs, 1)
+        doc_ids = (keys % max(n_docs, 1)).astype(np.int32)
+        tfs = tfs.astype(np.int32)
+        
+        df = np.bincount(post_terms, minlength=len(terms)).astype(np.int64)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        
+        idf = compute_idf(df, n_docs, epsilon)
+        vocab = {term: term_id for term_id, term in enumerate(terms)}
+        return cls(vocab, offsets, doc_ids, tfs, doc_len, idf, k1=k1, b=b)
+    
+    def save(self, index_dir: Path) -> None:
+        """Write the index in the versioned binary layout.
+        
+        Arrays are stored as individual ``.npy`` files that can be
+        memory-mapped, the vocabulary as one term per line in term id
+        order. ``meta.json`` is written last and marks a complete index.
+        
+        Args:
+            index_dir: Directory to write the index files into
+        """
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        
+        for name in INDEX_ARRAYS + BLOCK_ARRAYS:
+            save_array(index_dir / f"{name}.npy", getattr(self, name))
+        
+        vocab_path = index_dir / VOCAB_FILENAME
+        tmp_path = vocab_path.with_name(VOCAB_FILENAME + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for term in self.vocab:
+                f.write(term)
+                f.write("\n")
+        os.replace(tmp_path, vocab_path)
+        
+        meta = {
+            "format": INDEX_FORMAT,
+            "version": INDEX_VERSION,
+            "corpus_size": self.corpus_size,
+            "vocab_size": len(self.vocab),
+            "postings": int(len(self.doc_ids)),
+            "block_size": BLOCK_SIZE,
+            "k1": self.k1,
+            "b": self.b,
+        }
+        meta_path = index_dir / META_FILENAME
+        tmp_path = meta_path.with_name(META_FILENAME + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+    
+    @classmethod
+    def open(cls, index_dir: Path, mmap: bool = True) -> Optional["InvertedIndex"]:
+        """Open an index written by save().
+        
+        Args:
+            index_dir: Directory containing the index files
+            mmap: Memory-map the arrays instead of reading them into RAM
+        
+        Returns:
+            InvertedIndex, or None if no compatible index exists
+        """
+        index_dir = Path(index_dir)
+        meta_path = index_dir / META_FILENAME
+        if not meta_path.exists():
+            return None
+        
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("format") != INDEX_FORMAT or meta.get("version") != INDEX_VERSION:
+            return None
+        
+        mmap_mode = 'r' if mmap else None
+        arrays = {
+            name: load_array(index_dir / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in INDEX_ARRAYS
+        }
+        # Indexes written before blocks existed get them computed on open
+        if meta.get("block_size") == BLOCK_SIZE:
+            for name in BLOCK_ARRAYS:
+                arrays[name] = load_array(index_dir / f"{name}.npy", mmap_mode=mmap_mode)
+        with open(index_dir / VOCAB_FILENAME, 'r', encoding='utf-8') as f:
+            vocab = {line.rstrip("\n"): i for i, line in enumerate(f)}
+        
+        return cls(vocab, k1=meta["k1"], b=meta["b"], **arrays)
+    
+    def postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the (doc ids, term frequencies) postings of a term."""
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.doc_ids[start:end], self.tfs[start:end]
+    
+    def score(self, query_tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Score every document that contains at least one query term.
+        
+        Args:
+            query_tokens: Tokenized query (repeated tokens count repeatedly)
+        
+        Returns:
+            Tuple of (candidate doc ids in ascending order, their BM25 scores)
+        """
+        cand_parts = []
+        contrib_parts = []
+        
+        for token in query_tokens:
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            ids, tf = self.postings(term_id)
+            contrib = self._contributions(self.idf[term_id], tf, self.doc_len[ids], self.avgdl)
+            cand_parts.append(ids)
+            contrib_parts.append(contrib)
+        
+        if not cand_parts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+        
+        all_ids = np.concatenate(cand_parts)
+        candidates, inverse = np.unique(all_ids, return_inverse=True)
+        # bincount sums per document in query-term order, like rank_bm25
+        scores = np.bincount(
+            inverse, weights=np.concatenate(contrib_parts), minlength=len(candidates)
+        )
+        return candidates, scores
+    
+    def _contributions(
+        self,
+        weight: float,
+        tf: np.ndarray,
+        dl: np.ndarray,
+        avgdl: float
+    ) -> np.ndarray:
+        """BM25 score contributions of one query term."""
+        tf = tf.astype(np.float64)
+        return weight * (
+            tf * (self.k1 + 1) /
+            (tf + self.k1 * (1 - self.b + self.b * dl / avgdl))
+        )
+    
+    def top_k(self, query_tokens: List[str], k: int) -> List[Tuple[int, float]]:
+        """Get the k highest scoring documents for a query.
+        
+        Ties are broken by ascending doc id, matching a stable sort over
+        the full score vector.
+        
+        Args:
+            query_tokens: Tokenized query
+            k: Number of results
+        
+        Returns:
+            List of (doc id, score) tuples, best first
+        """
+        collector = TopKCollector(k)
+        self.search(query_tokens, collector)
+        return collector.results()
+    
+    def search(
+        self,
+        query_tokens: List[str],
+        collector: "TopKCollector",
+        idf: Optional[np.ndarray] = None,
+        term_map: Optional[np.ndarray] = None,
+        avgdl: Optional[float] = None,
+        deleted: Optional[np.ndarray] = None,
+        base: int = 0,
+        prune: bool = True,
+        stats: Optional[PruningStats] = None
+    ) -> None:
+        """Offer the best documents for a query to a top-k collector.
+        
+        Uses block-max MaxScore pruning: documents are visited in windows
+        of doc ids, and in each window the query terms whose block bounds
+        add up to less than the collector's threshold are "non-essential".
+        Only documents in the postings of essential terms become
+        candidates, and non-essential postings are only probed for
+        candidates whose bound can still beat the threshold. Windows that
+        cannot beat it at all are skipped. The collected top-k (scores
+        included) is identical to exhaustive scoring.
+        
+        Args:
+            query_tokens: Tokenized query (repeated tokens count repeatedly)
+            collector: Running top-k, shared by the indexes of one search
+            idf: IDF array to score with (default: the index's own)
+            term_map: Maps term ids of this index to positions in idf
+            avgdl: Average document length to score with (default: the index's own)
+            deleted: Mask of documents to leave out
+            base: Offset added to doc ids before offering them
+            prune: Skip work that cannot change the result; False scores
+                every posting, for comparison
+            stats: Counters to update
+        """
+        idf = self.idf if idf is None else idf
+        avgdl = self.avgdl if avgdl is None else avgdl
+        stats = stats if stats is not None else PruningStats()
+        if collector.k <= 0:
+            return
+        
+        # One entry per query token occurrence, in query order
+        terms = []
+        for token in query_tokens:
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            weight = idf[term_map[term_id] if term_map is not None else term_id]
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            blocks = slice(self.block_offsets[term_id], self.block_offsets[term_id + 1])
+            # Negative IDF contributions are below the zero bound
+            block_bounds = self._contributions(
+                max(weight, 0.0), self.block_max_tf[blocks], self.block_min_dl[blocks], avgdl
+            ) * (1 + BOUND_SLACK)
+            terms.append((
+                weight, self.doc_ids[start:end], self.tfs[start:end],
+                block_bounds, self.block_last_doc[blocks]
+            ))
+            stats.postings += int(end - start)
+        if not terms:
+            return
+        
+        cursors = [0] * len(terms)
+        for window_start in range(0, self.corpus_size, WINDOW_DOCS):
+            window_end = min(window_start + WINDOW_DOCS, self.corpus_size)
+            stats.windows += 1
+            
+            # Postings of every term inside the window, and the term's best bound there
+            spans = []
+            window_bounds = np.zeros(len(terms), dtype=np.float64)
+            for i, (_, ids, _, block_bounds, block_last) in enumerate(terms):
+                end = cursors[i] + int(np.searchsorted(ids[cursors[i]:], window_end))
+                spans.append((cursors[i], end))
+                cursors[i] = end
+                if end > spans[i][0]:
+                    first = np.searchsorted(block_last, window_start)
+                    last = np.searchsorted(block_last, window_end - 1)
+                    window_bounds[i] = block_bounds[first:last + 1].max()
+            
+            threshold = collector.threshold if prune else -np.inf
+            if window_bounds.sum() < threshold:
+                stats.skipped_windows += 1
+                continue
+            
+            # Terms whose bounds together cannot beat the threshold are non-essential
+            order = np.argsort(window_bounds, kind='stable')
+            n_optional = int(np.count_nonzero(np.cumsum(window_bounds[order]) < threshold))
+            optional = order[:n_optional].tolist()
+            essential = order[n_optional:].tolist()
+            
+            candidate_parts = []
+            for i in essential:
+                start, end = spans[i]
+                candidate_parts.append(terms[i][1][start:end])
+                stats.scored += end - start
+            candidates = np.unique(np.concatenate(candidate_parts))
+            if not len(candidates):
+                continue
+            
+            contrib = np.zeros((len(terms), len(candidates)), dtype=np.float64)
+            for i in essential:
+                weight, ids, tfs = terms[i][:3]
+                start, end = spans[i]
+                positions = np.searchsorted(candidates, ids[start:end])
+                contrib[i, positions] = self._contributions(
+                    weight, tfs[start:end], self.doc_len[ids[start:end]], avgdl
+                )
+            
+            if optional:
+                # Probe non-essential terms from the strongest down, dropping
+                # candidates whose bound falls below the threshold as it tightens
+                remaining = np.zeros((len(terms), len(candidates)), dtype=np.float64)
+                for i in optional:
+                    block_bounds, block_last = terms[i][3:]
+                    block = np.searchsorted(block_last, candidates)
+                    inside = block < len(block_last)
+                    remaining[i, inside] = block_bounds[block[inside]]
+                
+                for i in reversed(optional):
+                    bound = contrib.sum(axis=0) * (1 + BOUND_SLACK) + remaining.sum(axis=0)
+                    keep = bound >= threshold
+                    candidates = candidates[keep]
+                    contrib = contrib[:, keep]
+                    remaining = remaining[:, keep]
+                    if not len(candidates):
+                        break
+                    
+                    weight, ids, tfs = terms[i][:3]
+                    start, end = spans[i]
+                    window_ids = ids[start:end]
+                    positions = np.searchsorted(window_ids, candidates)
+                    found = positions < len(window_ids)
+                    found[found] = window_ids[positions[found]] == candidates[found]
+                    stats.scored += min(len(candidates), len(window_ids))
+                    matched = positions[found]
+                    contrib[i, found] = self._contributions(
+                        weight, tfs[start:end][matched], self.doc_len[window_ids[matched]], avgdl
+                    )
+                    remaining[i] = 0.0
+                if not len(candidates):
+                    continue
+            
+            # Sum per document in query-term order, like the bincount in score()
+            scores = np.zeros(len(candidates), dtype=np.float64)
+            for i in range(len(terms)):
+                scores += contrib[i]
+            if deleted is not None:
+                live = ~deleted[candidates]
+                candidates, scores = candidates[live], scores[live]
+            collector.offer(candidates.astype(np.int64) + base, scores)
+
+
+class TopKCollector:
+    """Running top-k of (doc id, score) pairs across scoring windows.
+    
+    Documents must be offered in ascending doc id order, so ties keep
+    resolving to the lowest doc id.
+    """
+    
+    def __init__(self, k: int):
+        """Initialize an empty collector for k results."""
+        self.k = k
+        self.doc_ids = np.zeros(0, dtype=np.int64)
+        self.scores = np.zeros(0, dtype=np.float64)
+    
+    @property
+    def threshold(self) -> float:
+        """Score a new document must beat to enter the top-k."""
+        if self.k <= 0 or len(self.scores) < self.k:
+            return -np.inf
+        return float(self.scores.min())
+    
+    def offer(self, doc_ids: np.ndarray, scores: np.ndarray) -> None:
+        """Add scored documents with doc ids above all previous ones."""
+        if not len(doc_ids):
+            return
+        doc_ids = np.concatenate([self.doc_ids, doc_ids])
+        scores = np.concatenate([self.scores, scores])
+        if len(doc_ids) > self.k:
+            keep = np.sort(_top_k_indices(doc_ids, scores, self.k))
+            doc_ids, scores = doc_ids[keep], scores[keep]
+        self.doc_ids = doc_ids
+        self.scores = scores
+    
+    def results(self) -> List[Tuple[int, float]]:
+        """Get the collected (doc id, score) pairs, best first."""
+        return select_top_k(self.doc_ids, self.scores, self.k)
+
+
+def compute_idf(df: np.ndarray, corpus_size: int, epsilon: float = DEFAULT_EPSILON) -> np.ndarray:
+    """Compute BM25Okapi IDF values with rank_bm25's epsilon floor.
+    
+    Args:
+        df: Document frequency of every term
+        corpus_size: Number of documents
+        epsilon: Floor for negative IDF values, as a fraction of the mean IDF
+    
+    Returns:
+        IDF of every term as float64
+    """
+    if len(df) == 0:
+        return np.zeros(0, dtype=np.float64)
+    df = np.asarray(df, dtype=np.float64)
+    idf = np.log(corpus_size - df + 0.5) - np.log(df + 0.5)
+    # cumsum accumulates sequentially, matching rank_bm25's running sum
+    average_idf = float(np.cumsum(idf)[-1]) / len(idf)
+    idf[idf < 0] = epsilon * average_idf
+    return idf
+
+
+def _top_k_indices(candidates: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k best candidates, sorted by score, then doc id."""
+    if len(candidates) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+        threshold = scores[part].min()
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(len(candidates))
+    
+    order = np.lexsort((candidates[selected], -scores[selected]))
+    return selected[order]
+
+
+def select_top_k(candidates: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Select the k best (doc id, score) pairs without a full sort.
+    
+    Args:
+        candidates: Doc ids in ascending order
+        scores: Scores matching candidates
+        k: Number of results
+    
+    Returns:
+        List of (doc id, score) tuples sorted by score, then doc id
+    """
+    if k <= 0 or len(candidates) == 0:
+        return []
+    
+    chosen = _top_k_indices(candidates, scores, k)
+    return list(zip(candidates[chosen].tolist(), scores[chosen].tolist()))
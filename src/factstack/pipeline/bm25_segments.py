@@ -0,0 +1,847 @@
+"""Segmented BM25 index with deletes and background merging for FactStack."""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from factstack.pipeline.bm25_index import (
+    InvertedIndex, PruningStats, TopKCollector, Vocabulary, compact_ids, compute_idf,
+    DEFAULT_K1, DEFAULT_B, DEFAULT_EPSILON, INDEX_ARRAYS, BLOCK_ARRAYS, META_FILENAME, VOCAB_FILENAME
+)
+from factstack.utils.records import RecordFile, write_records, save_array, load_array
+
+
+# Segment list, the commit point of the index
+SEGMENTS_FILENAME = "segments.json"
+SEGMENTS_FORMAT = "factstack-bm25-segments"
+SEGMENTS_VERSION = 1
+SEGMENT_PREFIX = "seg-"
+
+# Files of one segment (besides the InvertedIndex arrays)
+CHUNKS_FILENAME = "chunks.jsonl"
+CHUNK_OFFSETS_FILENAME = "chunk_offsets.npy"
+CHUNK_IDS_FILENAME = "chunk_ids.txt"
+TOKENS_FILENAME = "tokens.npy"
+TOKEN_OFFSETS_FILENAME = "token_offsets.npy"
+DELETES_PREFIX = "deletes-"
+
+# An index saved before segments existed is one segment stored in the
+# index directory itself
+LEGACY_SEGMENT = "."
+
+# Buffered documents are written as a new segment once this many are pending
+DEFAULT_FLUSH_DOCS = 10_000
+
+# Merge policy: keep at most MAX_SEGMENTS segments by merging the adjacent
+# run of MERGE_FACTOR segments with the fewest live documents, and rewrite
+# segments whose documents are mostly deleted
+DEFAULT_MERGE_FACTOR = 4
+DEFAULT_MAX_SEGMENTS = 8
+MAX_DELETED_RATIO = 0.5
+
+
+class Segment:
+    """An immutable on-disk BM25 segment plus its tombstones.
+    
+    The postings, token corpus and chunk payloads never change once
+    written; deleting a document only sets its bit in ``deleted``. A
+    segment built by build() lives in memory (``path`` is None) until the
+    index writes it on commit.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        path: Optional[Path],
+        index: InvertedIndex,
+        chunk_ids: List[str],
+        records: Union[RecordFile, List[Dict[str, Any]]],
+        tokens: np.ndarray,
+        token_offsets: np.ndarray,
+        deleted: np.ndarray,
+        deletes_file: Optional[str] = None
+    ):
+        self.name = name
+        self.path = path
+        self.index = index
+        self.terms = index.terms
+        self.chunk_ids = chunk_ids
+        self.records = records
+        self.tokens = tokens
+        self.token_offsets = token_offsets
+        self.deleted = deleted
+        self.deleted_count = int(deleted.sum())
+        self.deletes_file = deletes_file
+        self.deletes_dirty = False
+        # Global term id of every local term id, set by the owning index
+        self.term_map: Optional[np.ndarray] = None
+    
+    @property
+    def doc_count(self) -> int:
+        """Number of documents, including deleted ones."""
+        return len(self.chunk_ids)
+    
+    @property
+    def live_count(self) -> int:
+        """Number of documents that are not deleted."""
+        return self.doc_count - self.deleted_count
+    
+    @classmethod
+    def write(
+        cls,
+        path: Path,
+        name: str,
+        token_ids: np.ndarray,
+        token_offsets: np.ndarray,
+        terms: List[str],
+        records: List[Dict[str, Any]]
+    ) -> "Segment":
+        """Write a new segment and open it.
+        
+        Args:
+            path: Segment directory
+            name: Segment name
+            token_ids: Term ids of all tokens, numbered densely in order of
+                first occurrence (see compact_ids)
+            token_offsets: Start of every document in token_ids, plus the end
+            terms: Term of every id
+            records: Chunk payload of every document
+        
+        Returns:
+            The opened segment
+        """
+        path.mkdir(parents=True, exist_ok=True)
+        index = InvertedIndex.from_token_ids(token_ids, token_offsets, terms)
+        
+        # Token corpus as term ids with per-document offsets
+        save_array(path / TOKENS_FILENAME, np.asarray(token_ids, dtype=np.int32))
+        save_array(path / TOKEN_OFFSETS_FILENAME, np.asarray(token_offsets, dtype=np.int64))
+        
+        chunk_offsets = write_records(path / CHUNKS_FILENAME, records)
+        save_array(path / CHUNK_OFFSETS_FILENAME, chunk_offsets)
+        
+        ids_path = path / CHUNK_IDS_FILENAME
+        tmp_path = ids_path.with_name(CHUNK_IDS_FILENAME + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(record['chunk_id'])
+                f.write("\n")
+        os.replace(tmp_path, ids_path)
+        
+        # meta.json is written last and marks a complete segment
+        index.save(path)
+        return cls.open(path, name)
+    
+    @classmethod
+    def build(
+        cls,
+        name: str,
+        token_ids: np.ndarray,
+        token_offsets: np.ndarray,
+        terms: List[str],
+        records: List[Dict[str, Any]]
+    ) -> "Segment":
+        """Build a segment in memory, without writing it.
+        
+        Args:
+            name: Segment name it will be written under
+            token_ids: Term ids of all tokens (see write())
+            token_offsets: Start of every document in token_ids, plus the end
+            terms: Term of every id
+            records: Chunk payload of every document
+        
+        Returns:
+            The in-memory segment
+        """
+        index = InvertedIndex.from_token_ids(token_ids, token_offsets, terms)
+        return cls(
+            name, None, index, [record['chunk_id'] for record in records], records,
+            tokens=np.asarray(token_ids, dtype=np.int32),
+            token_offsets=np.asarray(token_offsets, dtype=np.int64),
+            deleted=np.zeros(len(records), dtype=bool)
+        )
+    
+    @classmethod
+    def open(cls, path: Path, name: str, deletes_file: Optional[str] = None) -> Optional["Segment"]:
+        """Open a segment written by write().
+        
+        Args:
+            path: Segment directory
+            name: Segment name
+            deletes_file: Tombstone file of the segment, if any
+        
+        Returns:
+            The segment, or None if no compatible segment exists
+        """
+        index = InvertedIndex.open(path)
+        if index is None:
+            return None
+        
+        with open(path / CHUNK_IDS_FILENAME, 'r', encoding='utf-8') as f:
+            chunk_ids = [line.rstrip("\n") for line in f]
+        records = RecordFile(path / CHUNKS_FILENAME, load_array(path / CHUNK_OFFSETS_FILENAME))
+        
+        deleted = np.zeros(len(chunk_ids), dtype=bool)
+        if deletes_file:
+            packed = load_array(path / deletes_file, mmap_mode=None)
+            deleted = np.unpackbits(packed, count=len(chunk_ids)).astype(bool)
+        
+        return cls(
+            name, path, index, chunk_ids, records,
+            tokens=load_array(path / TOKENS_FILENAME),
+            token_offsets=load_array(path / TOKEN_OFFSETS_FILENAME),
+            deleted=deleted,
+            deletes_file=deletes_file
+        )
+    
+    def doc_term_ids(self, doc: int) -> np.ndarray:
+        """Get the distinct local term ids of a document."""
+        start, end = self.token_offsets[doc], self.token_offsets[doc + 1]
+        return np.unique(self.tokens[start:end])
+    
+    def live_token_ids(self, deleted: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the tokens of the documents not marked in ``deleted``.
+        
+        Args:
+            deleted: Tombstone mask to apply
+        
+        Returns:
+            Tuple of (live documents, their tokens as global term ids,
+            their token counts)
+        """
+        doc_len = np.diff(self.token_offsets)
+        docs = np.flatnonzero(~deleted)
+        token_ids = self.term_map[self.tokens[np.repeat(~deleted, doc_len)]].astype(np.int32)
+        return docs, token_ids, doc_len[docs]
+    
+    def get_record(self, doc: int) -> Dict[str, Any]:
+        """Get the chunk payload of a document."""
+        if self.path is None:
+            return self.records[doc]
+        return self.records.get(doc)
+    
+    def write_deletes(self, commit: int) -> None:
+        """Write the tombstones under a new name for a commit."""
+        if not self.deleted_count:
+            self.deletes_file = None
+        else:
+            self.deletes_file = f"{DELETES_PREFIX}{commit}.npy"
+            save_array(self.path / self.deletes_file, np.packbits(self.deleted))
+        self.deletes_dirty = False
+    
+    def remove(self) -> None:
+        """Delete the segment's files."""
+        if self.path is None:
+            return
+        if self.name != LEGACY_SEGMENT:
+            shutil.rmtree(self.path, ignore_errors=True)
+            return
+        names = [f"{name}.npy" for name in INDEX_ARRAYS + BLOCK_ARRAYS] + [
+            VOCAB_FILENAME, META_FILENAME, CHUNKS_FILENAME, CHUNK_OFFSETS_FILENAME,
+            CHUNK_IDS_FILENAME, TOKENS_FILENAME, TOKEN_OFFSETS_FILENAME
+        ]
+        for name in names:
+            file_path = self.path / name
+            if file_path.exists():
+                file_path.unlink()
+        for file_path in self.path.glob(f"{DELETES_PREFIX}*.npy"):
+            file_path.unlink()
+
+
+class SegmentedIndex:
+    """BM25 (Okapi) over immutable segments with tombstone deletes.
+    
+    Added documents are buffered and written as new segments; deleting a
+    document only sets a tombstone bit. The collection statistics (live
+    document count, total length and per-term document frequencies) are
+    maintained incrementally, so an update costs O(update size) plus one
+    vectorized IDF pass over the vocabulary at the next search. Searches
+    fan out over the segments and score with the global statistics, giving
+    the same scores as one InvertedIndex over the live documents. Small
+    and mostly deleted segments are merged on a background thread.
+    """
+    
+    def __init__(
+        self,
+        persist_dir: Path,
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        epsilon: float = DEFAULT_EPSILON,
+        flush_docs: int = DEFAULT_FLUSH_DOCS,
+        merge_factor: int = DEFAULT_MERGE_FACTOR,
+        max_segments: int = DEFAULT_MAX_SEGMENTS
+    ):
+        """Initialize an empty index.
+        
+        Args:
+            persist_dir: Directory holding the segments
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+            epsilon: Floor for negative IDF values, as a fraction of the mean IDF
+            flush_docs: Buffered documents that trigger writing a segment
+            merge_factor: Number of adjacent segments merged at once
+            max_segments: Segment count above which segments are merged
+        """
+        self.persist_dir = Path(persist_dir)
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.flush_docs = max(1, flush_docs)
+        self.merge_factor = max(2, merge_factor)
+        self.max_segments = max(1, max_segments)
+        # Bumped on every change of the live documents
+        self.version = 0
+        self._lock = threading.RLock()
+        self._merge_thread: Optional[threading.Thread] = None
+        self._next_segment = 1
+        self._commit = 0
+        self._obsolete: List[Segment] = []
+        self._reset()
+    
+    def _reset(self) -> None:
+        """Drop all segments and statistics (caller holds the lock)."""
+        self.segments: List[Segment] = []
+        self._locations: Dict[str, Tuple[Segment, int]] = {}
+        # Global term ids shared by all segments
+        self.vocab = Vocabulary()
+        self._df = np.zeros(0, dtype=np.int64)
+        self._doc_count = 0
+        self._total_len = 0
+        self._idf: Optional[np.ndarray] = None
+        # Buffered documents as one flat buffer of global term ids
+        self._pending_ids = array('i')
+        self._pending_lengths: List[int] = []
+        self._pending_records: List[Dict[str, Any]] = []
+        self._dirty = False
+        # Identifies the segment list a background merge started from
+        self._epoch = getattr(self, "_epoch", 0) + 1
+    
+    def _segment_path(self, name: str) -> Path:
+        return self.persist_dir if name == LEGACY_SEGMENT else self.persist_dir / name
+    
+    def _new_segment_name(self) -> str:
+        name = f"{SEGMENT_PREFIX}{self._next_segment:06d}"
+        self._next_segment += 1
+        return name
+    
+    def load(self) -> bool:
+        """Open the committed segments.
+        
+        Returns:
+            True if an index was found, False otherwise
+        """
+        self.wait_for_merges()
+        manifest_path = self.persist_dir / SEGMENTS_FILENAME
+        with self._lock:
+            self._reset()
+            if manifest_path.exists():
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("format") != SEGMENTS_FORMAT or data.get("version") != SEGMENTS_VERSION:
+                    return False
+                self.k1, self.b, self.epsilon = data["k1"], data["b"], data["epsilon"]
+                self._commit = data["commit"]
+                self._next_segment = data["next_segment"]
+                entries = data["segments"]
+            elif (self.persist_dir / META_FILENAME).exists():
+                entries = [{"name": LEGACY_SEGMENT, "deletes": None}]
+            else:
+                return False
+            
+            for entry in entries:
+                segment = Segment.open(
+                    self._segment_path(entry["name"]), entry["name"], entry.get("deletes")
+                )
+                if segment is None:
+                    self._reset()
+                    return False
+                self._attach(segment)
+            self.version += 1
+            return True
+    
+    def _grow_df(self) -> None:
+        """Make room for the document frequencies of new terms (caller holds the lock)."""
+        if len(self.vocab) > len(self._df):
+            df = np.zeros(max(len(self.vocab), 2 * len(self._df)), dtype=np.int64)
+            df[:len(self._df)] = self._df
+            self._df = df
+    
+    def _attach(self, segment: Segment, term_map: Optional[np.ndarray] = None) -> None:
+        """Add a segment and its live documents to the statistics (caller holds the lock).
+        
+        Args:
+            segment: Segment to add
+            term_map: Global term ids of the segment's terms; looked up by
+                term when not given
+        """
+        if term_map is None:
+            term_map = np.array(self.vocab.intern(segment.terms), dtype=np.int64)
+        segment.term_map = term_map
+        self._grow_df()
+        
+        df = np.diff(segment.index.offsets)
+        for doc in np.flatnonzero(segment.deleted).tolist():
+            df[segment.doc_term_ids(doc)] -= 1
+        self._df[term_map] += df
+        
+        live = ~segment.deleted
+        self._doc_count += segment.live_count
+        self._total_len += int(segment.index.doc_len[live].sum())
+        for doc in np.flatnonzero(live).tolist():
+            self._locations[segment.chunk_ids[doc]] = (segment, doc)
+        self.segments.append(segment)
+        self._idf = None
+    
+    def _tombstone(self, segment: Segment, doc: int) -> None:
+        """Delete a document of a segment (caller holds the lock)."""
+        segment.deleted[doc] = True
+        segment.deleted_count += 1
+        segment.deletes_dirty = True
+        self._df[segment.term_map[segment.doc_term_ids(doc)]] -= 1
+        self._doc_count -= 1
+        self._total_len -= int(segment.index.doc_len[doc])
+        self._idf = None
+    
+    def add(self, tokens: List[str], record: Dict[str, Any], flush: bool = True) -> None:
+        """Buffer a document; an existing document with the same chunk ID is replaced.
+        
+        Args:
+            tokens: Document tokens
+            record: Chunk payload, with a 'chunk_id' key
+            flush: Write a segment once flush_docs documents are buffered
+        """
+        with self._lock:
+            location = self._locations.pop(record['chunk_id'], None)
+            if location is not None:
+                self._tombstone(*location)
+            token_ids = self.vocab.intern(tokens)
+            self._pending_ids.extend(token_ids)
+            self._pending_lengths.append(len(token_ids))
+            self._pending_records.append(record)
+            self._dirty = True
+            self.version += 1
+            full = len(self._pending_records) >= self.flush_docs
+        if full and flush:
+            self.flush()
+    
+    def flush(self, in_memory: bool = False) -> None:
+        """Write the buffered documents as a new segment.
+        
+        Args:
+            in_memory: Keep the segment in memory until the next commit()
+                instead of writing it now, so opening an index never writes
+        """
+        with self._lock:
+            if not self._pending_records:
+                return
+            # Later copies of a chunk ID win, like a sequence of adds
+            latest = {record['chunk_id']: i for i, record in enumerate(self._pending_records)}
+            keep = sorted(latest.values())
+            token_ids, token_offsets = self._take_pending(keep)
+            records = [self._pending_records[i] for i in keep]
+            self._pending_ids = array('i')
+            self._pending_lengths = []
+            self._pending_records = []
+            
+            local_ids, term_map = compact_ids(token_ids)
+            terms = [self.vocab.terms[term_id] for term_id in term_map.tolist()]
+            name = self._new_segment_name()
+            if in_memory:
+                segment = Segment.build(name, local_ids, token_offsets, terms, records)
+            else:
+                segment = Segment.write(
+                    self._segment_path(name), name, local_ids, token_offsets, terms, records
+                )
+            self._attach(segment, term_map.astype(np.int64))
+        if not in_memory:
+            self._maybe_merge()
+    
+    def _take_pending(self, keep: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the tokens of some buffered documents (caller holds the lock).
+        
+        Args:
+            keep: Positions of the documents in the buffer, ascending
+        
+        Returns:
+            Tuple of (global term ids of their tokens, document offsets)
+        """
+        token_ids = np.array(self._pending_ids, dtype=np.int32)
+        lengths = np.array(self._pending_lengths, dtype=np.int64)
+        if len(keep) < len(lengths):
+            selected = np.zeros(len(lengths), dtype=bool)
+            selected[keep] = True
+            token_ids = token_ids[np.repeat(selected, lengths)]
+            lengths = lengths[selected]
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return token_ids, offsets
+    
+    def delete(self, chunk_ids: List[str]) -> int:
+        """Delete documents by chunk ID.
+        
+        Args:
+            chunk_ids: IDs of the chunks to delete
+        
+        Returns:
+            Number of documents deleted
+        """
+        to_delete = set(chunk_ids)
+        if not to_delete:
+            return 0
+        
+        removed = 0
+        with self._lock:
+            if self._pending_records:
+                keep = [
+                    i for i, record in enumerate(self._pending_records)
+                    if record['chunk_id'] not in to_delete
+                ]
+                removed_pending = {
+                    record['chunk_id'] for record in self._pending_records
+                    if record['chunk_id'] in to_delete
+                }
+                token_ids, offsets = self._take_pending(keep)
+                self._pending_ids = array('i', token_ids.tolist())
+                self._pending_lengths = np.diff(offsets).tolist()
+                self._pending_records = [self._pending_records[i] for i in keep]
+                removed += len(removed_pending)
+                to_delete -= removed_pending
+            
+            for chunk_id in to_delete:
+                location = self._locations.pop(chunk_id, None)
+                if location is not None:
+                    self._tombstone(*location)
+                    removed += 1
+            
+            if removed:
+                self._dirty = True
+                self.version += 1
+        return removed
+    
+    def clear(self) -> None:
+        """Delete all documents; the segment files are removed on commit."""
+        self.wait_for_merges()
+        with self._lock:
+            self._obsolete.extend(self.segments)
+            self._reset()
+            self._dirty = True
+            self.version += 1
+    
+    def get_count(self) -> int:
+        """Get number of live documents."""
+        with self._lock:
+            return self._doc_count + len(self._pending_records)
+    
+    def get_chunk_ids(self) -> List[str]:
+        """Get the chunk IDs of all live documents, in index order."""
+        self.flush()
+        return [segment.chunk_ids[doc] for segment, doc in self.iter_live()]
+    
+    def get(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """Get the chunk payload of a live document."""
+        with self._lock:
+            location = self._locations.get(chunk_id)
+            if location is None:
+                for record in reversed(self._pending_records):
+                    if record['chunk_id'] == chunk_id:
+                        return record
+                return None
+        segment, doc = location
+        return segment.get_record(doc)
+    
+    def iter_live(self) -> Iterator[Tuple[Segment, int]]:
+        """Iterate over the (segment, document) pairs of all live documents, in index order."""
+        self.flush()
+        with self._lock:
+            segments = [(segment, segment.deleted.copy()) for segment in self.segments]
+        for segment, deleted in segments:
+            for doc in np.flatnonzero(~deleted).tolist():
+                yield segment, doc
+    
+    def live_token_ids(self) -> Tuple[List[Tuple[Segment, int]], np.ndarray, np.ndarray]:
+        """Get all live documents with their tokens, in index order.
+        
+        Returns:
+            Tuple of ((segment, document) pairs, their tokens as one flat
+            buffer of global term ids, document offsets into it)
+        """
+        self.flush()
+        with self._lock:
+            segments = [(segment, segment.deleted.copy()) for segment in self.segments]
+        
+        live = []
+        id_parts = []
+        length_parts = []
+        for segment, deleted in segments:
+            docs, token_ids, lengths = segment.live_token_ids(deleted)
+            live.extend((segment, doc) for doc in docs.tolist())
+            id_parts.append(token_ids)
+            length_parts.append(lengths)
+        
+        offsets = np.zeros(len(live) + 1, dtype=np.int64)
+        if not live:
+            return live, np.zeros(0, dtype=np.int32), offsets
+        np.cumsum(np.concatenate(length_parts), out=offsets[1:])
+        return live, np.concatenate(id_parts), offsets
+    
+    def _global_idf(self) -> np.ndarray:
+        """IDF of every global term id over the live documents (caller holds the lock)."""
+        if self._idf is None:
+            self._grow_df()
+            n_terms = len(self.vocab)
+            df = self._df[:n_terms]
+            idf = np.zeros(n_terms, dtype=np.float64)
+            present = df > 0
+            idf[present] = compute_idf(df[present], self._doc_count, self.epsilon)
+            self._idf = idf
+        return self._idf
+    
+    def top_k(
+        self,
+        query_tokens: List[str],
+        k: int,
+        prune: bool = True,
+        stats: Optional[PruningStats] = None
+    ) -> List[Tuple[Segment, int, float]]:
+        """Get the k highest scoring live documents for a query.
+        
+        Segments are searched in order with one shared top-k collector,
+        so the threshold reached in one segment prunes the next ones (see
+        InvertedIndex.search). Ties are broken by index order, like a
+        stable sort over the scores of one index holding the live
+        documents in order.
+        
+        Args:
+            query_tokens: Tokenized query
+            k: Number of results
+            prune: Use dynamic pruning (False scores every posting)
+            stats: Pruning counters to update
+        
+        Returns:
+            List of (segment, document, score) tuples, best first
+        """
+        self.flush()
+        with self._lock:
+            if not self._doc_count:
+                return []
+            segments = [
+                (segment, segment.term_map, segment.deleted.copy())
+                for segment in self.segments
+            ]
+            idf = self._global_idf()
+            avgdl = self._total_len / self._doc_count
+        
+        collector = TopKCollector(k)
+        bases = []
+        base = 0
+        for segment, gids, deleted in segments:
+            segment.index.search(
+                query_tokens, collector,
+                idf=idf, term_map=gids, avgdl=avgdl, deleted=deleted,
+                base=base, prune=prune, stats=stats
+            )
+            bases.append(base)
+            base += segment.doc_count
+        
+        results = []
+        for position, score in collector.results():
+            s = int(np.searchsorted(bases, position, side='right')) - 1
+            results.append((segments[s][0], position - bases[s], score))
+        return results
+    
+    def _plan_merge(self) -> Optional[Tuple[int, int]]:
+        """Pick an adjacent run of segments to merge (caller holds the lock)."""
+        segments = self.segments
+        for i, segment in enumerate(segments):
+            if segment.doc_count and segment.deleted_count / segment.doc_count > MAX_DELETED_RATIO:
+                return i, i + 1
+        
+        if len(segments) <= self.max_segments:
+            return None
+        
+        width = min(self.merge_factor, len(segments))
+        start = min(
+            range(len(segments) - width + 1),
+            key=lambda i: sum(segment.live_count for segment in segments[i:i + width])
+        )
+        return start, start + width
+    
+    def _maybe_merge(self) -> None:
+        """Start a background merge if the merge policy asks for one."""
+        with self._lock:
+            if self._merge_thread is not None:
+                return
+            run = self._plan_merge()
+            if run is None:
+                return
+            sources = self.segments[run[0]:run[1]]
+            snapshots = [segment.deleted.copy() for segment in sources]
+            name = self._new_segment_name()
+            self._merge_thread = threading.Thread(
+                target=self._merge,
+                args=(sources, snapshots, name, self._epoch),
+                name="factstack-bm25-merge",
+                daemon=True
+            )
+            self._merge_thread.start()
+    
+    def _merge(
+        self,
+        sources: List[Segment],
+        snapshots: List[np.ndarray],
+        name: str,
+        epoch: int
+    ) -> None:
+        """Merge the live documents of adjacent segments into one segment."""
+        merged = None
+        term_map = None
+        origins: List[Tuple[int, int]] = []
+        try:
+            id_parts = []
+            length_parts = []
+            records = []
+            for s, (segment, deleted) in enumerate(zip(sources, snapshots)):
+                docs, token_ids, lengths = segment.live_token_ids(deleted)
+                id_parts.append(token_ids)
+                length_parts.append(lengths)
+                for doc in docs.tolist():
+                    records.append(segment.get_record(doc))
+                    origins.append((s, doc))
+            if records:
+                offsets = np.zeros(len(records) + 1, dtype=np.int64)
+                np.cumsum(np.concatenate(length_parts), out=offsets[1:])
+                local_ids, term_map = compact_ids(np.concatenate(id_parts))
+                terms = [self.vocab.terms[term_id] for term_id in term_map.tolist()]
+                merged = Segment.write(
+                    self._segment_path(name), name, local_ids, offsets, terms, records
+                )
+        except Exception as e:
+            logging.warning(f"BM25 segment merge failed: {e}")
+            shutil.rmtree(self._segment_path(name), ignore_errors=True)
+            with self._lock:
+                self._merge_thread = None
+            return
+        
+        with self._lock:
+            self._merge_thread = None
+            start = next((i for i, segment in enumerate(self.segments) if segment is sources[0]), None)
+            if (
+                epoch != self._epoch or start is None
+                or any(a is not b for a, b in zip(self.segments[start:start + len(sources)], sources))
+            ):
+                # The index was cleared or reloaded meanwhile
+                shutil.rmtree(self._segment_path(name), ignore_errors=True)
+                return
+            
+            replacement = []
+            if merged is not None:
+                merged.term_map = term_map.astype(np.int64)
+                for doc, (s, source_doc) in enumerate(origins):
+                    if sources[s].deleted[source_doc]:
+                        # Deleted while the merge was running
+                        merged.deleted[doc] = True
+                        merged.deleted_count += 1
+                        merged.deletes_dirty = True
+                    else:
+                        self._locations[merged.chunk_ids[doc]] = (merged, doc)
+                replacement = [merged]
+            self.segments[start:start + len(sources)] = replacement
+            self._obsolete.extend(sources)
+            self._dirty = True
+        
+        # Merging may have made room for, or created, the next merge
+        self._maybe_merge()
+    
+    def wait_for_merges(self) -> None:
+        """Block until no background merge is running."""
+        while True:
+            with self._lock:
+                thread = self._merge_thread
+            if thread is None:
+                return
+            thread.join()
+    
+    def commit(self) -> None:
+        """Persist the index.
+        
+        New segments are already on disk; this writes changed tombstones
+        under new names and then atomically replaces the segment list, so
+        a reader opening the index always sees one consistent commit.
+        Files no longer referenced are removed afterwards.
+        """
+        self.flush()
+        self.wait_for_merges()
+        manifest_path = self.persist_dir / SEGMENTS_FILENAME
+        with self._lock:
+            if not self._dirty and manifest_path.exists():
+                return
+            
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+            self._commit += 1
+            entries = []
+            for i, segment in enumerate(self.segments):
+                if segment.path is None:
+                    segment = self.segments[i] = self._write_segment(segment)
+                if segment.deletes_dirty:
+                    segment.write_deletes(self._commit)
+                entries.append({
+                    "name": segment.name,
+                    "docs": segment.doc_count,
+                    "deleted": segment.deleted_count,
+                    "deletes": segment.deletes_file,
+                })
+            data = {
+                "format": SEGMENTS_FORMAT,
+                "version": SEGMENTS_VERSION,
+                "commit": self._commit,
+                "next_segment": self._next_segment,
+                "k1": self.k1,
+                "b": self.b,
+                "epsilon": self.epsilon,
+                "segments": entries,
+            }
+            tmp_path = manifest_path.with_name(SEGMENTS_FILENAME + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, manifest_path)
+            
+            live = {segment.name: segment for segment in self.segments}
+            for segment in self._obsolete:
+                if segment.name not in live:
+                    segment.remove()
+            self._obsolete = []
+            self._remove_unreferenced(live)
+            self._dirty = False
+        
+        self._maybe_merge()
+    
+    def _write_segment(self, segment: Segment) -> Segment:
+        """Write an in-memory segment and swap it in for its documents (caller holds the lock)."""
+        written = Segment.write(
+            self._segment_path(segment.name), segment.name,
+            segment.tokens, segment.token_offsets, segment.terms, segment.records
+        )
+        written.term_map = segment.term_map
+        written.deleted = segment.deleted
+        written.deleted_count = segment.deleted_count
+        written.deletes_dirty = segment.deleted_count > 0
+        for doc in np.flatnonzero(~written.deleted).tolist():
+            self._locations[written.chunk_ids[doc]] = (written, doc)
+        return written
+    
+    def _remove_unreferenced(self, live: Dict[str, Segment]) -> None:
+        """Remove leftover segment directories and old tombstone files (caller holds the lock)."""
+        for child in self.persist_dir.glob(f"{SEGMENT_PREFIX}*"):
+            if child.is_dir() and child.name not in live:
+                shutil.rmtree(child, ignore_errors=True)
+        for segment in live.values():
+            for file_path in segment.path.glob(f"{DELETES_PREFIX}*.npy"):
+                if file_path.name != segment.deletes_file:
+                    file_path.unlink()
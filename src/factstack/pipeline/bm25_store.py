@@ -1,28 +1,54 @@
 """BM25 keyword search store for FactStack."""
 
 import json
+import logging
 import pickle
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Tuple
 import re
 
+import numpy as np
+
 from factstack.pipeline.chunking import Chunk
+from factstack.pipeline.bm25_segments import SegmentedIndex, Segment
 from factstack.llm.schemas import ChunkInfo
 
 
+# Available scoring backends
+BM25_BACKENDS = ("native", "rank_bm25")
+
+# Files of the legacy JSON + pickle layout
+LEGACY_CHUNKS_FILENAME = "bm25_chunks.json"
+LEGACY_CORPUS_FILENAME = "bm25_corpus.pkl"
+
+
 class BM25Store:
-    """BM25 keyword-based search store."""
+    """BM25 keyword-based search store.
+    
+    Chunks are kept in a SegmentedIndex: adding chunks writes new segments
+    and deleting them sets tombstones, so updates never rewrite the
+    existing index files.
+    """
     
-    def __init__(self, persist_dir: Path):
+    def __init__(self, persist_dir: Path, backend: str = "native"):
         """Initialize BM25 store.
         
         Args:
             persist_dir: Directory to persist the index
+            backend: Scoring backend, "native" (inverted index) or "rank_bm25"
         """
+        if backend not in BM25_BACKENDS:
+            raise ValueError(f"Unknown BM25 backend: {backend}")
         self.persist_dir = Path(persist_dir)
+        self.backend = backend
+        self._index = SegmentedIndex(self.persist_dir)
+        # rank_bm25 model over the live documents, rebuilt when they change.
+        # Documents are fed to it as interned term ids, not strings.
         self._bm25 = None
-        self._chunks_data: List[Dict] = []
-        self._tokenized_corpus: List[List[str]] = []
+        self._live: List[Tuple[Segment, int]] = []
+        self._token_ids = np.zeros(0, dtype=np.int32)
+        self._token_offsets = np.zeros(1, dtype=np.int64)
+        self._bm25_version = -1
     
     def _tokenize(self, text: str) -> List[str]:
         """Simple tokenization."""
@@ -31,47 +57,82 @@ class BM25Store:
         tokens = re.findall(r'\b\w+\b', text)
         return tokens
     
-    def add_chunks(self, chunks: List[Chunk]) -> int:
+    def add_chunks(self, chunks: List[Chunk], flush: bool = True) -> int:
         """Add chunks to the BM25 index.
         
         Args:
             chunks: List of Chunk objects
+            flush: Write the chunks as a segment now. Pass False when adding
+                many batches; buffered chunks are then written once enough
+                accumulated, or on the next search or save
         
         Returns:
             Number of chunks added
         """
         for chunk in chunks:
-            tokens = self._tokenize(chunk.text)
-            self._tokenized_corpus.append(tokens)
-            self._chunks_data.append({
+            self._index.add(self._tokenize(chunk.text), {
                 'chunk_id': chunk.chunk_id,
                 'source_path': chunk.source_path,
                 'title': chunk.title,
-                'text': chunk.text,
-                'chunk_index': chunk.chunk_index
+                'chunk_index': chunk.chunk_index,
+                'metadata': chunk.metadata
             })
         
-        # Rebuild BM25 index
-        self._build_index()
+        if flush:
+            self._index.flush()
         
         return len(chunks)
     
-    def _build_index(self) -> None:
-        """Build or rebuild the BM25 index."""
-        if not self._tokenized_corpus:
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Remove chunks from the BM25 index by ID.
+        
+        Args:
+            chunk_ids: IDs of the chunks to remove
+        
+        Returns:
+            Number of chunks removed
+        """
+        return self._index.delete(chunk_ids)
+    
+    def _build_bm25(self) -> None:
+        """Build the rank_bm25 model over the live documents if they changed."""
+        if self._bm25_version == self._index.version:
+            return
+        
+        self._live, self._token_ids, self._token_offsets = self._index.live_token_ids()
+        self._bm25_version = self._index.version
+        self._bm25 = None
+        if not self._live:
             return
         
+        token_ids, offsets = self._token_ids, self._token_offsets
         try:
             from rank_bm25 import BM25Okapi
-            self._bm25 = BM25Okapi(self._tokenized_corpus)
+            self._bm25 = BM25Okapi(
+                token_ids[offsets[i]:offsets[i + 1]].tolist() for i in range(len(self._live))
+            )
         except ImportError:
             # Fallback to simple TF-IDF-like scoring if rank_bm25 is not available
-            import logging
             logging.warning(
                 "rank_bm25 not available, falling back to simple keyword matching. "
                 "Install rank_bm25 for better search quality: pip install rank-bm25"
             )
-            self._bm25 = None
+    
+    def get_chunks(self, chunk_ids: List[str]) -> Dict[str, Dict]:
+        """Get the stored payloads of chunks by ID.
+        
+        Args:
+            chunk_ids: IDs of the chunks to look up
+        
+        Returns:
+            Mapping from chunk ID to payload for the IDs that were found
+        """
+        found = {}
+        for chunk_id in chunk_ids:
+            chunk_data = self._index.get(chunk_id)
+            if chunk_data is not None:
+                found[chunk_id] = chunk_data
+        return found
     
     def search(self, query: str, top_k: int = 10) -> List[ChunkInfo]:
         """Search for relevant chunks using BM25.
@@ -83,13 +144,17 @@ class BM25Store:
         Returns:
             List of ChunkInfo with BM25 scores
         """
-        if not self._chunks_data:
+        if not self._index.get_count():
             return []
         
         query_tokens = self._tokenize(query)
         
+        if self.backend == "native":
+            return self._search_index(query_tokens, top_k)
+        
+        self._build_bm25()
         if self._bm25 is not None:
-            scores = self._bm25.get_scores(query_tokens)
+            scores = self._bm25.get_scores(self._index.vocab.lookup(query_tokens))
             # Convert numpy array to list if needed
             if hasattr(scores, 'tolist'):
                 scores = scores.tolist()
@@ -112,76 +177,133 @@ class BM25Store:
         results = []
         for idx, score in scored_indices:
             if score > 0:
-                chunk_data = self._chunks_data[idx]
-                results.append(ChunkInfo(
-                    chunk_id=chunk_data['chunk_id'],
-                    source_path=chunk_data['source_path'],
-                    title=chunk_data.get('title'),
-                    text=chunk_data['text'],
-                    bm25_score=score / max_score,  # Normalize to 0-1
-                    final_score=score / max_score
-                ))
+                segment, doc = self._live[idx]
+                results.append(self._to_chunk_info(segment.get_record(doc), score / max_score))
+        
+        return results
+    
+    def _search_index(self, query_tokens: List[str], top_k: int) -> List[ChunkInfo]:
+        """Search the native segmented index.
+        
+        Only documents containing a query term are scored. Scores are
+        normalized by the best score, exactly like the full-scan path.
+        """
+        top = self._index.top_k(query_tokens, top_k)
+        if not top:
+            return []
+        
+        max_score = top[0][2]
+        if max_score == 0:
+            max_score = 1.0
+        
+        results = []
+        for segment, doc, score in top:
+            if score > 0:
+                results.append(self._to_chunk_info(segment.get_record(doc), score / max_score))
         
         return results
     
+    def _to_chunk_info(self, chunk_data: Dict, score: float) -> ChunkInfo:
+        """Build a search result from a chunk payload and its normalized score."""
+        return ChunkInfo(
+            chunk_id=chunk_data['chunk_id'],
+            source_path=chunk_data['source_path'],
+            title=chunk_data.get('title'),
+            # Databases written before the document store kept text here
+            text=chunk_data.get('text', ''),
+            bm25_score=score,  # Normalized to 0-1
+            final_score=score,
+            metadata=chunk_data.get('metadata') or {}
+        )
+    
     def _simple_keyword_scores(self, query_tokens: List[str]) -> List[float]:
         """Simple keyword matching as fallback."""
-        scores = []
         query_set = set(query_tokens)
+        query_ids = [term_id for term_id in self._index.vocab.lookup(query_set) if term_id >= 0]
         
-        for tokens in self._tokenized_corpus:
-            token_set = set(tokens)
-            overlap = len(query_set & token_set)
-            # Simple TF-like score
-            score = overlap / max(len(query_set), 1)
-            scores.append(score)
+        # Distinct query terms per document
+        n_docs = len(self._live)
+        token_docs = np.repeat(np.arange(n_docs), np.diff(self._token_offsets))
+        hits = np.isin(self._token_ids, query_ids)
+        pairs = np.unique(token_docs[hits] * (len(self._index.vocab) + 1) + self._token_ids[hits])
+        overlap = np.bincount(pairs // (len(self._index.vocab) + 1), minlength=n_docs)
         
-        return scores
+        # Simple TF-like score
+        return (overlap / max(len(query_set), 1)).tolist()
     
     def save(self) -> None:
-        """Persist the index to disk."""
-        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        """Persist the index to disk.
         
-        # Save chunks data as JSON
-        chunks_path = self.persist_dir / "bm25_chunks.json"
-        with open(chunks_path, 'w', encoding='utf-8') as f:
-            json.dump(self._chunks_data, f, ensure_ascii=False, indent=2)
+        Buffered chunks are written as a new segment and the segment list
+        is committed atomically; see SegmentedIndex.commit().
+        """
+        self._index.commit()
         
-        # Save tokenized corpus
-        corpus_path = self.persist_dir / "bm25_corpus.pkl"
-        with open(corpus_path, 'wb') as f:
-            pickle.dump(self._tokenized_corpus, f)
+        # Drop the legacy JSON + pickle files once converted
+        for name in (LEGACY_CHUNKS_FILENAME, LEGACY_CORPUS_FILENAME):
+            legacy_path = self.persist_dir / name
+            if legacy_path.exists():
+                legacy_path.unlink()
+    
+    def close(self) -> None:
+        """Finish background segment merges and persist their result."""
+        self._index.wait_for_merges()
+        self.save()
     
     def load(self) -> bool:
         """Load the index from disk.
         
+        Segments are memory-mapped, so opening is cheap and pages are only
+        read when queries touch them. Indexes written before segments
+        existed open as a single segment, and indexes in the legacy
+        JSON + pickle layout are still read (into memory).
+        
         Returns:
             True if loaded successfully, False otherwise
         """
-        chunks_path = self.persist_dir / "bm25_chunks.json"
-        corpus_path = self.persist_dir / "bm25_corpus.pkl"
+        try:
+            self._bm25_version = -1
+            if self._index.load():
+                if self.backend != "native":
+                    self._build_bm25()
+                return True
+            return self._load_legacy()
+        except Exception:
+            return False
+    
+    def _load_legacy(self) -> bool:
+        """Load an index saved as JSON chunks plus a pickled corpus."""
+        chunks_path = self.persist_dir / LEGACY_CHUNKS_FILENAME
+        corpus_path = self.persist_dir / LEGACY_CORPUS_FILENAME
         
         if not chunks_path.exists() or not corpus_path.exists():
             return False
         
-        try:
-            with open(chunks_path, 'r', encoding='utf-8') as f:
-                self._chunks_data = json.load(f)
-            
-            with open(corpus_path, 'rb') as f:
-                self._tokenized_corpus = pickle.load(f)
-            
-            self._build_index()
-            return True
-        except Exception:
-            return False
+        with open(chunks_path, 'r', encoding='utf-8') as f:
+            chunks_data = json.load(f)
+        
+        with open(corpus_path, 'rb') as f:
+            tokenized_corpus = pickle.load(f)
+        
+        # Kept in memory, so opening writes nothing; rewritten as segments on the next save()
+        for chunk_data, tokens in zip(chunks_data, tokenized_corpus):
+            self._index.add(tokens, chunk_data, flush=False)
+        self._index.flush(in_memory=True)
+        return True
     
     def get_count(self) -> int:
         """Get number of chunks in the store."""
-        return len(self._chunks_data)
+        return self._index.get_count()
+    
+    def get_all_chunk_ids(self) -> List[str]:
+        """Get all chunk IDs in the store."""
+        return self._index.get_chunk_ids()
     
     def clear(self) -> None:
         """Clear all data."""
-        self._chunks_data = []
-        self._tokenized_corpus = []
+        self._index.clear()
         self._bm25 = None
+        self._live = []
+        self._token_ids = np.zeros(0, dtype=np.int32)
+        self._token_offsets = np.zeros(1, dtype=np.int64)
+        self._bm25_version = -1
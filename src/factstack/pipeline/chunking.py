@@ -1,11 +1,113 @@
 """Document chunking for FactStack."""
 
+import hashlib
+import os
 import re
+from bisect import bisect_left
+from collections import deque
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
-from factstack.utils.text import generate_chunk_id, extract_title_from_markdown
+from factstack.utils.text import (
+    generate_chunk_id, generate_content_chunk_id, extract_title_from_markdown
+)
+from factstack.utils.tokens import get_encoding, loaded_encoding
+
+
+# File extensions picked up when chunking a directory
+DOCUMENT_EXTENSIONS = {'.md', '.txt', '.markdown'}
+
+# Files per task when chunking in worker processes
+FILES_PER_TASK = 16
+
+# Characters decoded at a time when read_span() skips to a span
+READ_SPAN_CHUNK = 1 << 16
+
+# Available chunking engines
+CHUNKERS = ("text", "spans", "tokens")
+
+# Chunk ID schemes: path + position, or path + content (stable across edits)
+CHUNK_ID_SCHEMES = ("position", "content")
+
+# Paragraph and sentence boundaries used by the span chunker
+_PARAGRAPH_BREAK = re.compile(r'\n\r?\n(?:\r?\n)*|^(?=#{1,6}\s)', re.MULTILINE)
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+
+def find_documents(dir_path: Path) -> List[Path]:
+    """Find all markdown and text files under a directory.
+    
+    Args:
+        dir_path: Path to the directory
+    
+    Returns:
+        Sorted list of document paths
+    """
+    return sorted(
+        file_path for file_path in Path(dir_path).rglob('*')
+        if file_path.suffix.lower() in DOCUMENT_EXTENSIONS and file_path.is_file()
+    )
+
+
+@dataclass
+class SourceStat:
+    """Size, mtime and SHA-256 of the bytes a document was chunked from."""
+    size: int
+    mtime: float
+    sha256: str
+
+
+def read_source(file_path: Path, translate_newlines: bool = True) -> Tuple[str, SourceStat]:
+    """Read a document once, describing the bytes that were read.
+    
+    The stat is taken from the open file before reading, so a later edit
+    always shows up as a newer mtime or a different hash.
+    
+    Args:
+        file_path: Path to the file
+        translate_newlines: Turn CRLF and CR line endings into LF, like text mode
+    
+    Returns:
+        Tuple of (decoded content, stat of the bytes read)
+    """
+    with open(file_path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        data = f.read()
+    text = data.decode('utf-8')
+    if translate_newlines:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text, SourceStat(
+        size=len(data),
+        mtime=stat.st_mtime,
+        sha256=hashlib.sha256(data).hexdigest()
+    )
+
+
+def read_span(source_path: str, start: int, end: int) -> str:
+    """Re-read the text of a chunk span from its source document.
+    
+    Offsets count characters, so the file is decoded up to the span end;
+    the rest of the file is not read.
+    
+    Args:
+        source_path: Path of the source document
+        start: Span start (character offset)
+        end: Span end (character offset)
+    
+    Returns:
+        Text of the span
+    """
+    with open(source_path, 'r', encoding='utf-8', newline='') as f:
+        while start > 0:
+            skipped = len(f.read(min(start, READ_SPAN_CHUNK)))
+            if not skipped:
+                return ""
+            start -= skipped
+            end -= skipped
+        return f.read(max(0, end))
 
 
 @dataclass
@@ -26,15 +128,33 @@ class Chunk:
 class DocumentChunker:
     """Chunks documents into smaller pieces for indexing."""
     
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+    # Files are read like text mode does, with newlines translated
+    translate_newlines = True
+    # Chunks measured in tokens load the tokenizer for their token counts;
+    # others only count with an encoding that is already loaded
+    measures_tokens = False
+    
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        token_model: Optional[str] = None,
+        id_scheme: str = "position"
+    ):
         """Initialize chunker.
         
         Args:
             chunk_size: Maximum characters per chunk
             chunk_overlap: Number of characters to overlap between chunks
+            token_model: Model whose tokenizer counts the tokens of each chunk
+            id_scheme: Chunk ID scheme applied by chunk_file, "position" or "content"
         """
+        if id_scheme not in CHUNK_ID_SCHEMES:
+            raise ValueError(f"Unknown chunk ID scheme: {id_scheme}")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.token_model = token_model
+        self.id_scheme = id_scheme
     
     def chunk_text(self, text: str, source_path: str) -> List[Chunk]:
         """Split text into chunks with overlap.
@@ -178,26 +298,319 @@ class DocumentChunker:
         Returns:
             List of Chunk objects
         """
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        return self.chunk_source(file_path)[0]
+    
+    def chunk_source(self, file_path: Path) -> Tuple[List[Chunk], SourceStat]:
+        """Chunk a single file, describing the bytes it was chunked from.
+        
+        Args:
+            file_path: Path to the file
         
-        return self.chunk_text(content, str(file_path))
+        Returns:
+            Tuple of (list of Chunk objects, stat of the bytes read)
+        """
+        content, source = read_source(file_path, translate_newlines=self.translate_newlines)
+        return self._finalize(self.chunk_text(content, str(file_path))), source
     
-    def chunk_directory(self, dir_path: Path) -> List[Chunk]:
+    def _finalize(self, chunks: List[Chunk]) -> List[Chunk]:
+        """Apply the ID scheme and store the token count of every chunk, when a tokenizer is at hand."""
+        if self.measures_tokens:
+            encoding = get_encoding(self.token_model)
+        else:
+            encoding = loaded_encoding(self.token_model)
+        occurrences = {}
+        for chunk in chunks:
+            if self.id_scheme == "content":
+                key = generate_content_chunk_id(chunk.source_path, chunk.text)
+                occurrences[key] = occurrences.get(key, 0) + 1
+                chunk.chunk_id = generate_content_chunk_id(
+                    chunk.source_path, chunk.text, occurrences[key]
+                )
+            if encoding is not None:
+                chunk.metadata["token_count"] = len(encoding.encode(chunk.text, disallowed_special=()))
+        return chunks
+    
+    def iter_chunk_files(
+        self,
+        file_paths: Sequence[Path],
+        workers: int = 1
+    ) -> Iterator[Tuple[Path, List[Chunk], SourceStat]]:
+        """Chunk files, yielding results in input order.
+        
+        With more than one worker the files are sharded across a process
+        pool. Only a bounded window of shards is in flight at a time, and
+        results are still yielded in the order of ``file_paths``, so chunk
+        IDs and chunk order are identical to the serial path.
+        
+        Args:
+            file_paths: Files to chunk
+            workers: Number of worker processes (1 chunks in-process)
+        
+        Yields:
+            Tuples of (file path, chunks of that file, stat of the bytes read)
+        """
+        if workers <= 1 or len(file_paths) <= FILES_PER_TASK:
+            for file_path in file_paths:
+                yield (file_path, *self.chunk_source(file_path))
+            return
+        
+        shards = [
+            list(file_paths[i:i + FILES_PER_TASK])
+            for i in range(0, len(file_paths), FILES_PER_TASK)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            next_shard = 0
+            while pending or next_shard < len(shards):
+                # Keep every worker busy without queueing the whole corpus
+                while next_shard < len(shards) and len(pending) < workers * 2:
+                    shard = shards[next_shard]
+                    pending.append((shard, executor.submit(_chunk_files, self, shard)))
+                    next_shard += 1
+                shard, future = pending.popleft()
+                for file_path, (chunks, source) in zip(shard, future.result()):
+                    yield file_path, chunks, source
+    
+    def chunk_directory(self, dir_path: Path, workers: int = 1) -> List[Chunk]:
         """Chunk all markdown and text files in a directory.
         
         Args:
             dir_path: Path to the directory
+            workers: Number of worker processes
         
         Returns:
             List of Chunk objects from all files
         """
         chunks = []
-        extensions = {'.md', '.txt', '.markdown'}
         
-        for file_path in dir_path.rglob('*'):
-            if file_path.suffix.lower() in extensions:
-                file_chunks = self.chunk_file(file_path)
-                chunks.extend(file_chunks)
+        for _, file_chunks, _ in self.iter_chunk_files(find_documents(dir_path), workers=workers):
+            chunks.extend(file_chunks)
         
         return chunks
+
+
+class SpanChunker(DocumentChunker):
+    """Chunks documents into contiguous character spans of the source.
+    
+    Boundaries follow the same paragraph and sentence packing as
+    DocumentChunker, but are computed as offsets over the file's text:
+    packing builds no intermediate paragraph or sentence strings, overlap
+    just moves the start offset back, and each chunk's text is a single
+    slice ``text[span_start:span_end]``. The span is kept in the chunk metadata
+    so citations can be re-hydrated from the source with read_span().
+    """
+    
+    # Offsets must be valid for the raw file
+    translate_newlines = False
+    
+    def chunk_text(self, text: str, source_path: str) -> List[Chunk]:
+        """Split text into span chunks with overlap.
+        
+        Args:
+            text: The text to chunk
+            source_path: Path to the source document
+        
+        Returns:
+            List of Chunk objects
+        """
+        title = extract_title_from_markdown(text)
+        ruler = self._ruler(text)
+        spans: List[Tuple[int, int]] = []
+        current: Optional[Tuple[int, int]] = None
+        
+        for para_start, para_end in self._paragraph_spans(text):
+            start = current[0] if current else para_start
+            if ruler.length(start, para_end) < self.chunk_size:
+                current = (start, para_end)
+                continue
+            
+            if current:
+                self._emit(text, current, spans)
+            
+            if ruler.length(para_start, para_end) > self.chunk_size:
+                self._split_long_span(text, ruler, para_start, para_end, spans)
+                current = None
+            elif spans and self.chunk_overlap > 0:
+                # Include overlap from previous chunk
+                prev_start, prev_end = spans[-1]
+                current = (max(prev_start, ruler.rewind(prev_end, self.chunk_overlap)), para_end)
+            else:
+                current = (para_start, para_end)
+        
+        if current:
+            self._emit(text, current, spans)
+        
+        return [
+            Chunk(
+                chunk_id=generate_chunk_id(source_path, index),
+                text=text[start:end],
+                source_path=source_path,
+                title=title,
+                chunk_index=index,
+                metadata={"span_start": start, "span_end": end}
+            )
+            for index, (start, end) in enumerate(spans)
+        ]
+    
+    def _ruler(self, text: str) -> "_CharRuler":
+        """Get the measure of span lengths for a text (characters)."""
+        return _CharRuler()
+    
+    def _paragraph_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield the stripped spans of the paragraphs of a text."""
+        start = 0
+        for match in _PARAGRAPH_BREAK.finditer(text):
+            span = _strip_span(text, start, match.start())
+            if span:
+                yield span
+            start = match.end()
+        span = _strip_span(text, start, len(text))
+        if span:
+            yield span
+    
+    def _split_long_span(
+        self,
+        text: str,
+        ruler: "_CharRuler",
+        para_start: int,
+        para_end: int,
+        spans: List[Tuple[int, int]]
+    ) -> None:
+        """Split a long paragraph span at sentence boundaries."""
+        current: Optional[Tuple[int, int]] = None
+        sentence_start = para_start
+        breaks = _SENTENCE_BREAK.finditer(text, para_start, para_end)
+        
+        for sentence_end, next_start in chain((m.span() for m in breaks), [(para_end, para_end)]):
+            start = current[0] if current else sentence_start
+            if ruler.length(start, sentence_end) < self.chunk_size:
+                current = (start, sentence_end)
+            else:
+                if current:
+                    self._emit(text, current, spans)
+                
+                # If single sentence is too long, force split
+                if ruler.length(sentence_start, sentence_end) > self.chunk_size:
+                    for window in ruler.windows(sentence_start, sentence_end, self.chunk_size):
+                        self._emit(text, window, spans)
+                    current = None
+                else:
+                    current = (sentence_start, sentence_end)
+            sentence_start = next_start
+        
+        if current:
+            self._emit(text, current, spans)
+    
+    def _emit(self, text: str, span: Tuple[int, int], spans: List[Tuple[int, int]]) -> None:
+        """Append a span, stripped of surrounding whitespace, if not empty."""
+        span = _strip_span(text, *span)
+        if span:
+            spans.append(span)
+
+
+class TokenChunker(SpanChunker):
+    """Chunks documents into source spans measured in tokens.
+    
+    Same packing as SpanChunker, but ``chunk_size`` and ``chunk_overlap``
+    are token budgets for the tokenizer of ``token_model``. Each document
+    is encoded once, and span lengths are counted from the token start
+    offsets. Without tiktoken, tokens are estimated as 4 characters each.
+    """
+    
+    measures_tokens = True
+    
+    def _ruler(self, text: str) -> "_CharRuler":
+        """Get the measure of span lengths for a text (tokens)."""
+        encoding = get_encoding(self.token_model)
+        if encoding is None:
+            return _CharRuler(scale=4)
+        _, offsets = encoding.decode_with_offsets(encoding.encode(text, disallowed_special=()))
+        return _TokenRuler(offsets)
+
+
+class _CharRuler:
+    """Measures spans in characters, or in estimated tokens of ``scale`` characters."""
+    
+    def __init__(self, scale: int = 1):
+        self.scale = scale
+    
+    def length(self, start: int, end: int) -> int:
+        return (end - start) // self.scale
+    
+    def rewind(self, pos: int, count: int) -> int:
+        return pos - count * self.scale
+    
+    def windows(self, start: int, end: int, size: int) -> List[Tuple[int, int]]:
+        step = size * self.scale
+        return [(i, min(i + step, end)) for i in range(start, end, step)]
+
+
+class _TokenRuler:
+    """Measures spans in tokens, given the start offset of every token."""
+    
+    def __init__(self, offsets: List[int]):
+        self.offsets = offsets
+    
+    def length(self, start: int, end: int) -> int:
+        return bisect_left(self.offsets, end) - bisect_left(self.offsets, start)
+    
+    def rewind(self, pos: int, count: int) -> int:
+        index = bisect_left(self.offsets, pos)
+        return self.offsets[index - count] if index >= count else 0
+    
+    def windows(self, start: int, end: int, size: int) -> List[Tuple[int, int]]:
+        first = bisect_left(self.offsets, start)
+        last = bisect_left(self.offsets, end)
+        return [
+            (max(start, self.offsets[i]), self.offsets[i + size] if i + size < last else end)
+            for i in range(first, last, size)
+        ]
+
+
+def _strip_span(text: str, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """Shrink a span to exclude leading and trailing whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+def create_chunker(
+    chunk_size: int = 500,
+    chunk_overlap: int = 50,
+    engine: str = "text",
+    token_model: Optional[str] = None,
+    id_scheme: str = "position"
+) -> DocumentChunker:
+    """Create a chunker for the configured engine.
+    
+    Args:
+        chunk_size: Maximum characters (tokens for "tokens") per chunk
+        chunk_overlap: Characters (tokens for "tokens") to overlap between chunks
+        engine: "text" (paragraphs re-joined into new strings), "spans"
+            (contiguous spans of the source) or "tokens" (spans sized in tokens)
+        token_model: Model whose tokenizer counts tokens
+        id_scheme: "position" (path and chunk index) or "content" (path and
+            normalized text, stable when other parts of the file change)
+    
+    Returns:
+        DocumentChunker instance
+    """
+    if engine not in CHUNKERS:
+        raise ValueError(f"Unknown chunker: {engine}")
+    chunker_cls = {"text": DocumentChunker, "spans": SpanChunker, "tokens": TokenChunker}[engine]
+    return chunker_cls(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        token_model=token_model,
+        id_scheme=id_scheme
+    )
+
+
+def _chunk_files(
+    chunker: DocumentChunker,
+    file_paths: List[Path]
+) -> List[Tuple[List[Chunk], SourceStat]]:
+    """Chunk a shard of files in a worker process."""
+    return [chunker.chunk_source(file_path) for file_path in file_paths]
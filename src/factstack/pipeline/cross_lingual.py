@@ -4,11 +4,13 @@ from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 
 from factstack.llm.schemas import ChunkInfo
+from factstack.observability.tracer import Tracer
 from factstack.pipeline.vector_store import VectorStore
 from factstack.pipeline.bm25_store import BM25Store
 from factstack.pipeline.embeddings import EmbeddingGenerator
 from factstack.pipeline.query_language import detect_language, needs_translation
 from factstack.pipeline.query_translate import QueryTranslator
+from factstack.pipeline.retrieval_executor import RetrievalExecutor, RetrievalBranch, BranchResult
 
 
 @dataclass
@@ -134,7 +136,8 @@ def merge_channel_results(
             text=chunk.text,
             vector_score=best_vector,
             bm25_score=best_bm25,
-            final_score=best_vector * vector_weight + best_bm25 * bm25_weight
+            final_score=best_vector * vector_weight + best_bm25 * bm25_weight,
+            metadata=chunk.metadata
         )
         merged_chunks.append(merged_chunk)
     
@@ -151,6 +154,93 @@ def merge_channel_results(
     return merged_chunks, stats
 
 
+def build_retrieval_branches(
+    vector_store: VectorStore,
+    bm25_store: BM25Store,
+    embedding_gen: EmbeddingGenerator,
+    channel_queries: List[Tuple[str, str]],
+    top_k: int = 8
+) -> List[RetrievalBranch]:
+    """Build the retriever branches for a set of query channels.
+    
+    The queries of all channels are embedded in one ``generate()`` call and
+    searched in one batched vector query, so the vector side costs one
+    embeddings round trip and one search however many channels there are.
+    Each channel gets its own BM25 branch, which needs no embedding.
+    
+    Args:
+        vector_store: Vector store instance
+        bm25_store: BM25 store instance
+        embedding_gen: Embedding generator
+        channel_queries: (channel name, query) pairs, e.g. ("original", ...)
+        top_k: Number of results to retrieve per channel and retriever
+    
+    Returns:
+        The batched vector branch followed by one BM25 branch per channel
+    """
+    queries = [query for _, query in channel_queries]
+    
+    def vector_search() -> List[List[ChunkInfo]]:
+        return vector_store.search_many(embedding_gen.generate(queries), top_k=top_k)
+    
+    def bm25_search(query: str) -> List[ChunkInfo]:
+        return bm25_store.search(query, top_k=top_k)
+    
+    branches = [RetrievalBranch(
+        stage="vector_search",
+        channel="+".join(name for name, _ in channel_queries),
+        query=" | ".join(queries),
+        run=vector_search,
+        batched=True
+    )]
+    for channel_name, query in channel_queries:
+        branches.append(RetrievalBranch(
+            stage="bm25_search",
+            channel=channel_name,
+            query=query,
+            run=lambda query=query: bm25_search(query)
+        ))
+    return branches
+
+
+def collect_channel_results(
+    channel_queries: List[Tuple[str, str]],
+    branches: List[RetrievalBranch],
+    outcomes: Dict[str, BranchResult]
+) -> List[ChannelResult]:
+    """Split the outcomes of ``build_retrieval_branches`` back into channels.
+    
+    A failed or timed-out branch contributes no results.
+    
+    Args:
+        channel_queries: (channel name, query) pairs the branches were built from
+        branches: Branches returned by ``build_retrieval_branches``
+        outcomes: Outcomes of running the branches
+    
+    Returns:
+        One ChannelResult per channel, in channel order
+    """
+    vector_outcome = outcomes[branches[0].name]
+    channels = []
+    for i, (channel_name, query) in enumerate(channel_queries):
+        bm25_outcome = outcomes[branches[1 + i].name]
+        vector_results = vector_outcome.results[i] if vector_outcome.ok else []
+        bm25_results = bm25_outcome.results
+        
+        stats = compute_channel_stats(vector_results, bm25_results)
+        stats["vector_ms"] = vector_outcome.latency_ms
+        stats["bm25_ms"] = bm25_outcome.latency_ms
+        stats["failed_branches"] = (not vector_outcome.ok) + (not bm25_outcome.ok)
+        channels.append(ChannelResult(
+            channel_name=channel_name,
+            query_used=query,
+            vector_results=vector_results,
+            bm25_results=bm25_results,
+            stats=stats
+        ))
+    return channels
+
+
 class DualRetriever:
     """Performs dual-channel cross-lingual retrieval."""
     
@@ -161,7 +251,8 @@ class DualRetriever:
         embedding_gen: EmbeddingGenerator,
         translator: Optional[QueryTranslator] = None,
         vector_weight: float = 0.3,
-        bm25_weight: float = 0.7
+        bm25_weight: float = 0.7,
+        executor: Optional[RetrievalExecutor] = None
     ):
         """Initialize dual retriever.
         
@@ -172,6 +263,8 @@ class DualRetriever:
             translator: Query translator (optional)
             vector_weight: Weight for vector scores
             bm25_weight: Weight for BM25 scores
+            executor: Executor running the channel × retriever branches
+                concurrently (a private one is created if not given)
         """
         self.vector_store = vector_store
         self.bm25_store = bm25_store
@@ -179,12 +272,39 @@ class DualRetriever:
         self.translator = translator
         self.vector_weight = vector_weight
         self.bm25_weight = bm25_weight
+        self.executor = executor or RetrievalExecutor()
+    
+    def retrieve_channels(
+        self,
+        channel_queries: List[Tuple[str, str]],
+        top_k: int = 8,
+        tracer: Optional[Tracer] = None
+    ) -> List[ChannelResult]:
+        """Retrieve for several query channels at once.
+        
+        All channel queries share one embeddings call and one vector
+        search, which run concurrently with the per-channel BM25 searches.
+        
+        Args:
+            channel_queries: (channel name, query) pairs
+            top_k: Number of results to retrieve per channel
+            tracer: Tracer receiving one entry per retriever branch
+        
+        Returns:
+            One ChannelResult per channel, in channel order
+        """
+        branches = build_retrieval_branches(
+            self.vector_store, self.bm25_store, self.embedding_gen, channel_queries, top_k
+        )
+        outcomes = self.executor.run(branches, tracer)
+        return collect_channel_results(channel_queries, branches, outcomes)
     
     def retrieve_single_channel(
         self,
         query: str,
         channel_name: str,
-        top_k: int = 8
+        top_k: int = 8,
+        tracer: Optional[Tracer] = None
     ) -> ChannelResult:
         """Perform retrieval for a single channel.
         
@@ -192,40 +312,34 @@ class DualRetriever:
             query: Query string
             channel_name: Name for this channel (e.g., "original", "translated")
             top_k: Number of results to retrieve
+            tracer: Tracer receiving one entry per retriever branch
         
         Returns:
             ChannelResult with vector and BM25 results
         """
-        # Vector search
-        query_embedding = self.embedding_gen.generate_single(query)
-        vector_results = self.vector_store.search(query_embedding, top_k=top_k)
-        
-        # BM25 search
-        bm25_results = self.bm25_store.search(query, top_k=top_k)
-        
-        # Compute stats
-        stats = compute_channel_stats(vector_results, bm25_results)
-        
-        return ChannelResult(
-            channel_name=channel_name,
-            query_used=query,
-            vector_results=vector_results,
-            bm25_results=bm25_results,
-            stats=stats
-        )
+        return self.retrieve_channels([(channel_name, query)], top_k, tracer)[0]
     
     def retrieve(
         self,
         query: str,
         top_k: int = 8,
-        enable_translation: bool = True
+        enable_translation: bool = True,
+        tracer: Optional[Tracer] = None,
+        translated_query: Optional[str] = None
     ) -> DualRetrievalResult:
         """Perform dual-channel retrieval.
         
+        Both channel queries are embedded and vector-searched in one batch,
+        concurrently with their BM25 searches, so retrieval takes as long
+        as the slowest of them.
+        
         Args:
             query: Original query string
             top_k: Number of results to retrieve per channel
             enable_translation: Whether to enable translation for cross-lingual retrieval
+            tracer: Tracer receiving one entry per retriever branch
+            translated_query: Query of the translated channel, when the caller
+                already translated it; the query is then not translated again
         
         Returns:
             DualRetrievalResult with merged results
@@ -234,22 +348,15 @@ class DualRetriever:
         query_lang = detect_language(query)
         
         # Determine if translation is needed
-        translated_query = None
-        if enable_translation and needs_translation(query) and self.translator:
+        if translated_query is None and enable_translation and needs_translation(query) and self.translator:
             translated_query = self.translator.translate_for_retrieval(query, query_lang)
         
-        channels = []
-        
-        # Channel A: Original query
-        original_channel = self.retrieve_single_channel(query, "original", top_k)
-        channels.append(original_channel)
-        
-        # Channel B: Translated query (if available)
+        # Channel A: Original query; channel B: translated query (if available)
+        channel_queries = [("original", query)]
         if translated_query and translated_query != query:
-            translated_channel = self.retrieve_single_channel(
-                translated_query, "translated", top_k
-            )
-            channels.append(translated_channel)
+            channel_queries.append(("translated", translated_query))
+        
+        channels = self.retrieve_channels(channel_queries, top_k, tracer)
         
         # Merge results
         merged_chunks, merge_stats = merge_channel_results(
@@ -0,0 +1,295 @@
+"""Near-duplicate chunk elimination for FactStack."""
+
+import json
+import re
+import zlib
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from factstack.pipeline.chunking import Chunk
+from factstack.utils.records import ArrayWriter, RecordFile, RecordWriter, load_array
+
+
+# MinHash signature layout: BANDS bands of NUM_PERM // BANDS rows each.
+# With 16 bands of 8 rows, pairs become LSH candidates with a probability
+# of ~50% at Jaccard 0.7 and ~95% at 0.85.
+NUM_PERM = 128
+BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+
+# Character shingle length; characters (not words) so CJK text works too
+SHINGLE_SIZE = 5
+
+# Files of the persisted signatures of canonical chunks
+SIGNATURES_FILENAME = "signatures.npy"
+SIGNATURE_KEYS_FILENAME = "chunks.jsonl"
+
+# Permutations are a * x + b mod a Mersenne prime, small enough that the
+# products of 31-bit values fit in uint64
+_PRIME = (1 << 31) - 1
+_SEED = 1
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Hash the character shingles of a whitespace-normalized text.
+    
+    Args:
+        text: Text to shingle
+        size: Shingle length in characters
+    
+    Returns:
+        Array of distinct shingle hashes
+    """
+    normalized = _WHITESPACE.sub(' ', text.lower()).strip()
+    if not normalized:
+        return np.empty(0, dtype=np.uint64)
+    grams = {normalized[i:i + size] for i in range(max(1, len(normalized) - size + 1))}
+    return np.fromiter(
+        (zlib.crc32(gram.encode('utf-8')) % _PRIME for gram in grams),
+        dtype=np.uint64, count=len(grams)
+    )
+
+
+class NearDuplicateIndex:
+    """MinHash signatures with LSH banding over a growing set of texts.
+    
+    Texts whose estimated Jaccard similarity (over character shingles) to an
+    earlier text reaches ``threshold`` are reported as duplicates of it;
+    everything else becomes a new canonical entry.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS
+    ):
+        """Initialize index.
+        
+        Args:
+            threshold: Minimum estimated Jaccard similarity of a duplicate
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands; must divide num_perm
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(_SEED)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+    
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Compute the MinHash signature of a text (None if it has no shingles)."""
+        hashes = shingles(text)
+        if not len(hashes):
+            return None
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+    
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """Split a uint64 signature into its LSH bucket keys."""
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+    
+    def add(self, key: str, text: str) -> Optional[str]:
+        """Add a text, or find the canonical entry it duplicates.
+        
+        Args:
+            key: Identifier of the text
+            text: Text to add
+        
+        Returns:
+            Key of the canonical near-duplicate, or None if the text was added
+        """
+        return self.add_signature(key, self.signature(text))
+    
+    def add_signature(self, key: str, signature: Optional[np.ndarray]) -> Optional[str]:
+        """Add a signature, or find the canonical entry it duplicates.
+        
+        Args:
+            key: Identifier of the text
+            signature: MinHash signature of the text
+        
+        Returns:
+            Key of the canonical near-duplicate, or None if the signature was added
+        """
+        if signature is None:
+            return None
+        
+        checked = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            for candidate in self._buckets[band].get(band_key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+        
+        self.insert(key, signature)
+        return None
+    
+    def insert(self, key: str, signature: np.ndarray) -> None:
+        """Add a signature as a canonical entry without looking for duplicates."""
+        signature = np.asarray(signature, dtype=np.uint64)
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(band_key, []).append(key)
+        # Permuted hashes are below 2**31, so uint32 holds them exactly
+        self._signatures[key] = signature.astype(np.uint32)
+    
+    def entries(self) -> Iterator[Tuple[str, np.ndarray]]:
+        """Iterate over the (key, signature) pairs of the canonical entries."""
+        return iter(self._signatures.items())
+
+
+def save_signatures(dir_path: Path, entries: Iterable[Tuple[str, str, np.ndarray]]) -> None:
+    """Write the signatures of canonical chunks, streaming them to disk.
+    
+    Args:
+        dir_path: Directory to write to
+        entries: Tuples of (chunk ID, source path, signature)
+    """
+    dir_path = Path(dir_path)
+    dir_path.mkdir(parents=True, exist_ok=True)
+    signatures = ArrayWriter(dir_path / SIGNATURES_FILENAME, np.uint32, NUM_PERM)
+    keys = RecordWriter(dir_path / SIGNATURE_KEYS_FILENAME)
+    try:
+        for chunk_id, source_path, signature in entries:
+            signatures.append(signature)
+            keys.append({"chunk_id": chunk_id, "source_path": source_path})
+    except BaseException:
+        signatures.abort()
+        keys.abort()
+        raise
+    signatures.close()
+    keys.close()
+
+
+def load_signatures(dir_path: Path) -> Iterator[Tuple[str, str, np.ndarray]]:
+    """Read signatures written by save_signatures().
+    
+    Args:
+        dir_path: Directory holding the signatures
+    
+    Yields:
+        Tuples of (chunk ID, source path, signature); none if there are no signatures
+    """
+    dir_path = Path(dir_path)
+    if not (dir_path / SIGNATURES_FILENAME).exists():
+        return
+    signatures = load_array(dir_path / SIGNATURES_FILENAME)
+    with open(dir_path / SIGNATURE_KEYS_FILENAME, 'r', encoding='utf-8') as f:
+        for signature, line in zip(signatures, f):
+            key = json.loads(line)
+            yield key["chunk_id"], key["source_path"], np.asarray(signature)
+
+
+class SpilledDeduplicator:
+    """Two-pass near-duplicate elimination over a stream of chunks.
+    
+    One canonical chunk is kept per cluster of near-duplicates: the first
+    chunk of the cluster in ingest order. The source paths of the others
+    are added to its ``metadata["aliases"]``, and ``duplicates`` maps each
+    duplicate chunk ID to the canonical one.
+    
+    Aliases must be known before a canonical chunk is emitted, so the
+    first pass only computes signatures while the chunks are spilled to a
+    JSON lines file; the second pass reads them back and emits the
+    canonical ones. Memory holds one signature per canonical chunk and the
+    duplicate and alias maps, not the chunk texts.
+    
+    The index can be seeded with the canonical chunks of an earlier run;
+    chunks duplicating a seed are dropped, and the aliases they add to it
+    are reported by ``seeded_aliases()``.
+    """
+    
+    def __init__(self, spill_path: Path, threshold: float = DEFAULT_THRESHOLD):
+        """Initialize deduplicator.
+        
+        Args:
+            spill_path: File the chunks are spilled to, removed once emitted
+            threshold: Minimum estimated Jaccard similarity of a duplicate
+        """
+        self.spill_path = Path(spill_path)
+        self.index = NearDuplicateIndex(threshold=threshold)
+        self.duplicates: Dict[str, str] = {}
+        self._sources: Dict[str, str] = {}
+        self._aliases: Dict[str, List[str]] = {}
+        self._seeded = set()
+        self._writer: Optional[RecordWriter] = None
+    
+    def seed(self, chunk_id: str, source_path: str, signature: np.ndarray) -> None:
+        """Add a canonical chunk of an earlier run by its signature."""
+        self.index.insert(chunk_id, signature)
+        self._sources[chunk_id] = source_path
+        self._seeded.add(chunk_id)
+    
+    def add(self, chunk: Chunk) -> None:
+        """First pass: spill a chunk and record whether it is a duplicate."""
+        if self._writer is None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = RecordWriter(self.spill_path)
+        self._writer.append(asdict(chunk))
+        
+        original_id = self.index.add(chunk.chunk_id, chunk.text)
+        if original_id is None:
+            self._sources.setdefault(chunk.chunk_id, chunk.source_path)
+            return
+        
+        self.duplicates[chunk.chunk_id] = original_id
+        if chunk.source_path != self._sources[original_id]:
+            aliases = self._aliases.setdefault(original_id, [])
+            if chunk.source_path not in aliases:
+                aliases.append(chunk.source_path)
+    
+    def canonical_chunks(self) -> Iterator[Chunk]:
+        """Second pass: yield the canonical chunks, with their aliases, in order."""
+        if self._writer is None:
+            return
+        offsets = self._writer.close()
+        self._writer = None
+        records = RecordFile(self.spill_path, offsets)
+        try:
+            emitted = set()
+            for i in range(len(records)):
+                chunk = Chunk(**records.get(i))
+                # A repeated chunk ID is reported as a duplicate of itself
+                if self.duplicates.get(chunk.chunk_id, chunk.chunk_id) != chunk.chunk_id:
+                    continue
+                if chunk.chunk_id in emitted:
+                    continue
+                emitted.add(chunk.chunk_id)
+                aliases = self._aliases.get(chunk.chunk_id)
+                if aliases:
+                    existing = chunk.metadata.setdefault("aliases", [])
+                    existing.extend(path for path in aliases if path not in existing)
+                yield chunk
+        finally:
+            records.close()
+            self.spill_path.unlink(missing_ok=True)
+    
+    def seeded_aliases(self) -> Dict[str, List[str]]:
+        """Get the new aliases of seeded chunks, by chunk ID."""
+        return {key: aliases for key, aliases in self._aliases.items() if key in self._seeded}
+    
+    def save_signatures(self, dir_path: Path) -> None:
+        """Write the signatures of all canonical chunks, seeds included."""
+        save_signatures(dir_path, (
+            (key, self._sources[key], signature) for key, signature in self.index.entries()
+        ))
+    
+    def abort(self) -> None:
+        """Remove the spill file of an unfinished run."""
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+        self.spill_path.unlink(missing_ok=True)
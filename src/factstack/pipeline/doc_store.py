@@ -0,0 +1,463 @@
+"""Compressed chunk document store for FactStack."""
+
+import json
+import mmap
+import os
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from factstack.pipeline.chunking import Chunk
+from factstack.llm.schemas import ChunkInfo
+from factstack.utils.records import save_array, load_array
+
+
+# On-disk layout
+DOCS_FORMAT = "factstack-docs"
+DOCS_VERSION = 2
+# Version 1 kept every block in one file, appended in place
+LEGACY_DOCS_VERSIONS = (1,)
+META_FILENAME = "meta.json"
+BLOCKS_FILENAME = "blocks.bin"
+BLOCK_OFFSETS_FILENAME = "block_offsets.npy"
+BLOCK_TABLE_FILENAME = "blocks.npy"
+CHUNK_IDS_FILENAME = "chunk_ids.txt"
+LOCATIONS_FILENAME = "locations.npy"
+PACK_PREFIX = "blocks-"
+
+# Texts are compressed together in blocks of about this many bytes, so
+# neighbouring chunks of a file share one compression window
+BLOCK_BYTES = 64 * 1024
+COMPRESSION_LEVEL = 6
+
+# Compressed bytes written to one pack file before the next one is started
+DEFAULT_PACK_BYTES = 32 * 1024 * 1024
+
+# Decompressed blocks kept for repeated lookups
+CACHE_BLOCKS = 16
+
+# A pack is rewritten once more than this fraction of its texts belongs to
+# deleted chunks, and packs smaller than the pack size are merged once
+# there are more than MAX_SMALL_PACKS of them
+MAX_DEAD_RATIO = 0.5
+MAX_SMALL_PACKS = 8
+
+
+def _compress_block(texts: List[str]) -> bytes:
+    return zlib.compress(json.dumps(texts, ensure_ascii=False).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+class DocStore:
+    """Chunk texts in zlib-compressed blocks behind an offset index.
+    
+    The search indexes keep chunk IDs, scores and small payloads only; the
+    text of a chunk is read from here for the few chunks that reach
+    reranking and context assembly. The block files are memory-mapped, so
+    resident memory holds the chunk-ID table and a handful of decompressed
+    blocks, independent of the size of the corpus text.
+    
+    Like BM25 segments, block files ("packs") never change once committed.
+    Added texts are compressed a block at a time as they arrive and
+    appended to a new pack, so writing holds at most one block of text in
+    memory. Deleting a chunk only drops its row. On save, a pack whose
+    texts are mostly dead is rewritten, and small packs are merged once
+    there are too many of them, so the work is bounded by the pack size
+    rather than by the corpus. ``meta.json`` is the commit point and is
+    replaced atomically.
+    """
+    
+    def __init__(self, persist_dir: Path, pack_bytes: int = DEFAULT_PACK_BYTES):
+        """Initialize document store.
+        
+        Args:
+            persist_dir: Directory to persist the store
+            pack_bytes: Compressed bytes written to a pack file before starting the next
+        """
+        self.persist_dir = Path(persist_dir)
+        self.pack_bytes = max(1, pack_bytes)
+        self._lock = threading.Lock()
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._files: Dict[int, object] = {}
+        self._writer = None
+        self._next_pack = 1
+        self._reset()
+    
+    def _reset(self) -> None:
+        """Forget all stored and pending texts (caller holds the lock)."""
+        self._close()
+        # Pack files as {"name", "slots"} and blocks as (pack, start, end)
+        self._packs: List[Dict] = []
+        self._blocks: List[Tuple[int, int, int]] = []
+        # Chunk ID -> row; committed rows index the location table, later
+        # rows the (block, slot) arrays of blocks written since
+        self._rows: Dict[str, int] = {}
+        self._locations = np.zeros((0, 2), dtype=np.int64)
+        self._new_blocks = array('q')
+        self._new_slots = array('q')
+        # Texts of the block being filled
+        self._buffer: Dict[str, str] = {}
+        self._buffer_bytes = 0
+        self._cache: "OrderedDict[int, List[str]]" = OrderedDict()
+        self._dirty = False
+    
+    def _close(self) -> None:
+        for mapped in self._maps.values():
+            mapped.close()
+        for f in self._files.values():
+            f.close()
+        self._maps = {}
+        self._files = {}
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+    
+    def _map_packs(self) -> None:
+        """Memory-map the committed pack files (caller holds the lock)."""
+        self._close()
+        self._cache.clear()
+        for pack, info in enumerate(self._packs):
+            f = open(self.persist_dir / info["name"], 'rb')
+            self._files[pack] = f
+            if os.fstat(f.fileno()).st_size:
+                self._maps[pack] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def load(self) -> bool:
+        """Open the store.
+        
+        Returns:
+            True if a store was found, False otherwise
+        """
+        meta_path = self.persist_dir / META_FILENAME
+        with self._lock:
+            self._reset()
+            if not meta_path.exists():
+                return False
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            version = meta.get("version")
+            if meta.get("format") != DOCS_FORMAT or (
+                version != DOCS_VERSION and version not in LEGACY_DOCS_VERSIONS
+            ):
+                raise RuntimeError(f"Unsupported document store in {self.persist_dir}")
+            
+            with open(self.persist_dir / CHUNK_IDS_FILENAME, 'r', encoding='utf-8') as f:
+                self._rows = {line.rstrip("\n"): row for row, line in enumerate(f)}
+            self._locations = load_array(self.persist_dir / LOCATIONS_FILENAME)
+            if version == DOCS_VERSION:
+                self._packs = meta["packs"]
+                self._next_pack = meta["next_pack"]
+                table = load_array(self.persist_dir / BLOCK_TABLE_FILENAME, mmap_mode=None)
+                self._blocks = [tuple(block) for block in table.tolist()]
+            else:
+                # The single blocks file becomes the first pack; it is never appended to again
+                offsets = load_array(self.persist_dir / BLOCK_OFFSETS_FILENAME, mmap_mode=None).tolist()
+                self._packs = [{"name": BLOCKS_FILENAME, "slots": meta["slots"]}]
+                self._blocks = [(0, offsets[i], offsets[i + 1]) for i in range(len(offsets) - 1)]
+            self._map_packs()
+            return True
+    
+    def add_chunks(self, chunks: List[Chunk]) -> int:
+        """Add (or replace) the texts of chunks.
+        
+        Args:
+            chunks: List of Chunk objects
+        
+        Returns:
+            Number of chunks added
+        """
+        with self._lock:
+            for chunk in chunks:
+                self._append(chunk.chunk_id, chunk.text)
+            self._dirty = True
+        return len(chunks)
+    
+    def _append(self, chunk_id: str, text: str) -> None:
+        """Buffer a text, writing the block once it is full (caller holds the lock)."""
+        self._rows.pop(chunk_id, None)
+        previous = self._buffer.pop(chunk_id, None)
+        if previous is not None:
+            self._buffer_bytes -= len(previous.encode('utf-8'))
+        self._buffer[chunk_id] = text
+        self._buffer_bytes += len(text.encode('utf-8'))
+        if self._buffer_bytes >= BLOCK_BYTES:
+            self._flush_block()
+    
+    def _flush_block(self) -> None:
+        """Compress the buffered texts into a block of the pack being written (caller holds the lock)."""
+        if not self._buffer:
+            return
+        data = _compress_block(list(self._buffer.values()))
+        if self._writer is None or self._writer.seek(0, os.SEEK_END) >= self.pack_bytes:
+            self._start_pack()
+        pack = len(self._packs) - 1
+        start = self._writer.seek(0, os.SEEK_END)
+        self._writer.write(data)
+        self._blocks.append((pack, start, start + len(data)))
+        self._packs[pack]["slots"] += len(self._buffer)
+        
+        block = len(self._blocks) - 1
+        first_row = len(self._locations) + len(self._new_blocks)
+        for slot, chunk_id in enumerate(self._buffer):
+            self._rows[chunk_id] = first_row + slot
+            self._new_blocks.append(block)
+            self._new_slots.append(slot)
+        self._buffer = {}
+        self._buffer_bytes = 0
+    
+    def _start_pack(self) -> None:
+        """Finish the pack being written and start a new one (caller holds the lock)."""
+        self._finish_pack()
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{PACK_PREFIX}{self._next_pack:06d}.bin"
+        self._next_pack += 1
+        # A leftover file of that name may be linked from another generation
+        (self.persist_dir / name).unlink(missing_ok=True)
+        self._writer = open(self.persist_dir / name, 'w+b')
+        self._packs.append({"name": name, "slots": 0})
+    
+    def _finish_pack(self) -> None:
+        """Sync the pack being written and map it for reading (caller holds the lock)."""
+        if self._writer is None:
+            return
+        pack = len(self._packs) - 1
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+        self._files[pack] = self._writer
+        if os.fstat(self._writer.fileno()).st_size:
+            self._maps[pack] = mmap.mmap(self._writer.fileno(), 0, access=mmap.ACCESS_READ)
+        self._writer = None
+    
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Remove the texts of chunks.
+        
+        Args:
+            chunk_ids: IDs of the chunks to remove
+        
+        Returns:
+            Number of chunks removed
+        """
+        removed = 0
+        with self._lock:
+            for chunk_id in chunk_ids:
+                if self._rows.pop(chunk_id, None) is not None:
+                    removed += 1
+                    continue
+                text = self._buffer.pop(chunk_id, None)
+                if text is not None:
+                    self._buffer_bytes -= len(text.encode('utf-8'))
+                    removed += 1
+            if removed:
+                self._dirty = True
+        return removed
+    
+    def get_count(self) -> int:
+        """Get number of stored texts."""
+        with self._lock:
+            return len(self._rows) + len(self._buffer)
+    
+    def clear(self) -> None:
+        """Remove all texts; the pack files are removed on save."""
+        with self._lock:
+            self._reset()
+            self._dirty = True
+    
+    def _location(self, row: int) -> Tuple[int, int]:
+        """Get the (block, slot) of a row (caller holds the lock)."""
+        committed = len(self._locations)
+        if row < committed:
+            block, slot = self._locations[row].tolist()
+            return block, slot
+        return self._new_blocks[row - committed], self._new_slots[row - committed]
+    
+    def _read_block(self, block: int) -> List[str]:
+        """Decompress a block, through the block cache (caller holds the lock)."""
+        texts = self._cache.get(block)
+        if texts is not None:
+            self._cache.move_to_end(block)
+            return texts
+        pack, start, end = self._blocks[block]
+        if pack in self._maps:
+            data = self._maps[pack][start:end]
+        else:
+            # The pack still being written
+            self._writer.seek(start)
+            data = self._writer.read(end - start)
+        texts = json.loads(zlib.decompress(data))
+        self._cache[block] = texts
+        if len(self._cache) > CACHE_BLOCKS:
+            self._cache.popitem(last=False)
+        return texts
+    
+    def get_texts(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """Get the texts of chunks.
+        
+        Args:
+            chunk_ids: IDs of the chunks to look up
+        
+        Returns:
+            Mapping from chunk ID to text for the IDs that were found
+        """
+        with self._lock:
+            return self._lookup(chunk_ids)
+    
+    def _lookup(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """Look up texts (caller holds the lock)."""
+        found = {}
+        wanted = []
+        for chunk_id in chunk_ids:
+            if chunk_id in self._buffer:
+                found[chunk_id] = self._buffer[chunk_id]
+            elif chunk_id in self._rows:
+                block, slot = self._location(self._rows[chunk_id])
+                wanted.append((block, slot, chunk_id))
+        # Each block is decompressed once per call
+        for block, slot, chunk_id in sorted(wanted):
+            found[chunk_id] = self._read_block(block)[slot]
+        return found
+    
+    def hydrate(self, chunks: List[ChunkInfo]) -> List[ChunkInfo]:
+        """Fill in the text of retrieved chunks that were returned without it.
+        
+        Args:
+            chunks: Retrieved chunks, updated in place
+        
+        Returns:
+            The same chunks
+        """
+        texts = self.get_texts([chunk.chunk_id for chunk in chunks if not chunk.text])
+        for chunk in chunks:
+            if not chunk.text:
+                chunk.text = texts.get(chunk.chunk_id, "")
+        return chunks
+    
+    def _live_locations(self) -> Tuple[List[str], np.ndarray]:
+        """Get the live chunk IDs and their (block, slot) locations (caller holds the lock)."""
+        chunk_ids = list(self._rows)
+        rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(chunk_ids))
+        committed = len(self._locations)
+        locations = np.empty((len(chunk_ids), 2), dtype=np.int64)
+        old = rows < committed
+        locations[old] = np.asarray(self._locations)[rows[old]]
+        new = rows[~old] - committed
+        locations[~old, 0] = np.array(self._new_blocks, dtype=np.int64)[new]
+        locations[~old, 1] = np.array(self._new_slots, dtype=np.int64)[new]
+        return chunk_ids, locations
+    
+    def _plan_compaction(self) -> List[int]:
+        """Pick the packs whose live texts are rewritten (caller holds the lock)."""
+        if not self._packs:
+            return []
+        _, locations = self._live_locations()
+        block_packs = np.array([block[0] for block in self._blocks], dtype=np.int64)
+        live = np.bincount(block_packs[locations[:, 0]], minlength=len(self._packs))
+        sizes = np.bincount(
+            block_packs, weights=[end - start for _, start, end in self._blocks], minlength=len(self._packs)
+        )
+        
+        # Packs without live texts are simply dropped
+        mostly_dead = [
+            pack for pack, info in enumerate(self._packs)
+            if live[pack] and (info["slots"] - live[pack]) / info["slots"] > MAX_DEAD_RATIO
+        ]
+        if mostly_dead:
+            return mostly_dead
+        small = [pack for pack in range(len(self._packs)) if live[pack] and sizes[pack] < self.pack_bytes]
+        return small if len(small) > MAX_SMALL_PACKS else []
+    
+    def _compact(self, packs: List[int]) -> None:
+        """Copy the live texts of packs into new packs (caller holds the lock)."""
+        selected = set(packs)
+        chunk_ids, locations = self._live_locations()
+        moving = sorted(
+            (block, slot, chunk_id)
+            for chunk_id, (block, slot) in zip(chunk_ids, locations.tolist())
+            if self._blocks[block][0] in selected
+        )
+        for block, slot, chunk_id in moving:
+            self._append(chunk_id, self._read_block(block)[slot])
+        self._flush_block()
+        self._finish_pack()
+    
+    def save(self) -> None:
+        """Persist pending changes.
+        
+        The buffered texts are written as a last block and the pack being
+        written is finished; packs are then compacted as needed. The block
+        table, locations and chunk IDs are replaced atomically and
+        ``meta.json`` is written last. Pack files no longer referenced are
+        removed afterwards.
+        """
+        with self._lock:
+            if not self._dirty and (self.persist_dir / META_FILENAME).exists():
+                return
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+            
+            self._flush_block()
+            self._finish_pack()
+            while True:
+                packs = self._plan_compaction()
+                if not packs:
+                    break
+                self._compact(packs)
+            
+            # Keep the blocks and packs that still hold live texts
+            chunk_ids, locations = self._live_locations()
+            live_blocks = np.unique(locations[:, 0])
+            kept_packs = sorted({self._blocks[block][0] for block in live_blocks.tolist()})
+            pack_index = {pack: i for i, pack in enumerate(kept_packs)}
+            block_index = np.full(len(self._blocks), -1, dtype=np.int64)
+            block_index[live_blocks] = np.arange(len(live_blocks))
+            packs = [self._packs[pack] for pack in kept_packs]
+            table = np.array(
+                [(pack_index[self._blocks[block][0]],) + self._blocks[block][1:] for block in live_blocks.tolist()],
+                dtype=np.int64
+            ).reshape(-1, 3)
+            locations[:, 0] = block_index[locations[:, 0]]
+            
+            save_array(self.persist_dir / BLOCK_TABLE_FILENAME, table)
+            save_array(self.persist_dir / LOCATIONS_FILENAME, locations)
+            ids_path = self.persist_dir / CHUNK_IDS_FILENAME
+            tmp_path = ids_path.with_name(CHUNK_IDS_FILENAME + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for chunk_id in chunk_ids:
+                    f.write(chunk_id)
+                    f.write("\n")
+            os.replace(tmp_path, ids_path)
+            
+            meta = {
+                "format": DOCS_FORMAT,
+                "version": DOCS_VERSION,
+                "count": len(chunk_ids),
+                "next_pack": self._next_pack,
+                "packs": packs,
+                "blocks": len(table),
+                "compressed_bytes": int((table[:, 2] - table[:, 1]).sum()),
+            }
+            meta_path = self.persist_dir / META_FILENAME
+            tmp_path = meta_path.with_name(META_FILENAME + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+            
+            self._packs = packs
+            self._blocks = [tuple(block) for block in table.tolist()]
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(chunk_ids)}
+            self._locations = locations
+            self._new_blocks = array('q')
+            self._new_slots = array('q')
+            self._dirty = False
+            self._map_packs()
+            self._remove_unreferenced()
+    
+    def _remove_unreferenced(self) -> None:
+        """Remove pack files and legacy files no longer referenced (caller holds the lock)."""
+        live = {info["name"] for info in self._packs}
+        for file_path in self.persist_dir.iterdir():
+            is_pack = file_path.name.startswith(PACK_PREFIX) or file_path.name == BLOCKS_FILENAME
+            if (is_pack and file_path.name not in live) or file_path.name == BLOCK_OFFSETS_FILENAME:
+                file_path.unlink()
@@ -0,0 +1,220 @@
+"""Persistent embedding cache for FactStack."""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from factstack.config import EmbeddingConfig
+
+
+# Default cache file name inside a database directory
+CACHE_FILENAME = "embedding_cache.sqlite"
+
+# Default maximum number of cached vectors
+DEFAULT_MAX_ENTRIES = 200_000
+
+# SQLite limits the number of bound parameters per statement
+_BATCH_SIZE = 500
+
+
+def text_hash(text: str) -> str:
+    """Get the SHA-256 hex digest of a text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache with LRU eviction.
+    
+    Vectors are keyed by ``(model, dimension, sha256(text))`` and stored as
+    raw float64 bytes, so a cached vector is exactly the vector that was
+    originally returned. Every lookup bumps the entry's use counter; when the
+    cache grows beyond ``max_entries`` the least recently used entries are
+    evicted.
+    
+    Lookups only read: the bumps are kept in memory and written in one
+    batch with the next put_many() (or once _BATCH_SIZE are pending, or on
+    close). The row count is tracked in memory too and only recounted when
+    it passes ``max_entries``, since other processes may share the file.
+    """
+    
+    def __init__(self, path: Path, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Initialize embedding cache; the database is opened on first use.
+        
+        Args:
+            path: Path of the SQLite database file
+            max_entries: Maximum number of cached vectors
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._clock = 0
+        self._count = 0
+        # Pending use counter bumps, by (model, dimension, text hash)
+        self._touched: Dict[Tuple[str, int, str], int] = {}
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller holds the lock)."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, dimension INTEGER NOT NULL, text_hash TEXT NOT NULL, "
+                "vector BLOB NOT NULL, last_used INTEGER NOT NULL, "
+                "PRIMARY KEY (model, dimension, text_hash))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+            )
+            conn.commit()
+            row = conn.execute("SELECT MAX(last_used) FROM embeddings").fetchone()
+            self._clock = row[0] or 0
+            self._count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            self._conn = conn
+        return self._conn
+    
+    def get_many(self, model: str, dimension: int, hashes: List[str]) -> Dict[str, List[float]]:
+        """Look up cached vectors.
+        
+        Args:
+            model: Embedding model identifier
+            dimension: Embedding dimension
+            hashes: Text hashes to look up
+        
+        Returns:
+            Mapping from text hash to vector for the hashes that were found
+        """
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(hashes), _BATCH_SIZE):
+                batch = hashes[start:start + _BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND dimension = ? AND text_hash IN ({placeholders})",
+                    [model, dimension, *batch]
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float64).tolist()
+            
+            for key in found:
+                self._touched[(model, dimension, key)] = self._tick()
+            if len(self._touched) >= _BATCH_SIZE:
+                self._write_touched(conn)
+                conn.commit()
+            
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        
+        return found
+    
+    def put_many(
+        self,
+        model: str,
+        dimension: int,
+        items: Dict[str, List[float]]
+    ) -> None:
+        """Store vectors and evict the least recently used overflow.
+        
+        Args:
+            model: Embedding model identifier
+            dimension: Embedding dimension
+            items: Mapping from text hash to vector
+        """
+        if not items:
+            return
+        
+        with self._lock:
+            conn = self._connection()
+            self._write_touched(conn)
+            rows = [
+                (np.asarray(vector, dtype=np.float64).tobytes(), self._tick(), model, dimension, key)
+                for key, vector in items.items()
+            ]
+            added = conn.executemany(
+                "INSERT OR IGNORE INTO embeddings "
+                "(vector, last_used, model, dimension, text_hash) VALUES (?, ?, ?, ?, ?)",
+                rows
+            ).rowcount
+            if added < len(rows):
+                # Some vectors were cached already
+                conn.executemany(
+                    "UPDATE embeddings SET vector = ?, last_used = ? "
+                    "WHERE model = ? AND dimension = ? AND text_hash = ?",
+                    rows
+                )
+            
+            self._count += added
+            if self._count > self.max_entries:
+                self._count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if self._count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN "
+                        "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (self._count - self.max_entries,)
+                    )
+                    self._count = self.max_entries
+            conn.commit()
+    
+    def _write_touched(self, conn: sqlite3.Connection) -> None:
+        """Write the pending use counter bumps (caller holds the lock and commits)."""
+        if self._touched:
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? "
+                "WHERE model = ? AND dimension = ? AND text_hash = ?",
+                [(tick, *key) for key, tick in self._touched.items()]
+            )
+            self._touched = {}
+    
+    def _tick(self) -> int:
+        """Advance the LRU clock."""
+        self._clock += 1
+        return self._clock
+    
+    def get_count(self) -> int:
+        """Get number of cached vectors."""
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    
+    def clear(self) -> None:
+        """Remove all cached vectors."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+            self._count = 0
+            self._touched = {}
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._write_touched(self._conn)
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+
+def open_embedding_cache(config: EmbeddingConfig, db_dir: Path) -> Optional[EmbeddingCache]:
+    """Open the embedding cache configured for a database.
+    
+    Args:
+        config: Embedding configuration
+        db_dir: Database directory, holds the cache unless config.cache_path is set
+    
+    Returns:
+        EmbeddingCache, or None if caching is disabled
+    """
+    if not config.cache_enabled:
+        return None
+    path = Path(config.cache_path) if config.cache_path else Path(db_dir) / CACHE_FILENAME
+    return EmbeddingCache(path, max_entries=config.cache_max_entries)
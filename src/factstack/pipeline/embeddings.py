@@ -1,24 +1,34 @@
 """Embedding generation for FactStack."""
 
-from typing import List, Optional
-import hashlib
+from typing import List, Optional, Tuple
+import logging
 
 from factstack.config import EmbeddingConfig
+from factstack.pipeline.embedding_cache import EmbeddingCache, text_hash
+from factstack.utils.hash_embeddings import hash_embeddings
 
 
 class EmbeddingGenerator:
     """Generates embeddings for text chunks."""
     
-    def __init__(self, config: EmbeddingConfig, llm=None):
+    def __init__(
+        self,
+        config: EmbeddingConfig,
+        llm=None,
+        cache: Optional[EmbeddingCache] = None
+    ):
         """Initialize embedding generator.
         
         Args:
             config: Embedding configuration
             llm: Optional LLM instance for generating embeddings
+            cache: Optional persistent cache consulted before the LLM
         """
         self.config = config
         self.llm = llm
+        self.cache = cache
         self._dimension = config.dimension
+        self.stats = {"texts": 0, "unique_texts": 0, "cache_hits": 0, "cache_misses": 0}
     
     @property
     def dimension(self) -> int:
@@ -28,6 +38,9 @@ class EmbeddingGenerator:
     def generate(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for a list of texts.
         
+        Identical texts are embedded once, and vectors produced by the LLM
+        are looked up in and written to the persistent cache.
+        
         Args:
             texts: List of texts to embed
         
@@ -37,42 +50,66 @@ class EmbeddingGenerator:
         if not texts:
             return []
         
+        unique = list(dict.fromkeys(texts))
+        self.stats["texts"] += len(texts)
+        self.stats["unique_texts"] += len(unique)
+        
+        vectors = self._generate_cached(unique)
+        if len(unique) == len(texts):
+            return vectors
+        
+        by_text = dict(zip(unique, vectors))
+        return [by_text[text] for text in texts]
+    
+    def _generate_cached(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for distinct texts through the cache."""
+        model_id = getattr(self.llm, "embedding_model_id", None)
+        if self.cache is None or model_id is None:
+            return self._generate_uncached(texts)[0]
+        
+        hashes = [text_hash(text) for text in texts]
+        cached = self.cache.get_many(model_id, self._dimension, hashes)
+        self.stats["cache_hits"] += len(cached)
+        self.stats["cache_misses"] += len(texts) - len(cached)
+        
+        missing = [i for i, h in enumerate(hashes) if h not in cached]
+        if missing:
+            fresh, from_llm = self._generate_uncached([texts[i] for i in missing])
+            if not from_llm:
+                # Never mix cached LLM vectors with fallback hash vectors
+                return self._generate_hash_embeddings(texts)
+            fresh_by_hash = {hashes[i]: vector for i, vector in zip(missing, fresh)}
+            self.cache.put_many(model_id, self._dimension, fresh_by_hash)
+            cached.update(fresh_by_hash)
+        
+        return [cached[h] for h in hashes]
+    
+    def _generate_uncached(self, texts: List[str]) -> Tuple[List[List[float]], bool]:
+        """Generate embeddings without the cache.
+        
+        Returns:
+            Tuple of (embeddings, whether they came from the LLM)
+        """
         # Try using LLM's embedding capability
         if self.llm is not None:
             try:
-                return self.llm.get_embeddings(texts)
+                return self.llm.get_embeddings(texts), True
             except NotImplementedError:
                 pass  # Expected when LLM doesn't support embeddings
             except Exception as e:
-                import logging
                 logging.warning(f"LLM embedding generation failed: {e}, using fallback")
         
         # Fallback to simple hash-based embeddings
-        return self._generate_hash_embeddings(texts)
+        return self._generate_hash_embeddings(texts), False
     
     def _generate_hash_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Generate deterministic hash-based pseudo-embeddings.
         
         This is NOT a semantic embedding, just for testing purposes.
         """
-        embeddings = []
-        for text in texts:
-            # Create multiple hashes to fill the dimension
-            hashes = []
-            for i in range(self._dimension // 32 + 1):
-                h = hashlib.sha256(f"{text}:{i}".encode()).digest()
-                hashes.extend([float(b) / 255.0 - 0.5 for b in h])
-            
-            embedding = hashes[:self._dimension]
-            
-            # Normalize
-            norm = sum(x * x for x in embedding) ** 0.5
-            if norm > 0:
-                embedding = [x / norm for x in embedding]
-            
-            embeddings.append(embedding)
-        
-        return embeddings
+        return hash_embeddings(
+            texts, self._dimension, workers=self.config.hash_workers
+        ).tolist()
     
     def generate_single(self, text: str) -> List[float]:
         """Generate embedding for a single text.
@@ -0,0 +1,591 @@
+"""Flat NumPy vector store for FactStack."""
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from factstack.pipeline.chunking import Chunk
+from factstack.pipeline.vector_store import BaseVectorStore
+from factstack.llm.schemas import ChunkInfo
+from factstack.utils.records import (
+    ArrayWriter, RecordFile, RecordWriter, save_array, load_array
+)
+
+
+# Segment list, the commit point of the store
+FLAT_FORMAT = "factstack-flat-vectors"
+FLAT_VERSION = 2
+META_FILENAME = "meta.json"
+SEGMENT_PREFIX = "seg-"
+
+# Files of one segment
+VECTORS_FILENAME = "vectors.npy"
+RECORDS_FILENAME = "chunks.jsonl"
+RECORD_OFFSETS_FILENAME = "chunk_offsets.npy"
+CHUNK_IDS_FILENAME = "chunk_ids.txt"
+DELETES_PREFIX = "deletes-"
+
+# Rows streamed into one segment before the next one is started
+DEFAULT_SEGMENT_ROWS = 100_000
+
+# Merge policy, as for BM25 segments: keep at most MAX_SEGMENTS segments
+# by merging the adjacent run of MERGE_FACTOR segments with the fewest
+# live rows, and rewrite segments whose rows are mostly deleted
+DEFAULT_MERGE_FACTOR = 4
+DEFAULT_MAX_SEGMENTS = 8
+MAX_DELETED_RATIO = 0.5
+
+# Rows copied at a time when merging segments
+MERGE_BATCH_ROWS = 8192
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize the rows of a matrix as float32."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class FlatSegment:
+    """An immutable segment of vectors and payloads plus its tombstones.
+    
+    The vectors, payloads and chunk IDs never change once written;
+    deleting a row only sets its bit in ``deleted``.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        path: Path,
+        matrix: np.ndarray,
+        records: RecordFile,
+        chunk_ids: List[str],
+        deleted: np.ndarray,
+        deletes_file: Optional[str] = None
+    ):
+        self.name = name
+        self.path = path
+        self.matrix = matrix
+        self.records = records
+        self.chunk_ids = chunk_ids
+        self.deleted = deleted
+        self.deleted_count = int(deleted.sum())
+        self.deletes_file = deletes_file
+        self.deletes_dirty = False
+    
+    @property
+    def row_count(self) -> int:
+        """Number of rows, including deleted ones."""
+        return len(self.chunk_ids)
+    
+    @property
+    def live_count(self) -> int:
+        """Number of rows that are not deleted."""
+        return self.row_count - self.deleted_count
+    
+    @classmethod
+    def open(cls, path: Path, name: str, deletes_file: Optional[str] = None) -> "FlatSegment":
+        """Open a segment written by a _SegmentWriter.
+        
+        Args:
+            path: Segment directory
+            name: Segment name
+            deletes_file: Tombstone file of the segment, if any
+        
+        Returns:
+            The opened segment
+        """
+        with open(path / CHUNK_IDS_FILENAME, 'r', encoding='utf-8') as f:
+            chunk_ids = [line.rstrip("\n") for line in f]
+        deleted = np.zeros(len(chunk_ids), dtype=bool)
+        if deletes_file:
+            packed = load_array(path / deletes_file, mmap_mode=None)
+            deleted = np.unpackbits(packed, count=len(chunk_ids)).astype(bool)
+        return cls(
+            name, path,
+            matrix=load_array(path / VECTORS_FILENAME),
+            records=RecordFile(path / RECORDS_FILENAME, load_array(path / RECORD_OFFSETS_FILENAME)),
+            chunk_ids=chunk_ids,
+            deleted=deleted,
+            deletes_file=deletes_file
+        )
+    
+    def write_deletes(self, commit: int) -> None:
+        """Write the tombstones under a new name for a commit."""
+        if not self.deleted_count:
+            self.deletes_file = None
+        else:
+            self.deletes_file = f"{DELETES_PREFIX}{commit}.npy"
+            save_array(self.path / self.deletes_file, np.packbits(self.deleted))
+        self.deletes_dirty = False
+    
+    def close(self) -> None:
+        """Release the mapped files."""
+        self.records.close()
+        self.matrix = None
+    
+    def remove(self) -> None:
+        """Delete the segment's files."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class _SegmentWriter:
+    """Streams the rows of a new segment to disk as they are added."""
+    
+    def __init__(self, path: Path, name: str, dimension: int):
+        self.path = path
+        self.name = name
+        path.mkdir(parents=True, exist_ok=True)
+        self.vectors = ArrayWriter(path / VECTORS_FILENAME, np.float32, dimension)
+        self.records = RecordWriter(path / RECORDS_FILENAME)
+        self.chunk_ids: List[str] = []
+        self.deleted: List[int] = []
+    
+    def append(self, vectors: np.ndarray, records: List[Dict]) -> None:
+        self.vectors.append(vectors)
+        for record in records:
+            self.records.append(record)
+            self.chunk_ids.append(record["chunk_id"])
+    
+    def finish(self) -> FlatSegment:
+        """Complete the segment files and open the segment."""
+        self.vectors.close()
+        save_array(self.path / RECORD_OFFSETS_FILENAME, self.records.close())
+        ids_path = self.path / CHUNK_IDS_FILENAME
+        tmp_path = ids_path.with_name(CHUNK_IDS_FILENAME + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for chunk_id in self.chunk_ids:
+                f.write(chunk_id)
+                f.write("\n")
+        os.replace(tmp_path, ids_path)
+        
+        segment = FlatSegment.open(self.path, self.name)
+        if self.deleted:
+            segment.deleted[self.deleted] = True
+            segment.deleted_count = len(set(self.deleted))
+            segment.deletes_dirty = True
+        return segment
+    
+    def abort(self) -> None:
+        self.vectors.abort()
+        self.records.abort()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class FlatVectorStore(BaseVectorStore):
+    """Exact cosine search over memory-mapped embedding matrices.
+    
+    Embeddings are stored L2-normalized as float32 ``(n, dim)`` matrices,
+    so a search is one matrix-vector product per segment followed by
+    argpartition. Opening the store only maps the files; there is no index
+    to load.
+    
+    Like the BM25 index, the store is a list of immutable segments. Added
+    rows are streamed into a new segment on disk as they arrive, so
+    writing holds no vectors or payloads in memory, only the chunk IDs and
+    a tombstone bit per row. Deleting a row only sets its tombstone; small
+    and mostly deleted segments are merged on save. ``meta.json`` lists
+    the committed segments and is replaced atomically, so a reader always
+    sees one consistent commit, and files are never modified once written.
+    """
+    
+    def __init__(
+        self,
+        persist_dir: Path,
+        segment_rows: int = DEFAULT_SEGMENT_ROWS,
+        merge_factor: int = DEFAULT_MERGE_FACTOR,
+        max_segments: int = DEFAULT_MAX_SEGMENTS
+    ):
+        """Initialize flat vector store.
+        
+        Args:
+            persist_dir: Directory to persist the vectors
+            segment_rows: Rows written to one segment before starting the next
+            merge_factor: Number of adjacent segments merged at once
+            max_segments: Segment count above which segments are merged
+        """
+        self.persist_dir = Path(persist_dir)
+        self.segment_rows = max(1, segment_rows)
+        self.merge_factor = max(2, merge_factor)
+        self.max_segments = max(1, max_segments)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._commit = 0
+        self._next_segment = 1
+        self._obsolete: List[FlatSegment] = []
+        self._reset()
+    
+    def _reset(self) -> None:
+        """Forget all segments (caller holds the lock)."""
+        self.segments: List[FlatSegment] = []
+        self._locations: Dict[str, Tuple[object, int]] = {}
+        self._writer: Optional[_SegmentWriter] = None
+        self._dimension = 0
+        self._live = 0
+        self._dirty = False
+    
+    def _new_segment_name(self) -> str:
+        name = f"{SEGMENT_PREFIX}{self._next_segment:06d}"
+        self._next_segment += 1
+        return name
+    
+    def open(self) -> None:
+        """Memory-map the committed segments if not done yet."""
+        if self._loaded:
+            return
+        
+        with self._lock:
+            if self._loaded:
+                return
+            
+            meta_path = self.persist_dir / META_FILENAME
+            if meta_path.exists():
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta.get("format") != FLAT_FORMAT or meta.get("version") != FLAT_VERSION:
+                    raise RuntimeError(
+                        f"Unsupported flat vector index in {self.persist_dir}; "
+                        "re-run ingest to rebuild it"
+                    )
+                self._commit = meta["commit"]
+                self._next_segment = meta["next_segment"]
+                self._dimension = meta["dimension"]
+                for entry in meta["segments"]:
+                    self._attach(FlatSegment.open(
+                        self.persist_dir / entry["name"], entry["name"], entry.get("deletes")
+                    ))
+            self._loaded = True
+    
+    def _attach(self, segment: FlatSegment) -> None:
+        """Add a segment and index its live rows (caller holds the lock)."""
+        for row in np.flatnonzero(~segment.deleted).tolist():
+            self._locations[segment.chunk_ids[row]] = (segment, row)
+        self._live += segment.live_count
+        self.segments.append(segment)
+    
+    def _tombstone(self, location: Tuple[object, int]) -> None:
+        """Delete a row of a segment or of the segment being written (caller holds the lock)."""
+        owner, row = location
+        if owner is self._writer:
+            owner.deleted.append(row)
+        else:
+            owner.deleted[row] = True
+            owner.deleted_count += 1
+            owner.deletes_dirty = True
+        self._live -= 1
+        self._dirty = True
+    
+    def add_chunks(
+        self,
+        chunks: List[Chunk],
+        embeddings: List[List[float]]
+    ) -> int:
+        """Add chunks with their embeddings to the store.
+        
+        The rows are written to disk right away; an existing chunk with
+        the same ID is replaced.
+        
+        Args:
+            chunks: List of Chunk objects
+            embeddings: List of embedding vectors
+        
+        Returns:
+            Number of chunks added
+        """
+        if not chunks or len(chunks) != len(embeddings):
+            return 0
+        
+        self.open()
+        vectors = normalize_rows(embeddings)
+        records = [
+            {
+                "chunk_id": chunk.chunk_id,
+                "source_path": chunk.source_path,
+                "title": chunk.title or "",
+                "chunk_index": chunk.chunk_index,
+                "metadata": chunk.metadata
+            }
+            for chunk in chunks
+        ]
+        
+        with self._lock:
+            if self._dimension and vectors.shape[1] != self._dimension:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match the store ({self._dimension})"
+                )
+            self._dimension = vectors.shape[1]
+            if self._writer is None:
+                name = self._new_segment_name()
+                self._writer = _SegmentWriter(self.persist_dir / name, name, self._dimension)
+            
+            base = len(self._writer.chunk_ids)
+            self._writer.append(vectors, records)
+            for row, chunk in enumerate(chunks, start=base):
+                location = self._locations.get(chunk.chunk_id)
+                if location is not None:
+                    self._tombstone(location)
+                self._locations[chunk.chunk_id] = (self._writer, row)
+                self._live += 1
+            self._dirty = True
+            
+            if len(self._writer.chunk_ids) >= self.segment_rows:
+                self._finish_writer()
+        
+        return len(chunks)
+    
+    def _finish_writer(self) -> None:
+        """Complete the segment being written (caller holds the lock)."""
+        writer = self._writer
+        if writer is None:
+            return
+        self._writer = None
+        segment = writer.finish()
+        for row, chunk_id in enumerate(segment.chunk_ids):
+            if self._locations.get(chunk_id) == (writer, row):
+                self._locations[chunk_id] = (segment, row)
+        self.segments.append(segment)
+    
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 10
+    ) -> List[ChunkInfo]:
+        """Search for similar chunks with exact cosine similarity.
+        
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return
+        
+        Returns:
+            List of ChunkInfo with similarity scores
+        """
+        return self.search_many([query_embedding], top_k=top_k)[0]
+    
+    def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 10
+    ) -> List[List[ChunkInfo]]:
+        """Search for several queries with one matrix product per segment.
+        
+        Ties are broken by row order across segments, like a stable sort
+        over the scores of one matrix holding the live rows in order.
+        
+        Args:
+            query_embeddings: Query embedding vectors
+            top_k: Number of results to return per query
+        
+        Returns:
+            One list of ChunkInfo per query, in query order
+        """
+        self.open()
+        with self._lock:
+            self._finish_writer()
+            segments = [(segment, segment.deleted.copy()) for segment in self.segments]
+            live = self._live
+        if not live or top_k <= 0:
+            return [[] for _ in query_embeddings]
+        if not query_embeddings:
+            return []
+        
+        queries = normalize_rows(query_embeddings)
+        k = min(top_k, live)
+        
+        # Per-segment top k, then the overall top k of the candidates
+        candidates = [[] for _ in range(len(queries))]
+        for s, (segment, deleted) in enumerate(segments):
+            if segment.live_count == 0:
+                continue
+            all_scores = segment.matrix @ queries.T
+            all_scores[deleted] = -np.inf
+            for q, scores in enumerate(all_scores.T):
+                n = min(k, len(scores))
+                top = np.argpartition(-scores, n - 1)[:n] if n < len(scores) else np.arange(len(scores))
+                top = top[~deleted[top]]
+                candidates[q].extend((float(scores[row]), s, row) for row in top.tolist())
+        
+        all_chunks = []
+        for found in candidates:
+            # Best score first, then row order
+            found.sort(key=lambda item: (-item[0], item[1], item[2]))
+            chunks = []
+            for score, s, row in found[:k]:
+                data = segments[s][0].records.get(row)
+                # Same mapping as the Chroma backend: 1 - cosine distance, floored at 0
+                similarity = max(0.0, score)
+                chunks.append(ChunkInfo(
+                    chunk_id=data["chunk_id"],
+                    source_path=data.get("source_path", ""),
+                    title=data.get("title"),
+                    text=data.get("text", ""),
+                    vector_score=similarity,
+                    final_score=similarity,
+                    metadata=data.get("metadata") or {}
+                ))
+            all_chunks.append(chunks)
+        
+        return all_chunks
+    
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete chunks from the store by ID.
+        
+        Args:
+            chunk_ids: IDs of the chunks to delete
+        
+        Returns:
+            Number of IDs submitted for deletion
+        """
+        if not chunk_ids:
+            return 0
+        
+        self.open()
+        with self._lock:
+            for chunk_id in chunk_ids:
+                location = self._locations.pop(chunk_id, None)
+                if location is not None:
+                    self._tombstone(location)
+        
+        return len(chunk_ids)
+    
+    def _plan_merge(self) -> Optional[Tuple[int, int]]:
+        """Pick an adjacent run of segments to merge (caller holds the lock)."""
+        segments = self.segments
+        for i, segment in enumerate(segments):
+            if segment.row_count and segment.deleted_count / segment.row_count > MAX_DELETED_RATIO:
+                return i, i + 1
+        
+        if len(segments) <= self.max_segments:
+            return None
+        
+        width = min(self.merge_factor, len(segments))
+        start = min(
+            range(len(segments) - width + 1),
+            key=lambda i: sum(segment.live_count for segment in segments[i:i + width])
+        )
+        return start, start + width
+    
+    def _merge(self, start: int, end: int) -> None:
+        """Copy the live rows of adjacent segments into one new segment (caller holds the lock)."""
+        sources = self.segments[start:end]
+        replacement = []
+        if any(segment.live_count for segment in sources):
+            name = self._new_segment_name()
+            writer = _SegmentWriter(self.persist_dir / name, name, self._dimension)
+            try:
+                for segment in sources:
+                    rows = np.flatnonzero(~segment.deleted)
+                    for i in range(0, len(rows), MERGE_BATCH_ROWS):
+                        batch = rows[i:i + MERGE_BATCH_ROWS]
+                        writer.append(
+                            np.asarray(segment.matrix[batch]),
+                            [segment.records.get(row) for row in batch.tolist()]
+                        )
+                merged = writer.finish()
+            except BaseException:
+                writer.abort()
+                raise
+            for row, chunk_id in enumerate(merged.chunk_ids):
+                self._locations[chunk_id] = (merged, row)
+            replacement = [merged]
+        self.segments[start:end] = replacement
+        self._obsolete.extend(sources)
+    
+    def save(self) -> None:
+        """Commit the added rows and tombstones.
+        
+        The segment being written is completed, segments are merged as the
+        merge policy asks, changed tombstones are written under new names
+        and ``meta.json`` is replaced last. Files no longer referenced are
+        removed afterwards.
+        """
+        meta_path = self.persist_dir / META_FILENAME
+        with self._lock:
+            if not self._dirty and meta_path.exists():
+                return
+            
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+            self._finish_writer()
+            while True:
+                run = self._plan_merge()
+                if run is None:
+                    break
+                self._merge(*run)
+            
+            self._commit += 1
+            entries = []
+            for segment in self.segments:
+                if segment.deletes_dirty:
+                    segment.write_deletes(self._commit)
+                entries.append({
+                    "name": segment.name,
+                    "rows": segment.row_count,
+                    "deleted": segment.deleted_count,
+                    "deletes": segment.deletes_file,
+                })
+            meta = {
+                "format": FLAT_FORMAT,
+                "version": FLAT_VERSION,
+                "commit": self._commit,
+                "next_segment": self._next_segment,
+                "count": self._live,
+                "dimension": self._dimension,
+                "segments": entries,
+            }
+            tmp_path = meta_path.with_name(META_FILENAME + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+            
+            live = {segment.name for segment in self.segments}
+            for segment in self._obsolete:
+                if segment.name not in live:
+                    segment.close()
+                    segment.remove()
+            self._obsolete = []
+            self._remove_unreferenced(live)
+            self._dirty = False
+    
+    def _remove_unreferenced(self, live: set) -> None:
+        """Remove leftover segment directories and old tombstone files (caller holds the lock)."""
+        for child in self.persist_dir.glob(f"{SEGMENT_PREFIX}*"):
+            if child.is_dir() and child.name not in live:
+                shutil.rmtree(child, ignore_errors=True)
+        for segment in self.segments:
+            for file_path in segment.path.glob(f"{DELETES_PREFIX}*.npy"):
+                if file_path.name != segment.deletes_file:
+                    file_path.unlink()
+    
+    def get_count(self) -> int:
+        """Get number of chunks in the store."""
+        self.open()
+        with self._lock:
+            return self._live
+    
+    def clear(self) -> None:
+        """Clear all data from the store; the segment files are removed on save."""
+        with self._lock:
+            self._loaded = True
+            if self._writer is not None:
+                self._writer.abort()
+            self._obsolete.extend(self.segments)
+            self._reset()
+            self._dirty = True
+    
+    def get_all_chunk_ids(self) -> List[str]:
+        """Get all chunk IDs in the store."""
+        self.open()
+        with self._lock:
+            self._finish_writer()
+            return [
+                segment.chunk_ids[row]
+                for segment in self.segments
+                for row in np.flatnonzero(~segment.deleted).tolist()
+            ]
@@ -0,0 +1,268 @@
+"""Atomic index generations for FactStack databases.
+
+Each ingest builds its indexes into a new ``gen-NNNN`` directory inside the
+database directory and then atomically points the ``CURRENT`` file at it.
+Readers resolve ``CURRENT`` once when they open a database, so they never
+see a half-built index, and pin the generation they read with a lease file
+so it is not pruned under them. Databases created before generations
+existed keep their indexes directly in the database directory and are
+still readable.
+"""
+
+import os
+import re
+import shutil
+import sys
+import uuid
+from functools import partial
+from pathlib import Path
+from typing import List, Optional, Set
+
+from factstack.pipeline.embedding_cache import CACHE_FILENAME
+from factstack.pipeline.translation_memo import MEMO_FILENAME
+from factstack.pipeline.vector_store import VECTOR_BACKENDS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+CURRENT_FILENAME = "CURRENT"
+GENERATION_PREFIX = "gen-"
+LEASES_DIRNAME = "leases"
+LEASE_SUFFIX = ".lease"
+
+# Published generations kept on disk besides the pinned ones: the current
+# one and its predecessor, which a server may be about to open
+KEEP_GENERATIONS = 2
+
+# ioctl cloning a file's extents (Linux, on filesystems such as Btrfs and XFS)
+_FICLONE = 0x40049409
+
+_GENERATION_NAME = re.compile(rf"^{GENERATION_PREFIX}(\d+)$")
+
+
+def current_generation(db_dir: Path) -> Optional[str]:
+    """Get the name of the current generation of a database.
+    
+    Args:
+        db_dir: Database directory
+    
+    Returns:
+        Generation directory name, or None for a database without generations
+    """
+    try:
+        name = (Path(db_dir) / CURRENT_FILENAME).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+    return name or None
+
+
+def generation_dir(db_dir: Path, generation: Optional[str] = None) -> Path:
+    """Get the directory holding the indexes of a generation.
+    
+    Args:
+        db_dir: Database directory
+        generation: Generation name, or None for the current generation
+    
+    Returns:
+        The generation directory, or db_dir itself for a database without generations
+    """
+    generation = generation or current_generation(db_dir)
+    return Path(db_dir) / generation if generation else Path(db_dir)
+
+
+def list_generations(db_dir: Path) -> List[str]:
+    """List the generation directories of a database, oldest first."""
+    db_dir = Path(db_dir)
+    if not db_dir.exists():
+        return []
+    numbered = []
+    for child in db_dir.iterdir():
+        match = _GENERATION_NAME.match(child.name)
+        if match and child.is_dir():
+            numbered.append((int(match.group(1)), child.name))
+    return [name for _, name in sorted(numbered)]
+
+
+def _generation_number(name: str) -> int:
+    return int(_GENERATION_NAME.match(name).group(1))
+
+
+def _written_in_place(relative: Path) -> bool:
+    """Whether a store updates a generation file in place.
+    
+    Chroma's SQLite and HNSW files are written in place. Every other file
+    is immutable once written or replaced with os.replace, so generations
+    can share it.
+    """
+    return relative.parts[0] == VECTOR_BACKENDS["chroma"]
+
+
+def _clone_or_copy(src: str, dst: str) -> str:
+    """Copy a file, sharing its extents with a reflink where supported."""
+    if fcntl is not None and sys.platform.startswith("linux"):
+        try:
+            with open(src, 'rb') as source, open(dst, 'wb') as target:
+                fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+            shutil.copystat(src, dst)
+            return dst
+        except OSError:
+            pass
+    return shutil.copy2(src, dst)
+
+
+def _link_or_copy(root: Path, src: str, dst: str) -> str:
+    """Hard-link files that are never written in place, copy the others."""
+    if not _written_in_place(Path(src).relative_to(root)):
+        try:
+            os.link(src, dst)
+            return dst
+        except OSError:
+            pass
+    return _clone_or_copy(src, dst)
+
+
+def stage_generation(db_dir: Path, copy_from: Optional[Path] = None) -> Path:
+    """Create the directory of the next generation.
+    
+    Leftovers of interrupted ingests (generations newer than the current
+    one) are removed first. Assumes a single writer per database.
+    Files that are never written in place (BM25 and flat vector segments,
+    document store packs, committed metadata) are shared with the source
+    generation through hard links; only Chroma's files are copied, as
+    reflinks where the filesystem supports them.
+    
+    Args:
+        db_dir: Database directory
+        copy_from: Index directory to start from (for incremental ingest),
+            or None to start empty
+    
+    Returns:
+        The new generation directory
+    """
+    db_dir = Path(db_dir)
+    db_dir.mkdir(parents=True, exist_ok=True)
+    
+    current = current_generation(db_dir)
+    current_number = _generation_number(current) if current else 0
+    for name in list_generations(db_dir):
+        if _generation_number(name) > current_number:
+            shutil.rmtree(db_dir / name, ignore_errors=True)
+    
+    staging_dir = db_dir / f"{GENERATION_PREFIX}{current_number + 1:04d}"
+    
+    if copy_from is not None and Path(copy_from).exists():
+        shutil.copytree(
+            copy_from, staging_dir,
+            ignore=shutil.ignore_patterns(
+                f"{GENERATION_PREFIX}*", f"{CURRENT_FILENAME}*", f"{CACHE_FILENAME}*",
+                f"{MEMO_FILENAME}*", LEASES_DIRNAME, "*.tmp"
+            ),
+            copy_function=partial(_link_or_copy, Path(copy_from))
+        )
+    else:
+        staging_dir.mkdir()
+    return staging_dir
+
+
+def publish_generation(db_dir: Path, staging_dir: Path) -> None:
+    """Atomically make a staged generation current and prune old ones.
+    
+    Generations pinned by a reader's lease are kept until a later publish
+    finds them released.
+    
+    Args:
+        db_dir: Database directory
+        staging_dir: Generation directory returned by stage_generation
+    """
+    db_dir = Path(db_dir)
+    pointer = db_dir / CURRENT_FILENAME
+    tmp_path = db_dir / f"{CURRENT_FILENAME}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(Path(staging_dir).name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, pointer)
+    
+    current_number = _generation_number(Path(staging_dir).name)
+    published = [
+        name for name in list_generations(db_dir)
+        if _generation_number(name) <= current_number
+    ]
+    pinned = pinned_generations(db_dir)
+    for name in published[:-KEEP_GENERATIONS]:
+        if name not in pinned:
+            shutil.rmtree(db_dir / name, ignore_errors=True)
+
+
+def discard_generation(staging_dir: Path) -> None:
+    """Remove a staged generation that will not be published."""
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # No cheap liveness check; leases of crashed readers stay until removed
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def pin_generation(db_dir: Path, generation: Optional[str]) -> Optional[Path]:
+    """Pin a generation against pruning while it is being read.
+    
+    Args:
+        db_dir: Database directory
+        generation: Generation to pin, or None for a database without generations
+    
+    Returns:
+        Path of the lease file, to pass to unpin_generation, or None
+    """
+    if not generation:
+        return None
+    leases_dir = Path(db_dir) / LEASES_DIRNAME
+    leases_dir.mkdir(parents=True, exist_ok=True)
+    lease = leases_dir / f"{generation}.{os.getpid()}.{uuid.uuid4().hex[:8]}{LEASE_SUFFIX}"
+    lease.touch()
+    return lease
+
+
+def unpin_generation(lease: Optional[Path]) -> None:
+    """Release a lease taken with pin_generation."""
+    if lease is not None:
+        Path(lease).unlink(missing_ok=True)
+
+
+def pinned_generations(db_dir: Path) -> Set[str]:
+    """Get the generations pinned by live readers.
+    
+    Leases of processes that are no longer running are removed.
+    
+    Args:
+        db_dir: Database directory
+    
+    Returns:
+        Names of the pinned generations
+    """
+    leases_dir = Path(db_dir) / LEASES_DIRNAME
+    if not leases_dir.exists():
+        return set()
+    pinned = set()
+    for lease in leases_dir.glob(f"*{LEASE_SUFFIX}"):
+        try:
+            generation, pid, _ = lease.name[:-len(LEASE_SUFFIX)].rsplit(".", 2)
+            pid = int(pid)
+        except ValueError:
+            continue
+        if _process_alive(pid):
+            pinned.add(generation)
+        else:
+            lease.unlink(missing_ok=True)
+    return pinned
@@ -0,0 +1,255 @@
+"""Per-file ingest manifest for incremental re-ingestion in FactStack."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field, asdict
+
+from factstack.pipeline.chunking import SourceStat
+
+
+MANIFEST_VERSION = 2
+# Version 1 keyed entries by the file path as spelled on the command line
+LEGACY_MANIFEST_VERSIONS = (1,)
+MANIFEST_FILENAME = "manifest.json"
+
+
+def hash_file(file_path: Path, block_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+@dataclass
+class FileEntry:
+    """Manifest record for a single ingested file.
+    
+    ``path`` is the manifest key, the path relative to the docs directory.
+    """
+    path: str
+    size: int
+    mtime: float
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ManifestDiff:
+    """Difference between the manifest and the files currently on disk."""
+    added: List[Path] = field(default_factory=list)
+    changed: List[Path] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    
+    @property
+    def has_changes(self) -> bool:
+        """Whether any file was added, changed or removed."""
+        return bool(self.added or self.changed or self.removed)
+
+
+class IngestManifest:
+    """Tracks which files were ingested and which chunks they produced.
+    
+    The manifest lives next to the vector and BM25 indexes and lets
+    ingestion skip files whose contents have not changed. Files are keyed
+    by their path relative to the docs directory, so the same files match
+    however the directory is spelled (``./docs``, ``/abs/docs``, a symlink).
+    """
+    
+    def __init__(self, persist_dir: Path, docs_dir: Path):
+        """Initialize manifest.
+        
+        Args:
+            persist_dir: Directory the database is persisted in
+            docs_dir: Directory the documents are ingested from
+        """
+        self.persist_dir = Path(persist_dir)
+        self.docs_dir = Path(docs_dir).resolve()
+        self.settings: Dict[str, Any] = {}
+        self.files: Dict[str, FileEntry] = {}
+    
+    @property
+    def path(self) -> Path:
+        """Path of the manifest file."""
+        return self.persist_dir / MANIFEST_FILENAME
+    
+    def key(self, file_path: Path) -> str:
+        """Manifest key of a file: its POSIX path relative to the docs directory."""
+        path = Path(file_path).resolve()
+        try:
+            return path.relative_to(self.docs_dir).as_posix()
+        except ValueError:
+            # Outside the docs directory (not produced by find_documents)
+            return path.as_posix()
+    
+    def load(self) -> bool:
+        """Load the manifest from disk.
+        
+        Returns:
+            True if loaded successfully, False otherwise
+        """
+        if not self.path.exists():
+            return False
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            version = data.get('version')
+            if version != MANIFEST_VERSION and version not in LEGACY_MANIFEST_VERSIONS:
+                return False
+            self.settings = data.get('settings', {})
+            self.files = {}
+            for item in data.get('files', []):
+                entry = FileEntry(**item)
+                if version != MANIFEST_VERSION:
+                    # Re-key entries recorded under the path as it was spelled
+                    entry.path = self.key(Path(entry.path))
+                self.files[entry.path] = entry
+            return True
+        except Exception:
+            return False
+    
+    def save(self) -> None:
+        """Persist the manifest atomically."""
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        data = {
+            'version': MANIFEST_VERSION,
+            'settings': self.settings,
+            'files': [asdict(entry) for entry in sorted(
+                self.files.values(), key=lambda e: e.path
+            )]
+        }
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+    
+    def diff(self, file_paths: List[Path]) -> ManifestDiff:
+        """Compare files on disk against the manifest.
+        
+        Size and mtime are checked first; the content hash is only
+        computed when either of them differs from the recorded value.
+        
+        Args:
+            file_paths: Files currently present in the docs directory
+        
+        Returns:
+            ManifestDiff describing added, changed, removed and unchanged
+            files; removed and unchanged files are given by manifest key
+        """
+        result = ManifestDiff()
+        seen = set()
+        
+        for file_path in file_paths:
+            key = self.key(file_path)
+            seen.add(key)
+            entry = self.files.get(key)
+            if entry is None:
+                result.added.append(file_path)
+                continue
+            
+            stat = file_path.stat()
+            if stat.st_size == entry.size and stat.st_mtime == entry.mtime:
+                result.unchanged.append(key)
+            elif hash_file(file_path) == entry.sha256:
+                # Touched but identical; refresh the stat fields only
+                entry.size = stat.st_size
+                entry.mtime = stat.st_mtime
+                result.unchanged.append(key)
+            else:
+                result.changed.append(file_path)
+        
+        result.removed = [key for key in self.files if key not in seen]
+        return result
+    
+    def record(
+        self,
+        file_path: Path,
+        chunk_ids: List[str],
+        source: Optional[SourceStat] = None
+    ) -> FileEntry:
+        """Record (or replace) the entry for an ingested file.
+        
+        Pass the stat of the bytes that were chunked: stat-ing the file
+        again would record an edit made during ingest as already indexed.
+        
+        Args:
+            file_path: Path of the ingested file
+            chunk_ids: IDs of the chunks produced from the file
+            source: Size, mtime and hash of the chunked bytes (default: the file now)
+        
+        Returns:
+            The recorded FileEntry
+        """
+        if source is None:
+            stat = file_path.stat()
+            source = SourceStat(size=stat.st_size, mtime=stat.st_mtime, sha256=hash_file(file_path))
+        entry = FileEntry(
+            path=self.key(file_path),
+            size=source.size,
+            mtime=source.mtime,
+            sha256=source.sha256,
+            chunk_ids=list(chunk_ids)
+        )
+        self.files[entry.path] = entry
+        return entry
+    
+    def forget(self, path: str) -> Optional[FileEntry]:
+        """Remove a file from the manifest.
+        
+        Args:
+            path: Manifest key of the file
+        
+        Returns:
+            The removed entry, if any
+        """
+        return self.files.pop(path, None)
+    
+    def chunk_ids_for(self, paths: List[str]) -> List[str]:
+        """Collect the distinct chunk IDs recorded for the given files."""
+        ids = {}
+        for path in paths:
+            entry = self.files.get(path)
+            if entry is not None:
+                ids.update(dict.fromkeys(entry.chunk_ids))
+        return list(ids)
+    
+    def sharing_chunks(self, paths: List[str]) -> List[str]:
+        """Find the other files that share chunks with the given files.
+        
+        With near-duplicate elimination a file's entry lists the canonical
+        chunks of other files, so re-ingesting or removing a file also
+        invalidates every file sharing one of its chunks, transitively.
+        
+        Args:
+            paths: Manifest keys of the files being re-ingested or removed
+        
+        Returns:
+            Manifest keys of the other affected files
+        """
+        owners: Dict[str, List[str]] = {}
+        for entry in self.files.values():
+            for chunk_id in entry.chunk_ids:
+                owners.setdefault(chunk_id, []).append(entry.path)
+        
+        affected = set(paths)
+        pending = list(paths)
+        while pending:
+            entry = self.files.get(pending.pop())
+            if entry is None:
+                continue
+            for chunk_id in entry.chunk_ids:
+                for path in owners[chunk_id]:
+                    if path not in affected:
+                        affected.add(path)
+                        pending.append(path)
+        return sorted(affected - set(paths))
+    
+    def clear(self) -> None:
+        """Drop all file entries."""
+        self.files = {}
@@ -1,9 +1,11 @@
 """Query translation for cross-lingual retrieval in FactStack."""
 
 import re
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 
 from factstack.llm.base import BaseLLM
+from factstack.llm.schemas import QueryUnderstanding
+from factstack.pipeline.translation_memo import TranslationMemo
 
 
 # Simple Chinese-English dictionary for rule-based translation fallback
@@ -120,6 +122,50 @@ def translate_rule_based(query: str) -> str:
     return result if result else query
 
 
+# Words that carry no meaning as search keywords
+KEYWORD_STOP_WORDS = {
+    'what', 'how', 'why', 'when', 'where', 'who', 'which', 'is', 'are', 'do',
+    'does', 'can', 'could', 'would', 'should', 'the', 'a', 'an', 'to', 'for',
+    'of', 'in', 'on', 'with', 'and', 'or', 'my', 'i',
+}
+
+
+def extract_keywords(text: str) -> List[str]:
+    """Extract distinct search keywords from an English query, in order."""
+    words = re.findall(r'[a-z0-9]+(?:[_.\-][a-z0-9]+)*', text.lower())
+    return list(dict.fromkeys(
+        word for word in words if word not in KEYWORD_STOP_WORDS and len(word) > 2
+    ))
+
+
+def understand_query_rules(
+    question: str,
+    rewrite: Optional[str] = None,
+    fallback: bool = False
+) -> QueryUnderstanding:
+    """Rule-based query understanding, without any LLM call.
+    
+    Args:
+        question: User's question
+        rewrite: Retrieval rewrite of the question (defaults to the question)
+        fallback: Mark the result as a fallback for a failed LLM call
+    
+    Returns:
+        QueryUnderstanding from language detection and the dictionary translation
+    """
+    from factstack.pipeline.query_language import detect_language, needs_translation
+    
+    rewrite = rewrite or question
+    translation = translate_rule_based(rewrite) if needs_translation(question) else None
+    return QueryUnderstanding(
+        language=detect_language(question),
+        rewrite=rewrite,
+        translation=translation,
+        keywords=extract_keywords(translation or rewrite),
+        fallback=fallback
+    )
+
+
 def translate_with_llm(query: str, llm: BaseLLM) -> str:
     """Translate a query using LLM for retrieval-friendly English.
     
@@ -156,16 +202,19 @@ class QueryTranslator:
     def __init__(
         self,
         llm: Optional[BaseLLM] = None,
-        mode: Literal["llm", "rule", "off"] = "llm"
+        mode: Literal["llm", "rule", "off"] = "llm",
+        memo: Optional[TranslationMemo] = None
     ):
         """Initialize query translator.
         
         Args:
             llm: Optional LLM instance for translation
             mode: Translation mode - "llm", "rule", or "off"
+            memo: Optional memo consulted before translating
         """
         self.llm = llm
         self.mode = mode
+        self.memo = memo
     
     def translate_for_retrieval(
         self,
@@ -187,11 +236,21 @@ class QueryTranslator:
         if src_lang == "en":
             return None  # No translation needed
         
-        if self.mode == "llm" and self.llm is not None:
-            return translate_with_llm(query, self.llm)
+        mode = self.get_mode_info()
+        if self.memo is not None:
+            translated = self.memo.get(mode, query)
+            if translated is not None:
+                return translated
+        
+        if mode == "llm":
+            translated = translate_with_llm(query, self.llm)
         else:
             # Rule-based fallback
-            return translate_rule_based(query)
+            translated = translate_rule_based(query)
+        
+        if self.memo is not None:
+            self.memo.put(mode, query, translated)
+        return translated
     
     def get_mode_info(self) -> str:
         """Get information about the current translation mode."""
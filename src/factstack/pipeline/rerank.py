@@ -83,13 +83,17 @@ class HybridMerger:
                 text=chunk.text,
                 vector_score=chunk.vector_score,
                 bm25_score=0.0,
-                final_score=0.0
+                final_score=0.0,
+                metadata=chunk.metadata
             )
         
         # Add/merge BM25 results
         for chunk in bm25_results:
             if chunk.chunk_id in merged:
                 merged[chunk.chunk_id].bm25_score = chunk.bm25_score
+                # Indexes written before the document store may carry the text in only one channel
+                if not merged[chunk.chunk_id].text:
+                    merged[chunk.chunk_id].text = chunk.text
             else:
                 merged[chunk.chunk_id] = ChunkInfo(
                     chunk_id=chunk.chunk_id,
@@ -98,7 +102,8 @@ class HybridMerger:
                     text=chunk.text,
                     vector_score=0.0,
                     bm25_score=chunk.bm25_score,
-                    final_score=0.0
+                    final_score=0.0,
+                    metadata=chunk.metadata
                 )
         
         # Calculate combined scores
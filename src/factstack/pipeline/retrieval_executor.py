@@ -0,0 +1,158 @@
+"""Concurrent retrieval fan-out for FactStack."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from factstack.observability.tracer import Tracer
+
+
+# Default limit on how long a single branch may run
+DEFAULT_BRANCH_TIMEOUT = 10.0
+
+# Thread pools shared by all executors of the same size, so engines that
+# are replaced when a new index generation is published do not leak threads
+_pools: Dict[int, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _shared_pool(max_workers: int) -> ThreadPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="factstack-retrieval"
+            )
+            _pools[max_workers] = pool
+        return pool
+
+
+@dataclass
+class RetrievalBranch:
+    """One retriever run for one query channel.
+    
+    Attributes:
+        stage: Trace stage name (e.g. "vector_search", "bm25_search")
+        channel: Channel the query belongs to (e.g. "original", "translated")
+        query: Query the branch runs
+        run: Callable returning the branch results
+        timeout: Seconds to wait for the branch; None uses the executor default
+        batched: The branch serves several channels and returns one result
+            list per channel
+    """
+    stage: str
+    channel: str
+    query: str
+    run: Callable[[], List[Any]]
+    timeout: Optional[float] = None
+    batched: bool = False
+    
+    @property
+    def name(self) -> str:
+        return f"{self.channel}/{self.stage}"
+
+
+@dataclass
+class BranchResult:
+    """Outcome of a retrieval branch."""
+    branch: RetrievalBranch
+    results: List[Any] = field(default_factory=list)
+    latency_ms: float = 0.0
+    ok: bool = True
+    error: Optional[str] = None
+    timed_out: bool = False
+
+
+class RetrievalExecutor:
+    """Runs retrieval branches concurrently on a thread pool.
+    
+    Every channel × retriever pair is submitted at once, so wall-clock
+    retrieval time is that of the slowest branch instead of the sum of all
+    of them. A branch that fails or exceeds its timeout contributes no
+    results; the others are still used. Python threads cannot be
+    cancelled, so a timed-out branch finishes in the background and its
+    result is discarded.
+    
+    Each branch is recorded in the tracer under its own stage, with its
+    latency and channel. Executors with the same number of workers share
+    one thread pool.
+    """
+    
+    def __init__(self, max_workers: int = 4, timeout: float = DEFAULT_BRANCH_TIMEOUT):
+        """Initialize the executor.
+        
+        Args:
+            max_workers: Branches running at the same time
+            timeout: Default per-branch timeout in seconds
+        """
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._pool = _shared_pool(self.max_workers)
+    
+    def run(
+        self,
+        branches: List[RetrievalBranch],
+        tracer: Optional[Tracer] = None
+    ) -> Dict[str, BranchResult]:
+        """Run branches concurrently and wait for all of them.
+        
+        Args:
+            branches: Branches to run
+            tracer: Tracer receiving one entry per branch
+        
+        Returns:
+            Mapping from branch name to its result, in branch order
+        """
+        def timed(branch: RetrievalBranch) -> BranchResult:
+            outcome = BranchResult(branch=branch)
+            start = time.perf_counter()
+            try:
+                outcome.results = branch.run()
+            except Exception as e:
+                outcome.ok = False
+                outcome.error = str(e)
+            outcome.latency_ms = (time.perf_counter() - start) * 1000
+            return outcome
+        
+        submitted = time.perf_counter()
+        futures = [(branch, self._pool.submit(timed, branch)) for branch in branches]
+        
+        outcomes: Dict[str, BranchResult] = {}
+        for branch, future in futures:
+            timeout = self.timeout if branch.timeout is None else branch.timeout
+            # Timeouts count from submission, as all branches start together
+            remaining = max(0.0, timeout - (time.perf_counter() - submitted))
+            try:
+                outcome = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                outcome = BranchResult(
+                    branch=branch,
+                    latency_ms=timeout * 1000,
+                    ok=False,
+                    error=f"timed out after {timeout:.1f}s",
+                    timed_out=True
+                )
+            outcomes[branch.name] = outcome
+            
+            if tracer is not None:
+                result_count = (
+                    sum(len(results) for results in outcome.results) if branch.batched
+                    else len(outcome.results)
+                )
+                tracer.trace(
+                    stage=branch.stage,
+                    input_summary=f"query={branch.query[:30]}...",
+                    output_summary=(
+                        f"{result_count} results" if outcome.ok else f"failed: {outcome.error}"
+                    ),
+                    latency_ms=outcome.latency_ms,
+                    ok=outcome.ok,
+                    error=outcome.error,
+                    channel=branch.channel,
+                    result_count=result_count,
+                    timed_out=outcome.timed_out
+                )
+        
+        return outcomes
@@ -0,0 +1,188 @@
+"""Speculative retrieval while the query rewrite is in flight for FactStack."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from factstack.llm.schemas import ChunkInfo, QueryUnderstanding
+from factstack.observability.tracer import Tracer
+from factstack.pipeline.vector_store import VectorStore
+from factstack.pipeline.bm25_store import BM25Store
+from factstack.pipeline.embeddings import EmbeddingGenerator
+from factstack.pipeline.rerank import HybridMerger
+from factstack.pipeline.cross_lingual import (
+    ChannelResult, build_retrieval_branches, collect_channel_results
+)
+from factstack.pipeline.retrieval_executor import RetrievalExecutor
+from factstack.pipeline.translation_memo import normalize_query
+
+
+# Default limit on how long retrieval waits for the rewrite
+DEFAULT_REWRITE_TIMEOUT = 2.0
+
+# Rewrites run on their own small pool, so a slow model call never takes a
+# retrieval worker away from the searches it overlaps with
+REWRITE_WORKERS = 4
+_rewrite_pool: Optional[ThreadPoolExecutor] = None
+_rewrite_pool_lock = threading.Lock()
+
+
+def _shared_rewrite_pool() -> ThreadPoolExecutor:
+    global _rewrite_pool
+    with _rewrite_pool_lock:
+        if _rewrite_pool is None:
+            _rewrite_pool = ThreadPoolExecutor(
+                max_workers=REWRITE_WORKERS, thread_name_prefix="factstack-rewrite"
+            )
+        return _rewrite_pool
+
+
+def _keep_best(chunks: List[ChunkInfo], score_field: str) -> List[ChunkInfo]:
+    """Deduplicate chunks by ID, keeping the highest-scoring copy."""
+    best: Dict[str, ChunkInfo] = {}
+    for chunk in chunks:
+        current = best.get(chunk.chunk_id)
+        if current is None or getattr(chunk, score_field) > getattr(current, score_field):
+            best[chunk.chunk_id] = chunk
+    return list(best.values())
+
+
+@dataclass
+class SpeculativeResult:
+    """Outcome of speculative retrieval.
+    
+    Attributes:
+        search_query: Last query retrieved for (the rewrite if it was used)
+        understanding: Query understanding, or None if it failed or timed out
+        memoized: The understanding came from the memo
+        rewrite_ms: Latency of the understanding call
+        rewrite_timed_out: The rewrite missed the timeout
+        rewrite_error: Why no rewrite is available, if it is not
+        evidence_ms: Time until the speculative results were available
+        rewrite_used: The rewrite differed and its results were merged in
+        channels: Retrieval channels ("original", then "rewritten" if used)
+        merged_chunks: Merged results of all channels
+    """
+    search_query: str
+    understanding: Optional[QueryUnderstanding] = None
+    memoized: bool = False
+    rewrite_ms: float = 0.0
+    rewrite_timed_out: bool = False
+    rewrite_error: Optional[str] = None
+    evidence_ms: float = 0.0
+    rewrite_used: bool = False
+    channels: List[ChannelResult] = field(default_factory=list)
+    merged_chunks: List[ChunkInfo] = field(default_factory=list)
+
+
+class SpeculativeRetriever:
+    """Retrieves for the question as asked while it is being rewritten.
+    
+    The understanding (rewrite) call and retrieval on the raw question
+    start together, so the first evidence is available after retrieval
+    time rather than after model latency plus retrieval time. Once the
+    rewrite arrives, it is retrieved for as well and both result sets are
+    merged with ``HybridMerger``, keeping each chunk's best vector and BM25
+    scores. If the rewrite is the question itself, fails or misses the
+    timeout, the speculative results are used as they are; a timed-out
+    call still finishes in the background, and memoizes its result.
+    """
+    
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        bm25_store: BM25Store,
+        embedding_gen: EmbeddingGenerator,
+        executor: RetrievalExecutor,
+        vector_weight: float = 0.3,
+        bm25_weight: float = 0.7,
+        rewrite_timeout: float = DEFAULT_REWRITE_TIMEOUT
+    ):
+        """Initialize speculative retriever.
+        
+        Args:
+            vector_store: Vector store instance
+            bm25_store: BM25 store instance
+            embedding_gen: Embedding generator
+            executor: Executor running the retrieval branches
+            vector_weight: Weight for vector scores
+            bm25_weight: Weight for BM25 scores
+            rewrite_timeout: Seconds, from the start, to wait for the rewrite
+        """
+        self.vector_store = vector_store
+        self.bm25_store = bm25_store
+        self.embedding_gen = embedding_gen
+        self.executor = executor
+        self.merger = HybridMerger(vector_weight=vector_weight, bm25_weight=bm25_weight)
+        self.rewrite_timeout = rewrite_timeout
+    
+    def _search(
+        self,
+        channel_name: str,
+        query: str,
+        top_k: int,
+        tracer: Optional[Tracer]
+    ) -> ChannelResult:
+        channel_queries = [(channel_name, query)]
+        branches = build_retrieval_branches(
+            self.vector_store, self.bm25_store, self.embedding_gen, channel_queries, top_k
+        )
+        outcomes = self.executor.run(branches, tracer)
+        return collect_channel_results(channel_queries, branches, outcomes)[0]
+    
+    def retrieve(
+        self,
+        question: str,
+        understand: Callable[[str], Tuple[QueryUnderstanding, bool]],
+        top_k: int = 8,
+        tracer: Optional[Tracer] = None
+    ) -> SpeculativeResult:
+        """Retrieve for a question while its understanding is computed.
+        
+        Args:
+            question: User's question
+            understand: Returns (QueryUnderstanding, memoized) for a question
+            top_k: Number of results to retrieve per retriever and query
+            tracer: Tracer receiving the retrieval branches
+        
+        Returns:
+            SpeculativeResult with the merged chunks
+        """
+        start = time.perf_counter()
+        
+        def timed_understand() -> Tuple[QueryUnderstanding, bool, float]:
+            call_start = time.perf_counter()
+            understanding, memoized = understand(question)
+            return understanding, memoized, (time.perf_counter() - call_start) * 1000
+        
+        future = _shared_rewrite_pool().submit(timed_understand)
+        
+        result = SpeculativeResult(search_query=question)
+        result.channels.append(self._search("original", question, top_k, tracer))
+        result.evidence_ms = (time.perf_counter() - start) * 1000
+        
+        # The timeout counts from the start, as the rewrite started with retrieval
+        remaining = max(0.0, self.rewrite_timeout - (time.perf_counter() - start))
+        try:
+            result.understanding, result.memoized, result.rewrite_ms = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            result.rewrite_timed_out = True
+            result.rewrite_ms = self.rewrite_timeout * 1000
+            result.rewrite_error = f"timed out after {self.rewrite_timeout:.1f}s"
+        except Exception as e:
+            result.rewrite_ms = (time.perf_counter() - start) * 1000
+            result.rewrite_error = str(e)
+        
+        rewrite = result.understanding.rewrite if result.understanding else None
+        if rewrite and normalize_query(rewrite) != normalize_query(question):
+            result.channels.append(self._search("rewritten", rewrite, top_k, tracer))
+            result.search_query = rewrite
+            result.rewrite_used = True
+        
+        result.merged_chunks = self.merger.merge(
+            _keep_best([c for channel in result.channels for c in channel.vector_results], "vector_score"),
+            _keep_best([c for channel in result.channels for c in channel.bm25_results], "bm25_score")
+        )
+        return result
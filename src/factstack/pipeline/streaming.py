@@ -0,0 +1,84 @@
+"""Bounded, threaded generator stages for streaming pipelines."""
+
+import queue
+import threading
+from typing import Iterable, Iterator, List, TypeVar
+
+
+T = TypeVar("T")
+
+# How often a blocked producer checks whether the consumer went away
+_POLL_SECONDS = 0.1
+
+_END = object()
+
+
+class _StageError:
+    """Wraps an exception raised on a producer thread."""
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(items: Iterable[T], maxsize: int = 4, name: str = "stage") -> Iterator[T]:
+    """Run an iterable on a worker thread behind a bounded queue.
+    
+    The worker stays at most ``maxsize`` items ahead of the consumer, so
+    memory is bounded no matter how long the stream is. Exceptions raised
+    by the worker are re-raised in the consumer, and closing the returned
+    generator stops the worker.
+    
+    Args:
+        items: Iterable to consume on the worker thread
+        maxsize: Maximum number of items buffered between the stages
+        name: Thread name, for debugging
+    
+    Yields:
+        The items of ``items``, in order
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def run() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_StageError(e))
+            return
+        put(_END)
+    
+    worker = threading.Thread(target=run, name=f"factstack-{name}", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group an iterable into lists of at most ``size`` items."""
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,164 @@
+"""Memo of query translations for FactStack."""
+
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from factstack.config import TranslationConfig
+
+
+# Default memo file name inside a database directory
+MEMO_FILENAME = "translation_memo.sqlite"
+
+# Default number of translations kept in memory
+DEFAULT_MAX_ENTRIES = 1024
+
+# Memo mode of whole query understandings (JSON-encoded QueryUnderstanding)
+UNDERSTANDING_MODE = "understanding"
+
+# Only results that cost a model round trip are worth a disk write;
+# rule-based translation is cheaper than the lookup
+DISK_MODES = ("llm", UNDERSTANDING_MODE)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for use as a memo key.
+    
+    Applies NFKC (full-width to half-width forms), lowercases and collapses
+    whitespace, so trivially different spellings of a question share a key.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split())
+
+
+class TranslationMemo:
+    """Two-tier memo of query translations.
+    
+    Translations are keyed by ``(mode, normalize_query(query))``. The first
+    tier is an in-process LRU of ``max_entries`` items; the optional second
+    tier is a SQLite file that keeps LLM translations across restarts and
+    is consulted on a memory miss.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[Path] = None):
+        """Initialize translation memo; the disk tier is opened on first use.
+        
+        Args:
+            max_entries: Maximum number of translations kept in memory
+            path: Path of the SQLite disk tier, or None for memory only
+        """
+        self.max_entries = max(1, max_entries)
+        self.path = Path(path) if path else None
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Open the disk tier on first use (caller holds the lock)."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "mode TEXT NOT NULL, query TEXT NOT NULL, translation TEXT NOT NULL, "
+                "PRIMARY KEY (mode, query))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def _remember(self, key: Tuple[str, str], translation: str) -> None:
+        """Add a translation to the memory tier (caller holds the lock)."""
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def get(self, mode: str, query: str) -> Optional[str]:
+        """Look up the translation of a query.
+        
+        Args:
+            mode: Translation mode the translation was made with
+            query: Query as asked
+        
+        Returns:
+            The memoized translation, or None
+        """
+        key = (mode, normalize_query(query))
+        with self._lock:
+            translation = self._entries.get(key)
+            if translation is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return translation
+            
+            if self.path is not None and mode in DISK_MODES:
+                row = self._connection().execute(
+                    "SELECT translation FROM translations WHERE mode = ? AND query = ?", key
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.stats["disk_hits"] += 1
+                    return row[0]
+            
+            self.stats["misses"] += 1
+            return None
+    
+    def put(self, mode: str, query: str, translation: str) -> None:
+        """Memoize the translation of a query.
+        
+        Args:
+            mode: Translation mode the translation was made with
+            query: Query as asked
+            translation: Its translation
+        """
+        key = (mode, normalize_query(query))
+        with self._lock:
+            self._remember(key, translation)
+            if self.path is not None and mode in DISK_MODES:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO translations (mode, query, translation) VALUES (?, ?, ?)",
+                    (*key, translation)
+                )
+                conn.commit()
+    
+    def close(self) -> None:
+        """Close the disk tier."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_memos: Dict[Tuple[Optional[str], int], TranslationMemo] = {}
+_memos_lock = threading.Lock()
+
+
+def open_translation_memo(config: TranslationConfig, db_dir: Path) -> TranslationMemo:
+    """Get the translation memo configured for a database.
+    
+    Memos are shared per disk path and size, so engines replaced when a new
+    index generation is published keep the translations already made.
+    
+    Args:
+        config: Translation configuration
+        db_dir: Database directory, holds the disk tier unless config.memo_path is set
+    
+    Returns:
+        Shared TranslationMemo instance
+    """
+    path = None
+    if config.memo_disk:
+        path = Path(config.memo_path) if config.memo_path else Path(db_dir) / MEMO_FILENAME
+    key = (str(path.resolve()) if path else None, config.memo_size)
+    with _memos_lock:
+        memo = _memos.get(key)
+        if memo is None:
+            memo = TranslationMemo(max_entries=config.memo_size, path=path)
+            _memos[key] = memo
+        return memo
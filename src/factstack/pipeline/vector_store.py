@@ -1,6 +1,7 @@
 """Vector store implementation for FactStack."""
 
 import json
+from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import asdict
@@ -9,7 +10,190 @@ from factstack.pipeline.chunking import Chunk
 from factstack.llm.schemas import ChunkInfo
 
 
-class VectorStore:
+# Chunk fields stored as Chroma metadata next to Chunk.metadata
+CHUNK_FIELDS = ("source_path", "title", "chunk_index")
+
+# Chroma metadata values must be scalars; lists and dicts are stored as JSON
+# and their keys listed under this key
+JSON_FIELDS_KEY = "json_fields"
+
+# Available vector backends and the subdirectory of the database they live in
+VECTOR_BACKENDS = {
+    "chroma": "vector",
+    "flat": "vector_flat",
+}
+
+
+class BaseVectorStore(ABC):
+    """Abstract base class for vector store backends."""
+    
+    @abstractmethod
+    def add_chunks(
+        self,
+        chunks: List[Chunk],
+        embeddings: List[List[float]]
+    ) -> int:
+        """Add chunks with their embeddings to the store.
+        
+        Args:
+            chunks: List of Chunk objects
+            embeddings: List of embedding vectors
+        
+        Returns:
+            Number of chunks added
+        """
+        pass
+    
+    @abstractmethod
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 10
+    ) -> List[ChunkInfo]:
+        """Search for similar chunks.
+        
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return
+        
+        Returns:
+            List of ChunkInfo with similarity scores
+        """
+        pass
+    
+    def use_stored_text(self) -> bool:
+        """Return chunk text stored in the index with search results.
+        
+        Needed to serve indexes written before the document store existed.
+        Backends that never stored chunk text can only do so when empty.
+        
+        Returns:
+            True if search results will carry their text, False otherwise
+        """
+        return self.get_count() == 0
+    
+    def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 10
+    ) -> List[List[ChunkInfo]]:
+        """Search for several queries at once.
+        
+        Backends override this to answer all queries in one request.
+        
+        Args:
+            query_embeddings: Query embedding vectors
+            top_k: Number of results to return per query
+        
+        Returns:
+            One list of ChunkInfo per query, in query order
+        """
+        return [self.search(query_embedding, top_k=top_k) for query_embedding in query_embeddings]
+    
+    @abstractmethod
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete chunks from the store by ID.
+        
+        Args:
+            chunk_ids: IDs of the chunks to delete
+        
+        Returns:
+            Number of IDs submitted for deletion
+        """
+        pass
+    
+    @abstractmethod
+    def get_count(self) -> int:
+        """Get number of chunks in the store."""
+        pass
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """Clear all data from the store."""
+        pass
+    
+    @abstractmethod
+    def get_all_chunk_ids(self) -> List[str]:
+        """Get all chunk IDs in the store."""
+        pass
+    
+    def open(self) -> None:
+        """Open the store ahead of the first query (optional)."""
+        pass
+    
+    def save(self) -> None:
+        """Persist pending changes (no-op for self-persisting backends)."""
+        pass
+
+
+def create_vector_store(db_dir: Path, backend: str = "chroma") -> BaseVectorStore:
+    """Create the vector store for a database directory.
+    
+    Args:
+        db_dir: Directory containing the database
+        backend: Vector backend, "chroma" or "flat"
+    
+    Returns:
+        Vector store instance
+    """
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unknown vector backend: {backend}")
+    
+    persist_dir = Path(db_dir) / VECTOR_BACKENDS[backend]
+    if backend == "flat":
+        from factstack.pipeline.flat_vector_store import FlatVectorStore
+        return FlatVectorStore(persist_dir)
+    return VectorStore(persist_dir)
+
+
+def detect_vector_backend(db_dir: Path, backend: str) -> str:
+    """Get the vector backend whose index a database directory holds.
+    
+    Args:
+        db_dir: Directory containing the database
+        backend: Configured vector backend
+    
+    Returns:
+        The configured backend if its index exists (or no index exists),
+        otherwise the backend the database was built with
+    """
+    if (Path(db_dir) / VECTOR_BACKENDS[backend]).exists():
+        return backend
+    for name, subdir in VECTOR_BACKENDS.items():
+        if (Path(db_dir) / subdir).exists():
+            return name
+    return backend
+
+
+def _encode_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-encode the non-scalar values of chunk metadata for Chroma."""
+    encoded = {}
+    json_fields = []
+    for key, value in metadata.items():
+        if isinstance(value, (list, dict)):
+            encoded[key] = json.dumps(value, ensure_ascii=False)
+            json_fields.append(key)
+        else:
+            encoded[key] = value
+    if json_fields:
+        encoded[JSON_FIELDS_KEY] = ",".join(json_fields)
+    return encoded
+
+
+def _decode_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore chunk metadata stored by _encode_metadata."""
+    json_fields = metadata.get(JSON_FIELDS_KEY)
+    decoded = {
+        key: value for key, value in metadata.items()
+        if key not in CHUNK_FIELDS and key != JSON_FIELDS_KEY
+    }
+    for key in json_fields.split(",") if json_fields else ():
+        if key in decoded:
+            decoded[key] = json.loads(decoded[key])
+    return decoded
+
+
+class VectorStore(BaseVectorStore):
     """Vector store using ChromaDB for similarity search."""
     
     def __init__(self, persist_dir: Path, collection_name: str = "factstack"):
@@ -21,6 +205,9 @@ class VectorStore:
         """
         self.persist_dir = Path(persist_dir)
         self.collection_name = collection_name
+        # Chunk text lives in the document store; only collections written
+        # before it hold the text as their Chroma documents
+        self.include_documents = False
         self._client = None
         self._collection = None
     
@@ -69,9 +256,9 @@ class VectorStore:
             return 0
         
         ids = [chunk.chunk_id for chunk in chunks]
-        documents = [chunk.text for chunk in chunks]
         metadatas = [
             {
+                **_encode_metadata(chunk.metadata),
                 "source_path": chunk.source_path,
                 "title": chunk.title or "",
                 "chunk_index": chunk.chunk_index
@@ -88,7 +275,6 @@ class VectorStore:
             self.collection.add(
                 ids=ids[i:batch_end],
                 embeddings=embeddings[i:batch_end],
-                documents=documents[i:batch_end],
                 metadatas=metadatas[i:batch_end]
             )
             added += batch_end - i
@@ -109,32 +295,95 @@ class VectorStore:
         Returns:
             List of ChunkInfo with similarity scores
         """
+        return self.search_many([query_embedding], top_k=top_k)[0]
+    
+    def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 10
+    ) -> List[List[ChunkInfo]]:
+        """Search for several queries in one Chroma query.
+        
+        Args:
+            query_embeddings: Query embedding vectors
+            top_k: Number of results to return per query
+        
+        Returns:
+            One list of ChunkInfo per query, in query order
+        """
+        if not query_embeddings:
+            return []
+        
+        include = ["metadatas", "distances"]
+        if self.include_documents:
+            include.append("documents")
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=top_k,
-            include=["documents", "metadatas", "distances"]
+            include=include
         )
         
-        chunks = []
-        if results and results['ids'] and results['ids'][0]:
-            for i, chunk_id in enumerate(results['ids'][0]):
-                # Convert distance to similarity score (cosine distance -> similarity)
-                distance = results['distances'][0][i] if results['distances'] else 0
-                # ChromaDB returns squared L2 distance for cosine, convert to similarity
-                similarity = max(0, 1 - distance)
-                
-                metadata = results['metadatas'][0][i] if results['metadatas'] else {}
-                
-                chunks.append(ChunkInfo(
-                    chunk_id=chunk_id,
-                    source_path=metadata.get('source_path', ''),
-                    title=metadata.get('title'),
-                    text=results['documents'][0][i] if results['documents'] else '',
-                    vector_score=similarity,
-                    final_score=similarity
-                ))
-        
-        return chunks
+        all_chunks = []
+        for q in range(len(query_embeddings)):
+            chunks = []
+            if results and results['ids'] and results['ids'][q]:
+                for i, chunk_id in enumerate(results['ids'][q]):
+                    # Convert distance to similarity score (cosine distance -> similarity)
+                    distance = results['distances'][q][i] if results['distances'] else 0
+                    # ChromaDB returns squared L2 distance for cosine, convert to similarity
+                    similarity = max(0, 1 - distance)
+                    
+                    metadata = results['metadatas'][q][i] if results['metadatas'] else {}
+                    text = results['documents'][q][i] if results.get('documents') else ''
+                    
+                    chunks.append(ChunkInfo(
+                        chunk_id=chunk_id,
+                        source_path=metadata.get('source_path', ''),
+                        title=metadata.get('title'),
+                        text=text or '',
+                        vector_score=similarity,
+                        final_score=similarity,
+                        metadata=_decode_metadata(metadata)
+                    ))
+            all_chunks.append(chunks)
+        
+        return all_chunks
+    
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete chunks from the store by ID.
+        
+        Args:
+            chunk_ids: IDs of the chunks to delete
+        
+        Returns:
+            Number of IDs submitted for deletion
+        """
+        if not chunk_ids:
+            return 0
+        
+        batch_size = 100
+        for i in range(0, len(chunk_ids), batch_size):
+            self.collection.delete(ids=chunk_ids[i:i + batch_size])
+        
+        return len(chunk_ids)
+    
+    def open(self) -> None:
+        """Open the ChromaDB client and collection."""
+        _ = self.collection
+    
+    def use_stored_text(self) -> bool:
+        """Return the Chroma documents of a collection written before the document store.
+        
+        Returns:
+            True if the collection holds chunk text (or is empty), False otherwise
+        """
+        if self.collection.count() == 0:
+            return True
+        sample = self.collection.get(limit=1, include=["documents"])
+        if not sample.get('documents') or not sample['documents'][0]:
+            return False
+        self.include_documents = True
+        return True
     
     def get_count(self) -> int:
         """Get number of chunks in the store."""
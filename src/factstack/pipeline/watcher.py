@@ -0,0 +1,88 @@
+"""Polling watcher for the documents directory."""
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from factstack.pipeline.chunking import find_documents
+
+
+def snapshot(docs_dir: Path) -> Dict[str, Tuple[int, int]]:
+    """Record the size and mtime of every document in a directory.
+    
+    Args:
+        docs_dir: Documents directory
+    
+    Returns:
+        Mapping from file path to (size, mtime in nanoseconds)
+    """
+    state = {}
+    for file_path in find_documents(docs_dir):
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            # Deleted between listing and stat
+            continue
+        state[str(file_path)] = (stat.st_size, stat.st_mtime_ns)
+    return state
+
+
+class DocsWatcher:
+    """Waits for debounced bursts of changes in a documents directory.
+    
+    The directory is polled every ``interval`` seconds. A change starts a
+    burst, and the burst ends once the directory stayed unchanged for
+    ``debounce`` seconds, so an editor saving several files (or a git
+    checkout) triggers one update instead of many. ``max_delay`` bounds how
+    long a burst of continuous changes can postpone the update.
+    """
+    
+    def __init__(
+        self,
+        docs_dir: Path,
+        interval: float = 1.0,
+        debounce: float = 2.0,
+        max_delay: float = 30.0
+    ):
+        """Initialize watcher from the current state of the directory.
+        
+        Args:
+            docs_dir: Documents directory
+            interval: Seconds between polls
+            debounce: Quiet seconds that end a burst of changes
+            max_delay: Maximum seconds between the first change and the update
+        """
+        self.docs_dir = Path(docs_dir)
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._snapshot = snapshot(self.docs_dir)
+    
+    def wait(self, stop: Optional[threading.Event] = None) -> bool:
+        """Block until a burst of changes has settled.
+        
+        Args:
+            stop: Event that ends the wait early
+        
+        Returns:
+            True if the directory changed, False if stopped
+        """
+        stop = stop or threading.Event()
+        first_change = None
+        last_change = None
+        
+        while not stop.wait(self.interval):
+            current = snapshot(self.docs_dir)
+            now = time.monotonic()
+            if current != self._snapshot:
+                self._snapshot = current
+                first_change = first_change or now
+                last_change = now
+            
+            if last_change is not None and (
+                now - last_change >= self.debounce or now - first_change >= self.max_delay
+            ):
+                return True
+        
+        return False
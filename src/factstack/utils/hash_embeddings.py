@@ -0,0 +1,76 @@
+"""Deterministic hash-based pseudo-embeddings for FactStack."""
+
+import hashlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import numpy as np
+
+
+# Minimum texts per worker process before fanning out is worth it
+MIN_TEXTS_PER_WORKER = 2048
+
+# sum() of floats is compensated from Python 3.12 on
+_SEQUENTIAL_FLOAT_SUM = sys.version_info < (3, 12)
+
+
+def _hash_block(texts: List[str], dimension: int) -> np.ndarray:
+    """Compute hash embeddings for a block of texts in one process."""
+    rounds = dimension // 32 + 1
+    suffixes = [f":{i}".encode() for i in range(rounds)]
+    raw = bytearray()
+    
+    for text in texts:
+        base = hashlib.sha256(text.encode())
+        for suffix in suffixes:
+            h = base.copy()
+            h.update(suffix)
+            raw += h.digest()
+    
+    values = np.frombuffer(bytes(raw), dtype=np.uint8).reshape(len(texts), rounds * 32)
+    embeddings = values[:, :dimension].astype(np.float64) / 255.0 - 0.5
+    
+    # The squared norm must round like the builtin sum() of the per-element
+    # implementation. Up to Python 3.11 sum() adds floats left to right, which
+    # cumsum reproduces exactly; from 3.12 it uses compensated (Neumaier)
+    # summation, so the builtin is called per row. The root stays in Python:
+    # float ** 0.5 uses libm pow(), while np.power(x, 0.5) is rewritten to
+    # sqrt() and can differ in the last bit.
+    squares = embeddings * embeddings
+    if _SEQUENTIAL_FLOAT_SUM:
+        sums = np.cumsum(squares, axis=1)[:, -1].tolist()
+    else:
+        sums = [sum(row) for row in squares.tolist()]
+    norms = np.array([s ** 0.5 for s in sums], dtype=np.float64).reshape(-1, 1)
+    np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+    return embeddings
+
+
+def hash_embeddings(texts: List[str], dimension: int = 1536, workers: int = 1) -> np.ndarray:
+    """Generate deterministic hash-based pseudo-embeddings.
+    
+    Each vector is built from SHA-256 digests of ``f"{text}:{i}"``, mapped
+    byte-wise to [-0.5, 0.5] and L2-normalized. This is NOT a semantic
+    embedding, just a stand-in for testing without an embedding API.
+    
+    Args:
+        texts: Texts to embed
+        dimension: Embedding dimension
+        workers: Number of processes to fan out to for large batches
+    
+    Returns:
+        Float64 array of shape (len(texts), dimension)
+    """
+    if not texts:
+        return np.zeros((0, dimension), dtype=np.float64)
+    
+    workers = max(1, min(workers, len(texts) // MIN_TEXTS_PER_WORKER))
+    if workers == 1:
+        return _hash_block(texts, dimension)
+    
+    shard = -(-len(texts) // workers)
+    blocks = [texts[i:i + shard] for i in range(0, len(texts), shard)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parts = list(executor.map(_hash_block, blocks, [dimension] * len(blocks)))
+    return np.concatenate(parts)
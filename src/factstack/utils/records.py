@@ -0,0 +1,185 @@
+"""Memory-mapped record files for FactStack."""
+
+import json
+import mmap
+import os
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+
+def save_array(path: Path, array: np.ndarray) -> None:
+    """Save a NumPy array atomically.
+    
+    The array is written to a temporary file and renamed into place, so
+    readers that memory-mapped the previous version keep a valid mapping.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp_path, path)
+
+
+def load_array(path: Path, mmap_mode: str = 'r') -> np.ndarray:
+    """Load a NumPy array, memory-mapped by default."""
+    return np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+
+
+class ArrayWriter:
+    """Writes a 2-D ``.npy`` file a block of rows at a time.
+    
+    The header is written up front with room for any row count and patched
+    with the final shape on close, so rows go straight to disk instead of
+    being collected in memory. The file is renamed into place on close.
+    """
+    
+    # Fixed header size (a multiple of 64, like NumPy's own alignment)
+    HEADER_BYTES = 128
+    
+    def __init__(self, path: Path, dtype: Any, columns: int):
+        """Start writing an array.
+        
+        Args:
+            path: Output path
+            dtype: Element type
+            columns: Number of columns
+        """
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.columns = columns
+        self.rows = 0
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(self._header())
+    
+    def _header(self) -> bytes:
+        header = repr({
+            'descr': np.lib.format.dtype_to_descr(self.dtype),
+            'fortran_order': False,
+            'shape': (self.rows, self.columns),
+        }).encode('latin1')
+        prefix = b"\x93NUMPY\x01\x00" + (self.HEADER_BYTES - 10).to_bytes(2, 'little')
+        return prefix + header.ljust(self.HEADER_BYTES - len(prefix) - 1) + b"\n"
+    
+    def append(self, rows: np.ndarray) -> None:
+        """Append rows of shape (n, columns)."""
+        rows = np.ascontiguousarray(rows, dtype=self.dtype).reshape(-1, self.columns)
+        self._file.write(rows.tobytes())
+        self.rows += len(rows)
+    
+    def close(self) -> None:
+        """Write the final shape and move the file into place."""
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+    
+    def abort(self) -> None:
+        """Stop writing and remove the partial file."""
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class RecordWriter:
+    """Appends records to a JSON lines file, tracking their byte offsets.
+    
+    The file is renamed into place on close.
+    """
+    
+    def __init__(self, path: Path):
+        """Start writing a record file.
+        
+        Args:
+            path: Output path
+        """
+        self.path = Path(path)
+        self.offsets = array('q', [0])
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp_path, 'wb')
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one record as a compact JSON line."""
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._file.write(line)
+        self._file.write(b"\n")
+        self.offsets.append(self.offsets[-1] + len(line) + 1)
+    
+    def close(self) -> np.ndarray:
+        """Move the file into place.
+        
+        Returns:
+            Byte offsets of the records, with a trailing end offset
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return np.frombuffer(self.offsets, dtype=np.int64).copy()
+    
+    def abort(self) -> None:
+        """Stop writing and remove the partial file."""
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def write_records(path: Path, records: Iterable[Dict[str, Any]]) -> np.ndarray:
+    """Write records as compact JSON lines.
+    
+    Args:
+        path: Output path
+        records: Records to write
+    
+    Returns:
+        Byte offsets of the records, with a trailing end offset
+    """
+    writer = RecordWriter(path)
+    for record in records:
+        writer.append(record)
+    return writer.close()
+
+
+class RecordFile:
+    """Random access to a JSON lines file through mmap.
+    
+    Only the records that are actually requested are read and decoded,
+    so opening a large file costs almost no resident memory.
+    """
+    
+    def __init__(self, path: Path, offsets: np.ndarray):
+        """Open a record file.
+        
+        Args:
+            path: Path of the JSON lines file
+            offsets: Byte offsets as returned by write_records
+        """
+        self.path = Path(path)
+        self.offsets = offsets
+        self._file = open(self.path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def get(self, index: int) -> Dict[str, Any]:
+        """Decode a single record."""
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return json.loads(self._mmap[start:end])
+    
+    def read_all(self) -> List[Dict[str, Any]]:
+        """Decode every record."""
+        return [self.get(i) for i in range(len(self))]
+    
+    def close(self) -> None:
+        """Release the mapping."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
@@ -29,6 +29,21 @@ def generate_chunk_id(source_path: str, chunk_index: int) -> str:
     return f"{clean_path}_{chunk_index}_{hash_val}"
 
 
+def generate_content_chunk_id(source_path: str, text: str, occurrence: int = 1) -> str:
+    """Generate a chunk ID from the file path and the chunk content.
+    
+    The ID does not depend on the chunk's position, so it survives edits
+    elsewhere in the file. Whitespace is normalized before hashing, and
+    repeated identical chunks of a file are told apart by their occurrence.
+    """
+    normalized = clean_text(text)
+    hash_val = hashlib.sha256(f"{source_path}\0{normalized}".encode()).hexdigest()[:12]
+    clean_path = re.sub(r'[^\w]', '_', source_path)
+    if occurrence > 1:
+        return f"{clean_path}_{hash_val}_{occurrence}"
+    return f"{clean_path}_{hash_val}"
+
+
 def truncate_text(text: str, max_length: int, suffix: str = "...") -> str:
     """Truncate text to a maximum length."""
     if len(text) <= max_length:
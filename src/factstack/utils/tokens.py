@@ -0,0 +1,70 @@
+"""Tokenizer utilities for FactStack."""
+
+import logging
+from functools import lru_cache
+from typing import Dict, Optional
+
+from factstack.utils.text import count_tokens_approx
+
+
+# Encoding used when a model is unknown to tiktoken
+DEFAULT_ENCODING = "cl100k_base"
+
+# Encodings get_encoding() has loaded, by model
+_loaded: Dict[Optional[str], object] = {}
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: Optional[str] = None):
+    """Get the tiktoken encoding for a model.
+    
+    Args:
+        model: OpenAI model name, or None for the default encoding
+    
+    Returns:
+        tiktoken Encoding, or None if tiktoken or its BPE files are unavailable
+    """
+    try:
+        import tiktoken
+        encoding = None
+        if model:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        encoding = encoding or tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logging.warning(f"tiktoken encoding unavailable: {e}, using estimates")
+        return None
+    _loaded[model] = encoding
+    return encoding
+
+
+def loaded_encoding(model: Optional[str] = None):
+    """Get the tiktoken encoding for a model if get_encoding() already loaded it.
+    
+    Never loads BPE files, which tiktoken downloads on first use.
+    
+    Args:
+        model: OpenAI model name, or None for the default encoding
+    
+    Returns:
+        tiktoken Encoding, or None if it is not loaded
+    """
+    return _loaded.get(model)
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count the tokens of a text.
+    
+    Args:
+        text: Text to count
+        model: OpenAI model name, or None for the default encoding
+    
+    Returns:
+        Exact token count, or an estimate if tiktoken is unavailable
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return count_tokens_approx(text)
+    return len(encoding.encode(text, disallowed_special=()))
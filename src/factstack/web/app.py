@@ -2,13 +2,14 @@
 
 import json
 import os
+import threading
 from pathlib import Path
 from typing import Optional
 
 from flask import Flask, render_template, request, jsonify
 
 from factstack.config import Config
-from factstack.ask import ask, get_llm
+from factstack.engine import EngineReloader
 from factstack.pipeline.query_language import detect_language
 
 
@@ -31,6 +32,18 @@ def create_app(db_dir: Optional[str] = None) -> Flask:
     app.config['DB_DIR'] = db_dir or os.environ.get('FACTSTACK_DB_DIR', './db')
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'factstack-dev-key')
     
+    # One engine per app, hot-swapped when ingest publishes a new generation
+    reloaders = {}
+    reloaders_lock = threading.Lock()
+    
+    def get_reloader(db_dir: Path) -> EngineReloader:
+        with reloaders_lock:
+            reloader = reloaders.get(db_dir)
+            if reloader is None:
+                reloader = EngineReloader(db_dir, Config.from_env())
+                reloaders[db_dir] = reloader
+            return reloader
+    
     @app.route('/')
     def index():
         """Render the main page."""
@@ -70,12 +83,10 @@ def create_app(db_dir: Optional[str] = None) -> Flask:
                     'error': f'Database directory not found: {db_dir}. Please run ingestion first.'
                 }), 400
             
-            # Run the RAG pipeline
-            config = Config.from_env()
-            result = ask(
+            # Run the RAG pipeline on the engine of the current index generation
+            engine = get_reloader(db_dir).get()
+            result = engine.ask(
                 question=question,
-                db_dir=db_dir,
-                config=config,
                 top_k=top_k,
                 save_artifacts=True,
                 cross_lingual=cross_lingual,